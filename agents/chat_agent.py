@@ -1,14 +1,30 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from schema import GraphMessage                        # <- your Pydantic model
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_ollama import ChatOllama
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
-import re
+from registry import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT_S, ollama_preload, resources
+from agents.ttl_cache import TTLCache
+import json, os, re, time
 
 # ─────────────────────────  LLM SET‑UP  ──────────────────────────
-llm = ChatOllama(model="llama3:8b", base_url="http://localhost:11434")
+CHAT_MODEL = "llama3:8b"
+
+def _make_llm():
+    from langchain_ollama import ChatOllama
+    return ChatOllama(model=CHAT_MODEL, base_url=OLLAMA_BASE_URL, keep_alive=OLLAMA_KEEP_ALIVE,
+                      client_kwargs={"timeout": OLLAMA_TIMEOUT_S})
+
+resources.register("chat_llm", _make_llm, warm=lambda _llm: ollama_preload(CHAT_MODEL))
+
+def get_llm():
+    return resources.get("chat_llm")
+
+# (time‑to‑first‑token, total) seconds for recent LLM replies
+LLM_TIMINGS: Deque[Tuple[float, float]] = deque(maxlen=1000)
+
 SYSTEM_PROMPT = (
     "You are Zen, a concise, helpful assistant for a multi‑agent demo. "
     "Capabilities:\n"
@@ -23,13 +39,169 @@ _PLATE_INTENT_RE = re.compile(
     r"\b(look\s*up|check|decode|identify|what\s+car|vehicle\s+details?)\b",
     re.I,
 )
-# ─────────────────────────  AGENT LOGIC  ─────────────────────────
-def chat_agent(
-    state: GraphMessage,
-    _config: RunnableConfig | None = None
-) -> GraphMessage:
-    msg = state
+# ─────────────────────────  TIERED SMALL‑TALK  ───────────────────
+# tier 1: canned answers for intents the system prompt already fixes
+WORKFLOW_REPLY = (
+    "Here’s how it works:\n"
+    "1. Upload a photo of a licence plate (and optionally a message).\n"
+    "2. The OCR agent finds the plate in the image and reads the registration.\n"
+    "3. The processing agent validates the format and looks the vehicle up (DVLA).\n"
+    "4. I summarise the vehicle details for you.\n"
+    "Anything else, just ask and I’ll chat normally."
+)
+# only questions about *this* app – "how does the internet work?" goes to the LLM
+_THIS_APP = r"(this|it|you|the\s+(app|demo|pipeline|ocr|system|bot|assistant|lookup))"
+_CANNED_INTENTS: List[Tuple[str, re.Pattern, str]] = [
+    ("workflow", re.compile(
+        rf"\b(how\s+(does|do|did)\s+{_THIS_APP}\s+work|what\s+can\s+you\s+do|"
+        rf"how\s+(do\s+i|to)\s+use\s+{_THIS_APP}\W*$|"
+        r"(explain|describe)\s+(the\s+|this\s+|your\s+)?(process|workflow|pipeline)\W*$|"
+        r"^\s*help\W*$)", re.I),
+     WORKFLOW_REPLY),
+    ("greeting", re.compile(r"^\s*(hi|hello|hey|hiya|yo|good\s+(morning|afternoon|evening))\W*$", re.I),
+     "Hi! I’m Zen. Upload a licence‑plate photo and I’ll look the vehicle up, or just chat."),
+    ("thanks", re.compile(
+        r"^\s*(thanks|thank\s+you|cheers|ta)(\s+(so\s+much|a\s+lot|very\s+much|again|"
+        r"for\s+(that|this|the\s+help|your\s+help|the\s+info)))?(\s+zen)?\W*$", re.I),
+     "You’re welcome! Anything else I can look up?"),
+    ("identity", re.compile(r"\b(who\s+are\s+you|what('?s|\s+is)\s+your\s+name)\b", re.I),
+     "I’m Zen, the assistant for this multi‑agent licence‑plate demo."),
+]
+
+# tier 2: normalised prompt → LLM reply, only for turns sent without any
+# session context (the key doesn't cover history / summary / last vehicle)
+_reply_cache: TTLCache[str] = TTLCache(
+    max_items=int(os.getenv("CHAT_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("CHAT_CACHE_TTL", "3600")),
+)
+TIER_COUNTS: Dict[str, int] = {"canned": 0, "cache": 0, "llm": 0}
+
+
+# ─────────────────────────  CONVERSATION MEMORY  ─────────────────
+# History sent to Ollama is capped by a rough token budget (≈4 chars per
+# token); older turns are rolled into a short running summary so prompt
+# size – and prompt‑processing latency – stays flat over long sessions.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1024"))
+SUMMARY_MAX_CHARS = int(os.getenv("SUMMARY_MAX_CHARS", "1200"))
+
+# follow‑up questions answerable from the last vehicle record
+_VEHICLE_FIELDS: List[Tuple[re.Pattern, str, str]] = [
+    (re.compile(r"\b(colou?r)\b", re.I), "colour", "Colour"),
+    (re.compile(r"\b(make|brand|manufacturer)\b", re.I), "make", "Make"),
+    (re.compile(r"\bmodel\b", re.I), "model", "Model"),
+    (re.compile(r"\b(year|how\s+old|age|built|manufactured)\b", re.I), "yearOfManufacture", "Year"),
+    (re.compile(r"\b(first\s+reg\w*|registered)\b", re.I), "monthOfFirstRegistration", "First registered"),
+    (re.compile(r"\btax(ed)?\b", re.I), "taxStatus", "Tax status"),
+    (re.compile(r"\bmot\b", re.I), "motStatus", "MOT status"),
+    (re.compile(r"\bmot\b.*\b(expir\w*|due)\b", re.I), "motExpiryDate", "MOT expiry"),
+    (re.compile(r"\b(fuel|petrol|diesel|electric)\b", re.I), "fuelType", "Fuel"),
+    (re.compile(r"\b(engine|cc|capacity)\b", re.I), "engineCapacity", "Engine (cc)"),
+    (re.compile(r"\b(co2|emissions?)\b", re.I), "co2Emissions", "CO₂ (g/km)"),
+]
+# …but only when the question is about *that* vehicle, not “make me a joke”
+_VEHICLE_REF_RE = re.compile(r"\b(it|its|it's|that|this|car|vehicle|van|one)\b", re.I)
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _fit_history(history: List[Dict[str, str]], summary: str) -> Tuple[List[Dict[str, str]], str]:
+    """Keep the newest turns that fit the budget; fold the rest into *summary*."""
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for turn in reversed(history):
+        cost = _tokens(turn["content"])
+        if kept and used + cost > HISTORY_TOKEN_BUDGET:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+
+    dropped = history[:len(history) - len(kept)]
+    if dropped:
+        rolled = " | ".join(f"{t['role']}: {t['content'][:120]}" for t in dropped)
+        summary = f"{summary} | {rolled}" if summary else rolled
+        summary = summary[-SUMMARY_MAX_CHARS:]
+    return kept, summary
+
+
+def _with_memory(msg: GraphMessage, reply: GraphMessage) -> GraphMessage:
+    """Record this turn in the session state carried by the checkpointer."""
+    history = list(msg.history or [])
+    if msg.role == "user":
+        content = msg.text or ""
+        if msg.data and msg.data.get("image_path"):
+            content = f"[uploaded a photo] {content}".strip()
+        history.append({"role": "user", "content": content})
+    if reply.role == "assistant":
+        history.append({"role": "assistant", "content": reply.text or ""})
+
+    reply.history, reply.summary = _fit_history(history, msg.summary or "")
+    if msg.data and "vehicle" in msg.data:
+        reply.last_vehicle = msg.data["vehicle"]
+    return reply
+
+
+def _vehicle_followup(msg: GraphMessage) -> Optional[GraphMessage]:
+    """Answer “what colour was it?” from the stored record – no re‑OCR, no re‑lookup."""
+    v = msg.last_vehicle
+    if not v or msg.role != "user":
+        return None
+    text = msg.text or ""
+    if not _VEHICLE_REF_RE.search(text):
+        return None
+    hits = [(label, v[key]) for rx, key, label in _VEHICLE_FIELDS if key in v and rx.search(text)]
+    if not hits:
+        return None
+    lines = [f"For {v.get('registrationNumber', 'that vehicle')}:"]
+    lines += [f"• {label}: {value}" for label, value in dict(hits).items()]
+    return GraphMessage(role="assistant", text="\n".join(lines))
+
+
+def _classify(text: str) -> Optional[str]:
+    """Name of the canned intent *text* matches, if any."""
+    for name, pattern, _ in _CANNED_INTENTS:
+        if pattern.search(text):
+            return name
+    return None
+
+
+def _normalise(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
 
+
+def _fast_reply(msg: GraphMessage) -> Optional[GraphMessage]:
+    """Tier 1 (canned) or tier 2 (cached) answer; None → fall through to the LLM."""
+    text = msg.text or ""
+    intent = _classify(text)
+    if intent is not None:
+        TIER_COUNTS["canned"] += 1
+        return GraphMessage(role="assistant", text=next(r for n, _, r in _CANNED_INTENTS if n == intent))
+
+    cached = _reply_cache.get(_normalise(text)) if _cacheable(msg) else None
+    if cached is not None:
+        TIER_COUNTS["cache"] += 1
+        return GraphMessage(role="assistant", text=cached)
+
+    TIER_COUNTS["llm"] += 1
+    return None
+
+
+def _cacheable(msg: GraphMessage) -> bool:
+    """Only context‑free turns share replies across sessions – anything the prompt
+    adds from this session (history, summary, last vehicle) may shape the answer."""
+    return not (msg.history or msg.summary or msg.last_vehicle)
+
+
+def tier_hit_ratios() -> Dict[str, float]:
+    total = sum(TIER_COUNTS.values())
+    return {tier: (n / total if total else 0.0) for tier, n in TIER_COUNTS.items()}
+
+
+# ─────────────────────────  AGENT LOGIC  ─────────────────────────
+def _route(msg: GraphMessage) -> Optional[GraphMessage]:
+    """Deterministic replies / delegation; None means “ask the LLM”."""
     # ➊ Helper flags
     has_image = bool(msg.data and msg.data.get("image_path"))
     # ➋ Intent + image  → delegate once to OCR
@@ -40,18 +212,28 @@ def chat_agent(
             data=msg.data
     )
 
-    # ➌ Intent but NO image → prompt user to upload one
+    # ➌ Intent but NO image → prompt user to upload one (a new lookup wins
+    #    over a follow‑up: "check this plate" is not about the last vehicle)
     if _PLATE_INTENT_RE.search(msg.text or "") and not has_image:
         return GraphMessage(
             role="assistant",
             text="Please upload a clear photo of the licence plate so I can analyse it."
     )
 
-    # ➍ Vehicle data already present → summarise for the user
+    # ➍ Follow‑up about the vehicle we already looked up
+    if not has_image:
+        followup = _vehicle_followup(msg)
+        if followup is not None:
+            return followup
+
+    # ➎ Vehicle data already present → summarise for the user
     if msg.data and "vehicle" in msg.data:
         v = msg.data["vehicle"]
 
+        read_as = msg.data.get("read_as")     # DVLA matched a look‑alike of the best reading
         reply_lines = [
+            f"No DVLA record for '{read_as}', so I used a similar reading – "
+            "please check the reg matches your photo:" if read_as else
             "Here are the details I found:",
             f"• Reg: {v.get('registrationNumber', 'N/A')}",
             f"• Make/Model: {v.get('make', 'N/A')} {v.get('model', '')}".strip(),
@@ -59,18 +241,81 @@ def chat_agent(
             f"• First Reg: {v.get('yearOfManufacture', 'N/A')}",
         ]
         return GraphMessage(role="assistant", text="\n".join(reply_lines))
+    return None
+
 
-    # ── Otherwise: normal small‑talk via LLM ─────────────────────
+def _prompt(msg: GraphMessage) -> List[BaseMessage]:
     human_text = msg.text or ""
-    ai_msg = llm.invoke([
-        SystemMessage(content=SYSTEM_PROMPT),
+    system = SYSTEM_PROMPT
+    if msg.summary:
+        system += f"\n\nEarlier in this conversation: {msg.summary}"
+    if msg.last_vehicle:
+        system += f"\n\nLast vehicle looked up: {json.dumps(msg.last_vehicle)}"
+
+    turns: List[BaseMessage] = [
+        HumanMessage(content=t["content"]) if t["role"] == "user" else AIMessage(content=t["content"])
+        for t in (msg.history or [])
+    ]
+    return [
+        SystemMessage(content=system),
+        *turns,
         HumanMessage(content=human_text)
-    ])
+    ]
+
 
-    content = (
+def _reply_text(ai_msg: BaseMessage) -> str:
+    return (
         ai_msg.content
         if isinstance(ai_msg.content, str)
         else " ".join(c if isinstance(c, str) else str(c) for c in ai_msg.content)
     )
 
-    return GraphMessage(role="assistant", text=content)
+
+def chat_agent(
+    state: GraphMessage,
+    config: RunnableConfig | None = None
+) -> GraphMessage:
+    msg = state
+
+    routed = _route(msg) or _fast_reply(msg)
+    if routed is not None:
+        return _with_memory(msg, routed)
+
+    # ── Otherwise: normal small‑talk via LLM (streamed, so LangGraph's
+    #    "messages" stream mode can forward tokens as they arrive) ─────
+    t0 = time.perf_counter()
+    ttft, ai_msg = None, None
+    for chunk in get_llm().stream(_prompt(msg), config=config):
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        ai_msg = chunk if ai_msg is None else ai_msg + chunk
+    LLM_TIMINGS.append((ttft or 0.0, time.perf_counter() - t0))
+    return _llm_reply(msg, ai_msg)
+
+
+async def achat_agent(
+    state: GraphMessage,
+    config: RunnableConfig | None = None
+) -> GraphMessage:
+    """Async twin of ``chat_agent`` – streams from Ollama instead of blocking."""
+    msg = state
+
+    routed = _route(msg) or _fast_reply(msg)
+    if routed is not None:
+        return _with_memory(msg, routed)
+
+    t0 = time.perf_counter()
+    ttft, ai_msg = None, None
+    async for chunk in get_llm().astream(_prompt(msg), config=config):
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+        ai_msg = chunk if ai_msg is None else ai_msg + chunk
+    LLM_TIMINGS.append((ttft or 0.0, time.perf_counter() - t0))
+    return _llm_reply(msg, ai_msg)
+
+
+def _llm_reply(msg: GraphMessage, ai_msg: Optional[BaseMessage]) -> GraphMessage:
+    text = _reply_text(ai_msg) if ai_msg else ""
+    if text and _cacheable(msg):
+        _reply_cache.put(_normalise(msg.text or ""), text)
+    return _with_memory(msg, GraphMessage(role="assistant", text=text))
@@ -0,0 +1,209 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional
+
+import asyncio, json, os, threading
+import httpx, requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from agents.ttl_cache import TTLCache
+
+# ─────────────  DVLA Vehicle‑Enquiry lookup layer  ──────────────
+#   • one pooled keep‑alive session for every lookup
+#   • TTL cache of vehicle records, with shorter‑lived negative (404) entries
+#   • single‑flight: N concurrent lookups of one plate → one upstream call
+#   • urllib3 retry with exponential backoff on 429 / 5xx / connection errors
+#   • ``alookup``: the same behaviour on a pooled httpx.AsyncClient
+
+DEFAULT_DVLA_URL = "https://driver-vehicle-licensing.api.gov.uk/vehicle-enquiry/v1/vehicles"
+_NOT_FOUND: Dict[str, Any] = {}          # sentinel stored for negative cache entries
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class DvlaClient:
+    def __init__(
+        self,
+        url: str = DEFAULT_DVLA_URL,
+        api_key: str = "",
+        timeout: float = 10.0,
+        retries: int = 3,
+        backoff: float = 0.3,
+        pool_size: int = 10,
+        cache_ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        cache_size: int = 4096,
+    ) -> None:
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.negative_ttl = negative_ttl
+        self.cache: TTLCache[Dict[str, Any]] = TTLCache(cache_size, cache_ttl)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=_RETRY_STATUS,
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"x-api-key": api_key, "Content-Type": "application/json"})
+
+        self._inflight: Dict[str, _Flight] = {}
+        self._ainflight: Dict[str, asyncio.Future] = {}
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.upstream_calls = self.coalesced = 0
+
+    @classmethod
+    def from_env(cls) -> "DvlaClient":
+        return cls(
+            url=os.getenv("DVLA_URL", DEFAULT_DVLA_URL),
+            api_key=os.getenv("DVLA_API_KEY", ""),
+            timeout=float(os.getenv("DVLA_TIMEOUT", "10")),
+            retries=int(os.getenv("DVLA_RETRIES", "3")),
+            backoff=float(os.getenv("DVLA_BACKOFF", "0.3")),
+            pool_size=int(os.getenv("DVLA_POOL_SIZE", "10")),
+            cache_ttl=float(os.getenv("DVLA_CACHE_TTL", "3600")),
+            negative_ttl=float(os.getenv("DVLA_NEGATIVE_TTL", "300")),
+        )
+
+    # ─── public ────────────────────────────────────────────────────
+    def lookup(self, plate: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the vehicle record for *plate*, or None when DVLA answers 404.
+        Other failures raise ``requests.RequestException``.
+        """
+        cached = self.cache.get(plate)
+        if cached is not None:
+            return None if cached is _NOT_FOUND else cached
+
+        with self._lock:
+            flight = self._inflight.get(plate)
+            leader = flight is None
+            if flight is None:
+                flight = self._inflight[plate] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._fetch(plate)
+            return flight.result
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[plate]
+            flight.event.set()
+
+    async def alookup(self, plate: str) -> Optional[Dict[str, Any]]:
+        """
+        Async ``lookup``. Failures raise ``httpx.HTTPError`` (``ValueError``
+        for a body that isn't JSON); concurrent callers on the same event
+        loop share one in‑flight request.
+        """
+        cached = self.cache.get(plate)
+        if cached is not None:
+            return None if cached is _NOT_FOUND else cached
+
+        flight = self._ainflight.get(plate)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            # the fetch is its own task, not the first caller's: a caller
+            # cancelled mid‑lookup (e.g. its run deadline) leaves it running
+            # for everyone else waiting on the plate
+            flight = self._ainflight[plate] = asyncio.ensure_future(self._afetch(plate))
+            flight.add_done_callback(lambda done: self._land(plate, done))
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+    # ─── internals ─────────────────────────────────────────────────
+    def _land(self, plate: str, flight: asyncio.Future) -> None:
+        if self._ainflight.get(plate) is flight:
+            del self._ainflight[plate]
+        if not flight.cancelled():
+            flight.exception()               # mark retrieved when every waiter has gone
+
+    def _fetch(self, plate: str) -> Optional[Dict[str, Any]]:
+        self.upstream_calls += 1
+        res = self.session.post(
+            self.url,
+            data=json.dumps({"registrationNumber": plate}),
+            timeout=self.timeout,
+        )
+        if res.status_code == 404:
+            self.cache.put(plate, _NOT_FOUND, ttl=self.negative_ttl)
+            return None
+        res.raise_for_status()
+        vehicle = res.json()
+        self.cache.put(plate, vehicle)
+        return vehicle
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                headers=dict(self.session.headers),
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    async def _afetch(self, plate: str) -> Optional[Dict[str, Any]]:
+        client = self._async_client()
+        payload = json.dumps({"registrationNumber": plate})
+        self.upstream_calls += 1
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                res = await client.post(self.url, content=payload)
+            except httpx.TransportError:
+                if last:
+                    raise
+            else:
+                if res.status_code not in _RETRY_STATUS or last:
+                    break
+            await asyncio.sleep(self.backoff * (2 ** attempt))
+
+        if res.status_code == 404:
+            self.cache.put(plate, _NOT_FOUND, ttl=self.negative_ttl)
+            return None
+        res.raise_for_status()
+        vehicle = res.json()
+        self.cache.put(plate, vehicle)
+        return vehicle
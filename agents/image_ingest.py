@@ -0,0 +1,233 @@
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+
+import cv2, hashlib, io, logging, numpy as np, os, time
+from PIL import Image, ImageOps, UnidentifiedImageError
+from schema import GraphMessage
+from instrumentation import metrics
+
+log = logging.getLogger(__name__)
+
+# ─────────────  upload → BGR array, once per image  ──────────────
+# Both OCR agents (and the cascade that chains them) read the decoded frame
+# from ``msg.data["image"]``; only this module touches the file.
+#
+#   0. the raw bytes are hashed first: a repeat upload is answered from the
+#      OCR cache without ever being decoded
+#   1. size limit on the file, pixel limit on the header (before any decode)
+#   2. reduced decode: JPEG is scaled 1/2, 1/4 or 1/8 inside libjpeg when the
+#      photo is at least twice INGEST_TARGET_SIDE, so a 12 MP phone shot never
+#      exists at full size; other formats are area‑downscaled after decoding
+#   3. EXIF orientation applied by us for every format (OpenCV only does JPEG)
+#   4. formats OpenCV can't read (HEIC with pillow‑heif, …) go through Pillow
+
+INGEST_TARGET_SIDE = int(os.getenv("INGEST_TARGET_SIDE", "1600"))          # long side OCR needs
+INGEST_MAX_BYTES   = int(os.getenv("INGEST_MAX_BYTES", str(25 * 2**20)))    # file size limit
+INGEST_MAX_PIXELS  = int(os.getenv("INGEST_MAX_PIXELS", "50000000"))       # decompression bombs
+INGEST_REDUCED     = os.getenv("INGEST_REDUCED", "1") != "0"               # 0 = full‑size decode
+
+# decoded resolution changes OCR results → part of every OCR cache key
+INGEST_SETTINGS = dict(target_side=INGEST_TARGET_SIDE, reduced=INGEST_REDUCED, exif=1)
+
+try:                                    # optional: HEIC / HEIF uploads from iPhones
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    pass
+
+# PIL's bomb guard is process‑wide and also covers Gradio's own upload decode,
+# which runs before ingest(): it warns above the limit and refuses twice it
+Image.MAX_IMAGE_PIXELS = INGEST_MAX_PIXELS
+
+_REDUCED_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                  4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+metrics.help["image_ingest_total"] = "Uploads by ingestion outcome"
+metrics.help["image_ingest_reduction"] = "Decode downscale factor (original / decoded long side)"
+
+NO_IMAGE_REPLY   = "⚠️ No image received. Please upload a licence‑plate photo."
+UNREADABLE_REPLY = "⚠️ Failed to read that image file. Please try another photo."
+
+
+class ImageRejected(Exception):
+    """Upload refused before OCR; ``str(err)`` is the reply shown to the user."""
+
+    def __init__(self, reason: str, reply: str = UNREADABLE_REPLY) -> None:
+        super().__init__(reply)
+        self.reason = reason                # short form for logs / batch records
+
+
+# ─── helpers ──────────────────────────────────────────────────────
+def _reduction(long_side: int, target: int = INGEST_TARGET_SIDE) -> int:
+    """Largest 1/2/4/8 decode factor that keeps the long side ≥ *target*."""
+    factor = 1
+    while factor < 8 and long_side // (factor * 2) >= target:
+        factor *= 2
+    return factor
+
+
+def _orient(img: np.ndarray, orientation: int) -> np.ndarray:
+    """Apply an EXIF orientation tag (1‑8) the way ``ImageOps.exif_transpose`` does."""
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img), -1)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def _shrink(img: np.ndarray, target: int) -> np.ndarray:
+    """Area‑downscale so the long side is < 2×*target* (no‑op for reduced JPEGs)."""
+    h, w = img.shape[:2]
+    if max(h, w) < 2 * target:
+        return img
+    scale = target / float(max(h, w))
+    return cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))),
+                      interpolation=cv2.INTER_AREA)
+
+
+def _via_pillow(im: Image.Image, factor: int) -> Optional[np.ndarray]:
+    w, h = im.size
+    try:
+        im.draft("RGB", (w // factor, h // factor))       # JPEG: DCT scaling, else no‑op
+        im = ImageOps.exif_transpose(im).convert("RGB")
+    except (OSError, ValueError) as err:
+        log.debug("Pillow decode failed: %s", err)
+        return None
+    return cv2.cvtColor(np.asarray(im), cv2.COLOR_RGB2BGR)
+
+
+def _too_large_reply(size: Optional[Tuple[int, int]] = None) -> str:
+    dims = f" ({size[0]}×{size[1]} px)" if size else ""
+    return (f"⚠️ That image is too large{dims}. "
+            f"Please upload one under {INGEST_MAX_PIXELS / 1e6:.0f} megapixels.")
+
+
+def decode_image(raw: bytes, target_side: int = INGEST_TARGET_SIDE) -> Tuple[np.ndarray, float]:
+    """
+    (upright BGR image, original / decoded scale) for the encoded bytes *raw*.
+
+    Raises ``ImageRejected`` when the header is over ``INGEST_MAX_PIXELS`` or
+    nothing can decode the bytes.
+    """
+    try:
+        im = Image.open(io.BytesIO(raw))                  # header only – nothing decoded yet
+        size, orientation = im.size, im.getexif().get(0x0112, 1)
+    except Image.DecompressionBombError:                  # > 2 × INGEST_MAX_PIXELS
+        raise ImageRejected("too many pixels", _too_large_reply())
+    except (UnidentifiedImageError, OSError):
+        im, size, orientation = None, None, 1
+
+    if size is not None and size[0] * size[1] > INGEST_MAX_PIXELS:
+        raise ImageRejected("too many pixels", _too_large_reply(size))
+
+    factor = _reduction(max(size)) if size is not None and INGEST_REDUCED else 1
+    flags = _REDUCED_FLAGS[factor] | cv2.IMREAD_IGNORE_ORIENTATION
+    img = cv2.imdecode(np.frombuffer(raw, np.uint8), flags)
+    if img is not None:
+        img = _orient(img, orientation)
+    elif im is not None:                                  # HEIC & co.
+        img = _via_pillow(im, factor)
+    if img is None:
+        raise ImageRejected("unreadable image")
+
+    if INGEST_REDUCED:
+        img = _shrink(img, target_side)
+    scale = max(size) / float(max(img.shape[:2])) if size is not None else 1.0
+    metrics.observe("image_ingest_reduction", scale, (1, 1.5, 2, 3, 4, 6, 8, 16))
+    return img, scale
+
+
+def _read(path: str) -> bytes:
+    try:
+        size = os.path.getsize(path)
+        if size > INGEST_MAX_BYTES:
+            raise ImageRejected(
+                "file too large",
+                f"⚠️ That image is too large ({size / 2**20:.1f} MB). "
+                f"Please upload one under {INGEST_MAX_BYTES / 2**20:.0f} MB."
+            )
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        raise ImageRejected("unreadable image") from None
+
+
+def _rejected(err: ImageRejected) -> None:
+    metrics.inc("image_ingest_total", outcome=err.reason.replace(" ", "_"))
+
+
+def read_upload(path: str) -> Dict:
+    """Read + hash the upload at *path*; nothing is decoded, so the OCR cache can be asked first."""
+    try:
+        raw = _read(path)
+    except ImageRejected as err:
+        _rejected(err)
+        raise
+    return {
+        "image_bytes": raw,                               # the original file, for decode / raw uploads
+        "image_digest": hashlib.sha256(raw).hexdigest(),  # OCR cache key (original bytes)
+    }
+
+
+def decode_upload(data: Dict) -> Dict:
+    """
+    Add the decoded ``image`` / ``image_scale`` to *data* (in place) and
+    return it; a no‑op when an earlier tier already decoded it.
+    Raises ``ImageRejected`` like ``decode_image``.
+    """
+    if "image" in data:
+        return data
+    t0 = time.perf_counter()
+    try:
+        img, scale = decode_image(data["image_bytes"])
+    except ImageRejected as err:
+        _rejected(err)
+        raise
+    metrics.inc("image_ingest_total", outcome="ok")
+    data.update(image=img,                                # BGR, upright, ≤ ~2× target side
+                image_scale=scale,
+                decode_ms=(time.perf_counter() - t0) * 1000)
+    return data
+
+
+def load_image(path: str) -> Dict:
+    """Read + decode the upload at *path* → the ``data`` keys OCR nodes consume."""
+    return decode_upload(read_upload(path))
+
+
+# ─── shared stage for the OCR nodes ───────────────────────────────
+def ingest(msg: GraphMessage, decode: bool = True) -> GraphMessage | Dict:
+    """
+    Early reply (no image / rejected / undecodable) or a copy of ``msg.data``
+    with the upload's bytes and digest added, plus the decoded ``image``
+    unless *decode* is false – the OCR nodes check their cache by digest
+    first and call ``decode_upload`` only on a miss. Idempotent: an already
+    ingested message is passed through, so chained OCR tiers share one
+    read and one decode.
+    """
+    data = msg.data or {}
+    if "image_bytes" not in data:
+        if "image_path" not in data:
+            return GraphMessage(role="assistant", text=NO_IMAGE_REPLY)
+        try:
+            data = {**data, **read_upload(str(data["image_path"]))}
+        except ImageRejected as err:
+            return GraphMessage(role="assistant", text=str(err))
+    else:
+        data = dict(data)
+    if not decode:
+        return data
+    try:
+        return decode_upload(data)
+    except ImageRejected as err:
+        return GraphMessage(role="assistant", text=str(err))
@@ -1,15 +1,37 @@
 from __future__ import annotations
-from typing import List, Tuple, cast
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
 
-import cv2, numpy as np, re
-import easyocr
+import asyncio, cv2, numpy as np, os, re, time
 from schema import GraphMessage
 from langchain_core.runnables import RunnableConfig
+from agents.image_ingest import INGEST_SETTINGS, ImageRejected, decode_upload, ingest
+from agents.ocr_backends import BACKEND_SETTINGS, BACKENDS, OCR_BACKEND, get_backend, register_backend
+from agents.ocr_cache import ocr_cache
+from agents.ocr_pool import OcrPoolError, OcrPoolTimeout
+from agents.plate_decoder import PlateCandidate, decode_crops
+from registry import resources
 
-# 1️⃣  EasyOCR reader – detector ON for better localisation
-reader = easyocr.Reader(
-    ['en'], gpu=False, detector=True, recog_network='standard'
-)
+# 1️⃣  Text recogniser: OCR_BACKEND (EasyOCR by default, see agents/ocr_backends.py),
+# loaded on first use. OCR_POOL_SIZE>0 → OCR runs in that many worker processes
+# (agents/ocr_pool.py), each with its own backend, so the parent never loads one
+OCR_POOL_SIZE    = int(os.getenv("OCR_POOL_SIZE", "0"))
+OCR_POOL_QUEUE   = int(os.getenv("OCR_POOL_QUEUE", str(4 * OCR_POOL_SIZE)))   # max pending images
+OCR_POOL_WAIT_S  = float(os.getenv("OCR_POOL_WAIT_S", "30"))                 # submit() back‑pressure
+OCR_POOL_OCR_S   = float(os.getenv("OCR_POOL_OCR_S", "60"))                  # one image, once queued / in a worker
+
+# the configured backend is loaded by warm‑up, unless the pool workers hold it
+if OCR_BACKEND in BACKENDS:
+    register_backend(OCR_BACKEND, BACKENDS[OCR_BACKEND], BACKEND_SETTINGS[OCR_BACKEND],
+                     eager=not OCR_POOL_SIZE)
+
+def _make_pool():
+    from agents.ocr_pool import OcrPool
+    return OcrPool(OCR_POOL_SIZE, max_pending=OCR_POOL_QUEUE or None, backend=OCR_BACKEND,
+                   job_timeout=OCR_POOL_OCR_S)
+
+if OCR_POOL_SIZE:
+    resources.register("ocr_pool", _make_pool, warm=lambda pool: pool.wait_ready())
 
 # ─── helper: crop candidate plate region ──────────────────────────
 def _crop_plate(img: np.ndarray) -> Tuple[np.ndarray, bool]:
@@ -44,52 +66,227 @@ def _crop_plate(img: np.ndarray) -> Tuple[np.ndarray, bool]:
     return img, False  # fallback to full image
 
 
-# ─── agent function ───────────────────────────────────────────────
-def ocr_agent(
-    state: GraphMessage,
-    _config: RunnableConfig | None = None
-) -> GraphMessage:
-    msg = state
+# ─── helper: ranked plate candidates on a downscaled pyramid level ─
+LOCALISE_MAX_SIDE = int(os.getenv("LOCALISE_MAX_SIDE", "800"))   # detection resolution
+PLATE_TOP_K       = int(os.getenv("PLATE_TOP_K", "3"))
+CROP_SIZE         = (320, 96)      # (w, h) crops are resized to for batched OCR
 
-    if msg.data is None or "image_path" not in msg.data:
-        return GraphMessage(
-            role="assistant",
-            text="⚠️ No image received. Please upload a licence‑plate photo."
-        )
+Box = Tuple[int, int, int, int]
 
-    img_path: str = cast(str, msg.data["image_path"])
-    img = cv2.imread(img_path)
+def _iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter) if inter else 0.0
 
-    # 🔒  Guard: imread failed
-    if img is None:
-        return GraphMessage(
-            role="assistant",
-            text="⚠️ Failed to read that image file. Please try another photo."
-        )
 
-    # 2️⃣  Crop likely plate region
-    crop, found = _crop_plate(img)
+def _plate_boxes(edges: np.ndarray, mode: int, img_area: int) -> List[Tuple[float, Box]]:
+    cnts, _ = cv2.findContours(edges, mode, cv2.CHAIN_APPROX_SIMPLE)
+    lo, hi = 0.02 * img_area, 0.5 * img_area
+    scored: List[Tuple[float, Box]] = []
 
-    # 3️⃣  Run EasyOCR
-    def _run_ocr(mat: np.ndarray) -> List[str]:
-        return [r for r in reader.readtext(mat, detail=0) if isinstance(r, str)]
+    for c in cnts:
+        # cheap bounding‑box filters first; approxPolyDP only for survivors
+        x, y, w, h = cv2.boundingRect(c)
+        area = w * h
+        if not (lo < area < hi) or not (2 < (w / h if h else 0) < 6):
+            continue
+        approx = cv2.approxPolyDP(c, 0.02 * cv2.arcLength(c, True), True)
+        if len(approx) != 4:
+            continue
+        fill = cv2.contourArea(approx) / area      # 1.0 = perfect rectangle
+        scored.append((area * fill, (x, y, w, h)))
+    return scored
+
+
+def _localise_plates(
+    img: np.ndarray,
+    top_k: int = PLATE_TOP_K,
+    max_side: int = LOCALISE_MAX_SIDE,
+) -> List[Tuple[np.ndarray, Box]]:
+    """
+    Return up to *top_k* (crop, box) plate candidates, best first.
+
+    Detection runs on a copy downscaled so its long side is *max_side*
+    using external contours only (falling back to the full contour list
+    when that finds nothing); boxes are mapped back and cropped from the
+    full‑resolution image.
+    """
+    h, w = img.shape[:2]
+    scale = min(1.0, max_side / float(max(h, w)))
+    small = (cv2.resize(img, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+             if scale < 1.0 else img)
+
+    gray  = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    blur  = cv2.bilateralFilter(gray, 11, 17, 17)
+    edges = cv2.Canny(blur, 30, 200)
+    area  = small.shape[0] * small.shape[1]
+
+    scored = _plate_boxes(edges, cv2.RETR_EXTERNAL, area) \
+        or _plate_boxes(edges, cv2.RETR_LIST, area)
+    scored.sort(key=lambda sb: sb[0], reverse=True)
+
+    picked: List[Box] = []
+    for _, box in scored:
+        if all(_iou(box, p) < 0.5 for p in picked):   # drop near‑duplicates
+            picked.append(box)
+        if len(picked) == top_k:
+            break
 
-    texts = _run_ocr(crop)
-    if not texts and found:
-        texts = _run_ocr(img)  # fallback to full frame
+    out = []
+    for x, y, bw, bh in picked:
+        x0, y0 = int(x / scale), int(y / scale)
+        x1, y1 = min(w, int((x + bw) / scale)), min(h, int((y + bh) / scale))
+        out.append((img[y0:y1, x0:x1], (x0, y0, x1 - x0, y1 - y0)))
+    return out
 
+
+# ─── helper: choose the plate string from OCR fragments ───────────
+def _pick_plate(texts: List[str]) -> str:
+    """Longest OCR fragment, upper‑cased and stripped to A‑Z / 0‑9."""
     plate_candidate = max(texts, key=len) if texts else ""
-    plate_clean = re.sub(r"[^A-Z0-9]", "", plate_candidate.upper())
+    return re.sub(r"[^A-Z0-9]", "", plate_candidate.upper())
+
 
+def plate_candidates(per_crop: List[List[Tuple[str, float]]], top_n: int = 5) -> List[PlateCandidate]:
+    """
+    Ranked, format‑valid readings decoded from ``detail=1`` fragments of the
+    ranked crops. When nothing decodes, a single unmatched candidate (fmt "")
+    carries the legacy longest‑fragment pick so callers can still report it.
+    """
+    ranked = decode_crops(per_crop, top_n)
+    if ranked:
+        return ranked
+    frags = [f for crop in per_crop for f in crop]
+    text, conf = max(frags, key=lambda f: len(f[0]), default=("", 0.0))
+    plate = _pick_plate([text])
+    return [PlateCandidate(plate, float(conf), "", text)] if plate else []
+
+
+def read_ingested(data: Dict, backend: Optional[str] = None) -> List[PlateCandidate]:
+    """
+    Ranked ``plate_candidates`` for ingested ``msg.data`` (see image_ingest).
+    The cache is asked by digest first; only a miss decodes the upload (into
+    *data*, for a later tier) – raises ``ImageRejected`` if that fails.
+    """
+    name = backend or OCR_BACKEND
+    if name not in BACKEND_SETTINGS:
+        get_backend(name)                           # raises the "unknown backend" error
+
+    # ♻️  Same photo seen before → skip OCR entirely
+    cache_key = ocr_cache.digest_key(data["image_digest"], name, {
+        **BACKEND_SETTINGS[name], "top_k": PLATE_TOP_K, "decoder": 2, "ingest": INGEST_SETTINGS,
+    })
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        return [PlateCandidate(**c) for c in cached["candidates"]]
+
+    img = decode_upload(data)["image"]
+    if OCR_POOL_SIZE:
+        future = resources.get("ocr_pool").submit(img, timeout=OCR_POOL_WAIT_S, backend=name)
+        try:
+            # queued jobs wait behind others much as submit() waits for a slot
+            ranked = future.result(timeout=OCR_POOL_WAIT_S + OCR_POOL_OCR_S)
+        except FutureTimeout:
+            future.cancel()                         # a late result is dropped by the pool
+            raise OcrPoolTimeout(f"no OCR result within {OCR_POOL_WAIT_S + OCR_POOL_OCR_S:.0f}s")
+    else:
+        ranked = _read_image(img, name)
+    ocr_cache.put(cache_key, {"candidates": [vars(c) for c in ranked]})
+    return ranked
+
+
+def _read_image(img: np.ndarray, backend: Optional[str] = None) -> List[PlateCandidate]:
+    """Localise + batched OCR + decode on a decoded BGR image (runs in pool workers too)."""
+    ocr = get_backend(backend)
+
+    # 2️⃣  Ranked plate candidates
+    candidates = _localise_plates(img)
+
+    # 3️⃣  Run the OCR backend – all candidate crops in one batched call
+    ranked: List[PlateCandidate] = []
+    if candidates:
+        ranked = plate_candidates(ocr.read_batch([crop for crop, _ in candidates], CROP_SIZE))
+    if not ranked:                                  # fallback to full frame
+        ranked = plate_candidates([ocr.read(img)])
+    return ranked
+
+
+def sighting_meta(data: Dict, backend: str, confidence: Optional[float],
+                  **timings_ms: float) -> Dict:
+    """OCR details that ride along to processing_agent, which stores them with the sighting."""
+    return {"confidence": confidence, "image_digest": data.get("image_digest"),
+            "ocr_backend": backend, "timings": timings_ms}
+
+
+def _split_timings(data: Dict, t0: float, t1: float) -> Dict[str, float]:
+    """ingest_ms = read + (on a cache miss) decode; ocr_ms = the rest of the OCR step."""
+    decode_ms = data.get("decode_ms", 0.0)
+    return {"ingest_ms": (t1 - t0) * 1000 + decode_ms,
+            "ocr_ms": (time.perf_counter() - t1) * 1000 - decode_ms}
+
+
+# ─── agent function ───────────────────────────────────────────────
+def ocr_agent(
+    state: GraphMessage,
+    _config: RunnableConfig | None = None,
+    backend: Optional[str] = None,
+) -> GraphMessage:
+    # 🔒  Guard: read once and size‑checked – decoded only if the cache misses
+    t0 = time.perf_counter()
+    data = ingest(state, decode=False)
+    if isinstance(data, GraphMessage):
+        return data
+
+    t1 = time.perf_counter()
+    try:
+        read = read_ingested(data, backend)
+    except ImageRejected as err:
+        return GraphMessage(role="assistant", text=str(err))
+    except OcrPoolError:
+        return POOL_BUSY_REPLY
+    meta = sighting_meta(data, backend or OCR_BACKEND, read[0].score if read else None,
+                         **_split_timings(data, t0, t1))
+    return _plate_reply(read[0].plate if read else "", [c.plate for c in read[1:]], meta)
+
+
+POOL_BUSY_REPLY = GraphMessage(
+    role="assistant",
+    text="⚠️ The plate reader is busy right now – please try again in a moment."
+)
+
+
+def _plate_reply(plate_clean: str, alternatives: List[str] | None = None,
+                 meta: Dict | None = None) -> GraphMessage:
     if not plate_clean:
         return GraphMessage(
             role="assistant",
             text="Sorry, I couldn’t read a licence‑plate from that image."
         )
 
-    # 4️⃣  Delegate to ProcessingAgent
+    # 4️⃣  Delegate to ProcessingAgent (runner‑up readings + OCR details ride along)
+    data: dict = {"plate": plate_clean, **(meta or {})}
+    if alternatives:
+        data["alternatives"] = alternatives
     return GraphMessage(
         role="delegate",
         text="process",
-        data={"plate": plate_clean}
+        data=data
     )
+
+
+# ─── async twin: OCR is CPU‑bound, so run it off the event loop ──
+# (with a pool these threads mostly wait, so keep at least one per worker)
+_OCR_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("OCR_THREADS", str(max(2, OCR_POOL_SIZE)))), thread_name_prefix="ocr"
+)
+
+async def aocr_agent(
+    state: GraphMessage,
+    _config: RunnableConfig | None = None,
+    backend: Optional[str] = None,
+) -> GraphMessage:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_OCR_EXECUTOR, ocr_agent, state, None, backend)
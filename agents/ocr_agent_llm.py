@@ -1,13 +1,28 @@
 from __future__ import annotations
-from typing import cast
-from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
+from typing import Dict, List, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
-import base64, re
+import asyncio, base64, cv2, numpy as np, os, re, time
 from schema import GraphMessage
+from agents.image_ingest import INGEST_SETTINGS, ImageRejected, decode_upload, ingest
+from agents.ocr_agent import _OCR_EXECUTOR, _localise_plates, _plate_reply, sighting_meta
+from agents.plate_decoder import decode
+from agents.ocr_cache import ocr_cache
+from instrumentation import BYTE_BUCKETS, metrics
+from registry import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT_S, ollama_preload, resources
 
-# ─── LLaVA client ────────────────────────────────────────────────────────
-vision_llm = ChatOllama(model="llava:13b", base_url="http://localhost:11434")
+# ─── LLaVA client (built on first use) ───────────────────────────────────
+VISION_MODEL = "llava:13b"
+
+def _make_vision_llm():
+    from langchain_ollama import ChatOllama
+    return ChatOllama(model=VISION_MODEL, base_url=OLLAMA_BASE_URL, keep_alive=OLLAMA_KEEP_ALIVE,
+                      client_kwargs={"timeout": OLLAMA_TIMEOUT_S})
+
+resources.register("vision_llm", _make_vision_llm, warm=lambda _llm: ollama_preload(VISION_MODEL))
+
+def get_vision_llm():
+    return resources.get("vision_llm")
 
 SYSTEM_PROMPT = (
     "Return ONLY the licence‑plate string you see in the image, "
@@ -18,34 +33,107 @@ SYSTEM_PROMPT = (
     "If no plate is visible, reply exactly: NONE"
 )
 
+# ─── Pre‑processing: send LLaVA the plate, not the photo ─────────────────
+# LLaVA‑1.5's CLIP encoder sees a 336×336 image whatever we upload, so a
+# 12 MP JPEG is mostly wasted base64, transfer and server‑side resizing.
+LLAVA_PREPROCESS   = os.getenv("LLAVA_PREPROCESS", "1") != "0"    # 0 = send the raw file
+LLAVA_INPUT_SIZE   = int(os.getenv("LLAVA_INPUT_SIZE", "336"))    # vision encoder resolution
+LLAVA_FALLBACK_MAX = int(os.getenv("LLAVA_FALLBACK_MAX", "672"))  # full frame, no plate found
+LLAVA_CROP_PAD     = float(os.getenv("LLAVA_CROP_PAD", "0.15"))   # context around the plate
+LLAVA_JPEG_QUALITY = int(os.getenv("LLAVA_JPEG_QUALITY", "85"))
+
+_PREP_SETTINGS = dict(size=LLAVA_INPUT_SIZE, fallback=LLAVA_FALLBACK_MAX,
+                      pad=LLAVA_CROP_PAD, quality=LLAVA_JPEG_QUALITY)
+
+metrics.help["llava_payload_bytes"] = "Image bytes sent to the vision LLM per call"
+
+
+def _fit(img: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    scale = max_side / float(max(h, w))
+    if abs(scale - 1.0) < 1e-3:
+        return img
+    interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=interp)
+
+
+def _llava_image(img: np.ndarray) -> Tuple[bytes, str]:
+    """
+    (image bytes, mime type) for the LLaVA request: the padded top plate
+    candidate of the ingested frame resized to the encoder resolution, else
+    the frame downscaled to ``LLAVA_FALLBACK_MAX``.
+    """
+    candidates = _localise_plates(img, top_k=1)
+    if candidates:
+        h, w = img.shape[:2]
+        _, (x, y, bw, bh) = candidates[0]
+        px, py = int(bw * LLAVA_CROP_PAD), int(bh * LLAVA_CROP_PAD)
+        region = _fit(img[max(0, y - py):min(h, y + bh + py), max(0, x - px):min(w, x + bw + px)],
+                      LLAVA_INPUT_SIZE)
+    else:
+        region = _fit(img, min(LLAVA_FALLBACK_MAX, max(img.shape[:2])))
+
+    ok, buf = cv2.imencode(".jpg", region, [cv2.IMWRITE_JPEG_QUALITY, LLAVA_JPEG_QUALITY])
+    if not ok:
+        raise ValueError("JPEG encode of the LLaVA input failed")
+    return buf.tobytes(), "image/jpeg"
+
+
+def _raw_upload(data: Dict) -> Tuple[bytes, str]:
+    """LLAVA_PREPROCESS=0: the original file, untouched (as read by ingest)."""
+    raw = data["image_bytes"]
+    return raw, _sniff_mime(raw)
+
+
+def _sniff_mime(raw: bytes) -> str:
+    if raw.startswith(b"\x89PNG"):
+        return "image/png"
+    if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
 # ─── Agent ───────────────────────────────────────────────────────────────
-def ocr_agent_llm(
-    state: GraphMessage,
-    _config: RunnableConfig | None = None
-) -> GraphMessage:
-    msg = state
+def _prepare(msg: GraphMessage) -> GraphMessage | Tuple[str, List[BaseMessage], Dict]:
+    """Early reply (no image / cache hit) or (cache_key, LLaVA prompt, sighting details)."""
+    t0 = time.perf_counter()
+    data = ingest(msg, decode=False)        # shared read, or an early reply
+    if isinstance(data, GraphMessage):
+        return data
+    meta = sighting_meta(data, "llava", None, ingest_ms=(time.perf_counter() - t0) * 1000)
 
-    if msg.data is None or "image_path" not in msg.data:
-        return GraphMessage(
-            role="assistant",
-            text="⚠️ No image received. Please upload a licence‑plate photo."
-        )
+    # ♻️  Same photo seen before → skip the LLaVA call entirely
+    settings = {"model": VISION_MODEL, "prompt": SYSTEM_PROMPT, "decoder": 2,
+                **({**_PREP_SETTINGS, "ingest": INGEST_SETTINGS} if LLAVA_PREPROCESS else {})}
+    cache_key = ocr_cache.digest_key(data["image_digest"], "llava", settings)
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        return _plate_reply(cached["plate"], cached.get("alternatives"), meta)
 
-    img_path: str = cast(str, msg.data["image_path"])
+    # Decode on a miss only (size / pixel guards apply to raw uploads too)
+    t1 = time.perf_counter()
+    try:
+        decode_upload(data)                 # no‑op when EasyOCR already decoded it
+    except ImageRejected as err:
+        return GraphMessage(role="assistant", text=str(err))
+    meta["timings"]["ingest_ms"] += (time.perf_counter() - t1) * 1000
 
-    # Base64‑embed image
-    with open(img_path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode()
+    # Crop / downscale, then base64‑embed
+    payload, mime = _llava_image(data["image"]) if LLAVA_PREPROCESS else _raw_upload(data)
+    metrics.observe("llava_payload_bytes", len(payload), BYTE_BUCKETS)
+    b64 = base64.b64encode(payload).decode()
     image_dict = {
         "type": "image_url",
-        "image_url": {"url": f"data:image/jpeg;base64,{b64}"}
+        "image_url": {"url": f"data:{mime};base64,{b64}"}
     }
-
-    llm_resp = vision_llm.invoke([
+    return cache_key, [
         SystemMessage(content=SYSTEM_PROMPT),
         HumanMessage(content=[image_dict])
-    ])
+    ], meta
+
 
+def _finish(cache_key: str, llm_resp: BaseMessage, meta: Dict, t0: float) -> GraphMessage:
+    meta["timings"]["llava_ms"] = (time.perf_counter() - t0) * 1000
     # ── SAFE extraction: handle str | list union ─────────────────────────
     content = llm_resp.content
     if isinstance(content, str):
@@ -54,15 +142,35 @@ def ocr_agent_llm(
         plate_raw = " ".join(c for c in content if isinstance(c, str))
 
     plate_clean = re.sub(r"[^A-Z0-9]", "", plate_raw.strip().upper())
+    if plate_clean == "NONE":
+        plate_clean = ""
+    # same positional O/0, I/1 … clean‑up as the EasyOCR path
+    ranked = [c.plate for c in decode([(plate_clean, 1.0)])] or [plate_clean]
+    ocr_cache.put(cache_key, {"plate": ranked[0], "alternatives": ranked[1:]})
+    return _plate_reply(ranked[0], ranked[1:], meta)
+
+
+def ocr_agent_llm(
+    state: GraphMessage,
+    _config: RunnableConfig | None = None
+) -> GraphMessage:
+    prep = _prepare(state)
+    if isinstance(prep, GraphMessage):
+        return prep
+    cache_key, prompt, meta = prep
+    t0 = time.perf_counter()
+    return _finish(cache_key, get_vision_llm().invoke(prompt), meta, t0)
 
-    if plate_clean == "NONE" or not plate_clean:
-        return GraphMessage(
-            role="assistant",
-            text="Sorry, I couldn’t read a licence‑plate from that image."
-        )
-
-    return GraphMessage(
-        role="delegate",
-        text="process",
-        data={"plate": plate_clean}
-    )
+
+async def aocr_agent_llm(
+    state: GraphMessage,
+    _config: RunnableConfig | None = None
+) -> GraphMessage:
+    """Async twin of ``ocr_agent_llm`` – awaits LLaVA instead of blocking."""
+    # decode, localise and encode are CPU work: keep them off the event loop
+    prep = await asyncio.get_running_loop().run_in_executor(_OCR_EXECUTOR, _prepare, state)
+    if isinstance(prep, GraphMessage):
+        return prep
+    cache_key, prompt, meta = prep
+    t0 = time.perf_counter()
+    return _finish(cache_key, await get_vision_llm().ainvoke(prompt), meta, t0)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2, numpy as np, os
+from agents.plate_decoder import ALPHABET
+from registry import resources
+
+# ─────────────  OCR backends: pixels → (text, confidence) fragments  ──────────────
+# Localisation, plate decoding, caching and the worker pool stay in ocr_agent;
+# a backend only recognises text, so swapping one changes nothing else.
+#
+#   easyocr        CRAFT detector + standard recogniser (the original path)
+#   easyocr_crops  recogniser only on the already localised crops (no CRAFT),
+#                  plate alphabet allow‑list
+#   tesseract      Tesseract LSTM, single‑line mode on crops, plate whitelist
+#
+# Select with OCR_BACKEND or ``build_graph(ocr_backend=...)``; add more with
+# ``register_backend``. Compare them with benchmarks/bench_backends.py.
+#
+# On CPU ``easyocr.Reader`` (quantize=True by default) already runs its
+# recogniser with LSTM/Linear layers dynamically quantised to int8, so both
+# EasyOCR backends get that for free – bench_backends reports it per backend.
+
+Fragment = Tuple[str, float]           # (text, confidence 0‑1)
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "easyocr")
+
+# EasyOCR reader – detector ON for better localisation
+READER_SETTINGS = dict(lang_list=['en'], gpu=False, detector=True, recog_network='standard')
+
+
+def _fragments(res: list) -> List[Fragment]:
+    return [(text, conf) for _, text, conf in res if isinstance(text, str)]
+
+
+class OcrBackend:
+    """Text recogniser behind the plate pipeline."""
+
+    name: str = ""
+
+    def read_batch(self, images: List[np.ndarray], size: Tuple[int, int],
+                   batch_size: int = 1) -> List[List[Fragment]]:
+        """Fragments per localised plate crop; *size* is the (w, h) crops are normalised to."""
+        raise NotImplementedError
+
+    def read(self, img: np.ndarray) -> List[Fragment]:
+        """Fragments anywhere in a full frame (no localisation upstream)."""
+        raise NotImplementedError
+
+    def read_frames(self, images: List[np.ndarray], size: Tuple[int, int],
+                    batch_size: int = 1) -> List[List[Fragment]]:
+        """``read`` for several full frames; backends with a batch API override this."""
+        return [self.read(img) for img in images]
+
+    def warm(self) -> None:
+        self.read(np.zeros((32, 128, 3), np.uint8))
+
+
+# ─── EasyOCR ──────────────────────────────────────────────────────
+class EasyOcrBackend(OcrBackend):
+    def __init__(self, name: str = "easyocr", detect_crops: bool = True,
+                 allowlist: Optional[str] = None, **reader_settings: Any) -> None:
+        import easyocr                   # pulls in torch – keep it off the import path
+        self.name = name
+        self.reader = easyocr.Reader(**(reader_settings or READER_SETTINGS))
+        self.detect_crops = detect_crops
+        self.allowlist = allowlist
+
+    def read_batch(self, images: List[np.ndarray], size: Tuple[int, int],
+                   batch_size: int = 1) -> List[List[Fragment]]:
+        if not self.detect_crops:
+            # crops are already one plate each → one recogniser pass per crop, no CRAFT
+            return [_fragments(self.reader.recognize(img, allowlist=self.allowlist, detail=1))
+                    for img in images]
+        return self.read_frames(images, size, batch_size)
+
+    def read(self, img: np.ndarray) -> List[Fragment]:
+        return _fragments(self.reader.readtext(img, allowlist=self.allowlist, detail=1))
+
+    def read_frames(self, images: List[np.ndarray], size: Tuple[int, int],
+                    batch_size: int = 1) -> List[List[Fragment]]:
+        if not images:
+            return []
+        return [_fragments(res) for res in self.reader.readtext_batched(
+            images, n_width=size[0], n_height=size[1], batch_size=batch_size,
+            allowlist=self.allowlist, detail=1,
+        )]
+
+
+# ─── Tesseract ────────────────────────────────────────────────────
+class TesseractBackend(OcrBackend):
+    def __init__(self, name: str = "tesseract", whitelist: str = ALPHABET,
+                 crop_psm: int = 7, frame_psm: int = 11) -> None:
+        import pytesseract
+        pytesseract.get_tesseract_version()          # TesseractNotFoundError (OSError) if no binary
+        self._tess = pytesseract
+        self.name = name
+        self.crop_psm, self.frame_psm = crop_psm, frame_psm   # 7 = one text line, 11 = sparse
+        self._config = f"--oem 1 -c tessedit_char_whitelist={whitelist}"
+
+    def _run(self, grey: np.ndarray, psm: int) -> List[Fragment]:
+        d = self._tess.image_to_data(grey, config=f"--psm {psm} {self._config}",
+                                     output_type=self._tess.Output.DICT)
+        return [(t, float(c) / 100.0) for t, c in zip(d["text"], d["conf"])
+                if t.strip() and float(c) >= 0]
+
+    def read_batch(self, images: List[np.ndarray], size: Tuple[int, int],
+                   batch_size: int = 1) -> List[List[Fragment]]:
+        out = []
+        for img in images:                           # no batch API: one call per crop
+            grey = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), size,
+                              interpolation=cv2.INTER_CUBIC)
+            # Tesseract wants a quiet margin round the text line
+            out.append(self._run(cv2.copyMakeBorder(grey, 12, 12, 12, 12, cv2.BORDER_REPLICATE),
+                                 self.crop_psm))
+        return out
+
+    def read(self, img: np.ndarray) -> List[Fragment]:
+        return self._run(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), self.frame_psm)
+
+
+# ─────────────  registry  ──────────────
+BACKENDS: Dict[str, Callable[[], OcrBackend]] = {}
+BACKEND_SETTINGS: Dict[str, Dict[str, Any]] = {}
+
+
+def register_backend(name: str, factory: Callable[[], OcrBackend],
+                     settings: Optional[Dict[str, Any]] = None, eager: bool = False) -> None:
+    """
+    Make *name* selectable; the backend itself is built on first ``get_backend``.
+    *settings* describe what *factory* builds and go into OCR cache keys, so
+    nothing has to be loaded just to look a result up.
+    """
+    BACKENDS[name] = factory
+    BACKEND_SETTINGS[name] = dict(settings or {})
+    resources.register(name, factory, warm=lambda backend: backend.warm(), eager=eager)
+
+
+def get_backend(name: Optional[str] = None) -> OcrBackend:
+    name = name or OCR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend '{name}' (expected one of {', '.join(BACKENDS)})")
+    return resources.get(name)
+
+
+_CROPS = dict(detect_crops=False, allowlist=ALPHABET)
+_TESSERACT = dict(whitelist=ALPHABET, crop_psm=7, frame_psm=11)
+
+register_backend("easyocr", lambda: EasyOcrBackend("easyocr"), READER_SETTINGS)
+register_backend("easyocr_crops", lambda: EasyOcrBackend("easyocr_crops", **_CROPS),
+                 {**READER_SETTINGS, **_CROPS})
+register_backend("tesseract", lambda: TesseractBackend("tesseract", **_TESSERACT), _TESSERACT)
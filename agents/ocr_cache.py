@@ -0,0 +1,145 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import hashlib, json, os, sqlite3, threading, time
+
+# ─────────────  content‑addressed OCR result cache  ──────────────
+#   key   = sha256(image bytes) + OCR backend + backend settings
+#   tier1 = in‑memory LRU           (always on)
+#   tier2 = SQLite file             (on when OCR_CACHE_DB is set)
+# Both tiers drop entries older than ``max_age_s``; the disk tier is also
+# trimmed to ``max_disk_items`` least‑recently‑used rows.
+
+
+class OcrCache:
+    def __init__(
+        self,
+        max_items: int = 1024,
+        db_path: Optional[str] = None,
+        max_disk_items: int = 100_000,
+        max_age_s: float = 7 * 24 * 3600,
+    ) -> None:
+        self.max_items = max_items
+        self.max_disk_items = max_disk_items
+        self.max_age_s = max_age_s
+
+        self._mem: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits_mem = self.hits_disk = self.misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ocr_cache_accessed ON ocr_cache(accessed)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "OcrCache":
+        return cls(
+            max_items=int(os.getenv("OCR_CACHE_SIZE", "1024")),
+            db_path=os.getenv("OCR_CACHE_DB") or None,
+            max_disk_items=int(os.getenv("OCR_CACHE_DISK_ITEMS", "100000")),
+            max_age_s=float(os.getenv("OCR_CACHE_MAX_AGE", str(7 * 24 * 3600))),
+        )
+
+    # ─── keys ──────────────────────────────────────────────────────
+    @staticmethod
+    def make_key(image_bytes: bytes, backend: str, settings: Dict[str, Any] | None = None) -> str:
+        return OcrCache.digest_key(hashlib.sha256(image_bytes).hexdigest(), backend, settings)
+
+    @staticmethod
+    def digest_key(digest: str, backend: str, settings: Dict[str, Any] | None = None) -> str:
+        """Same key as ``make_key`` from an already computed sha256 hex digest."""
+        cfg = json.dumps(settings or {}, sort_keys=True, default=str)
+        return f"{digest}:{backend}:{hashlib.sha1(cfg.encode()).hexdigest()[:12]}"
+
+    # ─── lookup / store ────────────────────────────────────────────
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit and now - hit[0] <= self.max_age_s:
+                self._mem.move_to_end(key)
+                self.hits_mem += 1
+                return hit[1]
+            if hit:
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM ocr_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.max_age_s:
+                    self._db.execute(
+                        "UPDATE ocr_cache SET accessed = ? WHERE key = ?", (now, key)
+                    )
+                    self._db.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits_disk += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._evict_disk(now)
+            self._db.commit()
+
+    def _remember(self, key: str, created: float, value: Dict[str, Any]) -> None:
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _evict_disk(self, now: float) -> None:
+        assert self._db is not None
+        self._db.execute("DELETE FROM ocr_cache WHERE created < ?", (now - self.max_age_s,))
+        self._db.execute(
+            "DELETE FROM ocr_cache WHERE key IN ("
+            " SELECT key FROM ocr_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_items,),
+        )
+
+    # ─── introspection ─────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits_mem + self.hits_disk + self.misses
+        return {
+            "hits_mem": self.hits_mem,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_ratio": (self.hits_mem + self.hits_disk) / lookups if lookups else 0.0,
+            "mem_items": len(self._mem),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM ocr_cache")
+                self._db.commit()
+
+
+# shared by ocr_agent and ocr_agent_llm
+ocr_cache = OcrCache.from_env()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+import asyncio, logging, os, time
+from schema import GraphMessage
+from langchain_core.runnables import RunnableConfig
+from agents.image_ingest import ImageRejected, ingest
+from agents.ocr_agent import (_OCR_EXECUTOR, POOL_BUSY_REPLY, _plate_reply, _split_timings,
+                              read_ingested, sighting_meta)
+from agents.ocr_backends import OCR_BACKEND
+from agents.ocr_pool import OcrPoolError
+from agents.ocr_agent_llm import aocr_agent_llm, ocr_agent_llm
+from agents.plate_decoder import PlateCandidate
+from agents.processing_agent import PLATE_RE
+from instrumentation import metrics
+
+log = logging.getLogger(__name__)
+
+# ─── thresholds: when is an EasyOCR reading good enough? ─────────────
+CASCADE_MIN_CONF       = float(os.getenv("OCR_CASCADE_MIN_CONF", "0.6"))
+CASCADE_REQUIRE_FORMAT = os.getenv("OCR_CASCADE_REQUIRE_FORMAT", "1") != "0"
+
+# how each image was resolved: EasyOCR alone, escalated to LLaVA, or neither
+CASCADE_COUNTS: Dict[str, int] = {"easyocr": 0, "llava": 0, "unresolved": 0}
+metrics.help["ocr_cascade_total"] = "Images resolved per OCR cascade tier"
+
+
+def _confident(ranked: List[PlateCandidate]) -> bool:
+    if not ranked or ranked[0].score < CASCADE_MIN_CONF:
+        return False
+    return bool(PLATE_RE.match(ranked[0].plate)) or not CASCADE_REQUIRE_FORMAT
+
+
+def _reply(ranked: List[PlateCandidate], meta: Dict) -> GraphMessage:
+    return _plate_reply(ranked[0].plate if ranked else "", [c.plate for c in ranked[1:]], meta)
+
+
+def _count(tier: str) -> None:
+    CASCADE_COUNTS[tier] += 1
+    metrics.inc("ocr_cascade_total", tier=tier)
+
+
+def tier_share() -> Dict[str, float]:
+    total = sum(CASCADE_COUNTS.values())
+    return {t: (n / total if total else 0.0) for t, n in CASCADE_COUNTS.items()}
+
+
+# ─── helpers shared by the sync / async nodes ────────────────────────
+def _first_tier(msg: GraphMessage, backend: Optional[str] = None
+                ) -> GraphMessage | Tuple[GraphMessage, List[PlateCandidate], Dict]:
+    """
+    Early reply (no image / rejected / confident read) or the weak read plus
+    *msg* carrying the upload (and its decode, if EasyOCR's cache missed),
+    so LLaVA reuses both.
+    """
+    t0 = time.perf_counter()
+    data = ingest(msg, decode=False)
+    if isinstance(data, GraphMessage):
+        return data
+    t1 = time.perf_counter()
+    try:
+        read = read_ingested(data, backend)
+    except ImageRejected as err:
+        return GraphMessage(role="assistant", text=str(err))
+    except OcrPoolError:
+        return POOL_BUSY_REPLY
+    meta = sighting_meta(data, backend or OCR_BACKEND, read[0].score if read else None,
+                         **_split_timings(data, t0, t1))
+    if _confident(read):
+        _count("easyocr")
+        return _reply(read, meta)
+    return msg.model_copy(update={"data": data}), read, meta
+
+
+def _settle(weak: List[PlateCandidate], escalated: Optional[GraphMessage], meta: Dict) -> GraphMessage:
+    """LLaVA's answer if it produced a plate, else whatever EasyOCR had."""
+    if escalated is not None and escalated.role == "delegate":
+        _count("llava")
+        # both tiers ran: keep the first tier's ingest / OCR timings next to LLaVA's
+        data = escalated.data or {}
+        return escalated.model_copy(update={"data": {
+            **data, "ocr_backend": f"{meta['ocr_backend']}+llava",
+            "timings": {**data.get("timings", {}), **meta["timings"]},
+        }})
+    _count("unresolved")
+    return _reply(weak, meta)
+
+
+# ─── agent functions ─────────────────────────────────────────────────
+def ocr_cascade_agent(
+    state: GraphMessage,
+    _config: RunnableConfig | None = None,
+    backend: Optional[str] = None,
+) -> GraphMessage:
+    """OCR backend first; the vision LLM only for low‑confidence / malformed reads."""
+    first = _first_tier(state, backend)
+    if isinstance(first, GraphMessage):
+        return first
+    ingested, weak, meta = first
+    try:
+        escalated = ocr_agent_llm(ingested)
+    except Exception as err:                    # Ollama down → keep the cheap answer
+        log.warning("LLaVA escalation failed: %s", err)
+        escalated = None
+    return _settle(weak, escalated, meta)
+
+
+async def aocr_cascade_agent(
+    state: GraphMessage,
+    _config: RunnableConfig | None = None,
+    backend: Optional[str] = None,
+) -> GraphMessage:
+    """Async twin: the OCR backend in the OCR thread pool, LLaVA awaited."""
+    loop = asyncio.get_running_loop()
+    first = await loop.run_in_executor(_OCR_EXECUTOR, _first_tier, state, backend)
+    if isinstance(first, GraphMessage):
+        return first
+    ingested, weak, meta = first
+    try:
+        escalated = await aocr_agent_llm(ingested)
+    except Exception as err:
+        log.warning("LLaVA escalation failed: %s", err)
+        escalated = None
+    return _settle(weak, escalated, meta)
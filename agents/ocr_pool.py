@@ -0,0 +1,291 @@
+"""
+Multi‑process OCR: N worker processes, each with its own warmed OCR
+backend (EasyOCR by default, see ocr_backends), fed decoded images through ``multiprocessing.shared_memory``.
+
+The parent copies a decoded frame into a fresh shared block once and sends
+only its name/shape/dtype; the worker maps the same pages as an ndarray, so
+no pixels are pickled or re‑read from disk. In‑flight jobs are bounded, a
+monitor thread restarts dead workers and re‑dispatches their jobs once, and
+kills a worker stuck on one job past ``job_timeout`` (that job fails with
+``OcrPoolTimeout``, the rest of its queue is re‑dispatched).
+"""
+from __future__ import annotations
+
+import atexit, itertools, logging, os, threading, time
+import multiprocessing as mp
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from agents.plate_decoder import PlateCandidate
+
+log = logging.getLogger(__name__)
+
+
+class OcrPoolError(RuntimeError):
+    """The pool could not produce a result for this image."""
+
+
+class OcrPoolBusy(OcrPoolError):
+    """Too many images already queued; caller should back off."""
+
+
+class OcrWorkerError(OcrPoolError):
+    """A worker raised or died while handling the job."""
+
+
+class OcrPoolTimeout(OcrPoolError):
+    """No result in time – the queue is too long or a worker is stuck."""
+
+
+# ─────────────  worker process  ──────────────
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # spawned workers share the parent's resource tracker, and the parent
+    # owns (and unlinks) every block, so attaching must not unregister it
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)      # 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(idx: int, jobs: Any, results: Any, torch_threads: int, backend: str) -> None:
+    try:                                  # N workers × all cores each would thrash
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    from agents.ocr_agent import _read_image
+    from agents.ocr_backends import get_backend
+    get_backend(backend).warm()                   # other backends load on first job
+    results.put(("ready", idx, None, None))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id, name, shape, dtype, job_backend = job
+        results.put(("start", idx, job_id, None))    # the parent times the job from here
+        try:
+            shm = _attach(name)
+            try:
+                img = np.ndarray(shape, dtype, buffer=shm.buf)
+                out = [vars(c) for c in _read_image(img, job_backend)]
+                del img                       # release the buffer export before close()
+            finally:
+                shm.close()
+            results.put(("done", idx, job_id, out))
+        except Exception as err:
+            results.put(("error", idx, job_id, repr(err)))
+
+
+# ─────────────  pool (parent side)  ──────────────
+@dataclass
+class _Job:
+    id: int
+    shm: shared_memory.SharedMemory
+    shape: Tuple[int, ...]
+    dtype: str
+    backend: str
+    future: Future = field(default_factory=Future)
+    worker: int = -1
+    attempts: int = 0
+    started: Optional[float] = None                  # monotonic time the worker picked it up
+    hung: bool = False
+
+
+class OcrPool:
+    def __init__(self, size: int, max_pending: Optional[int] = None,
+                 max_attempts: int = 2, health_interval: float = 1.0,
+                 torch_threads: Optional[int] = None, backend: str = "easyocr",
+                 job_timeout: Optional[float] = None) -> None:
+        if size < 1:
+            raise ValueError("OcrPool needs at least one worker")
+        self.size = size
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // size)
+        self.max_pending = max_pending or 4 * size
+        self.max_attempts = max_attempts            # dispatches per job incl. re‑tries
+        self.health_interval = health_interval
+        self.job_timeout = job_timeout              # longest run of one job before its worker is killed
+        self.backend = backend                      # what workers load up front
+
+        # spawn: never fork a parent that may already hold torch / Gradio threads
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._procs: List[Any] = [None] * size
+        self._queues: List[Any] = [None] * size
+        self._ready = [threading.Event() for _ in range(size)]
+        self._jobs: Dict[int, _Job] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._closed = threading.Event()
+        self.completed = self.failed = self.restarts = self.hung = 0
+
+        for i in range(size):
+            self._start_worker(i)
+        self._collector = threading.Thread(target=self._collect, name="ocr-pool-results", daemon=True)
+        self._collector.start()
+        threading.Thread(target=self._monitor, name="ocr-pool-health", daemon=True).start()
+        atexit.register(self.close)
+
+    # ── lifecycle ──
+    def _start_worker(self, i: int) -> None:
+        self._ready[i].clear()
+        self._queues[i] = self._ctx.Queue()
+        self._procs[i] = self._ctx.Process(
+            target=_worker_main,
+            args=(i, self._queues[i], self._results, self.torch_threads, self.backend),
+            name=f"ocr-worker-{i}", daemon=True,
+        )
+        self._procs[i].start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has loaded and warmed its backend."""
+        return all(ev.wait(timeout) for ev in self._ready)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        for q in self._queues:
+            q.put(None)
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self._results.put(("stop", -1, None, None))
+        self._collector.join(timeout)                # drain results before the queue is torn down
+        with self._lock:
+            orphans, self._jobs = list(self._jobs.values()), {}
+        for job in orphans:
+            self._finish(job, error=OcrPoolError("OCR pool shut down"))
+
+    # ── submit / dispatch ──
+    def submit(self, img: np.ndarray, timeout: Optional[float] = None,
+               backend: Optional[str] = None) -> "Future[List[PlateCandidate]]":
+        """Queue *img* (BGR uint8) for OCR; raises ``OcrPoolBusy`` when full."""
+        if self._closed.is_set():
+            raise OcrPoolError("OCR pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise OcrPoolBusy(f"{self.max_pending} OCR jobs already pending")
+        try:
+            img = np.ascontiguousarray(img)
+            shm = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+            np.ndarray(img.shape, img.dtype, buffer=shm.buf)[...] = img
+        except BaseException:
+            self._slots.release()
+            raise
+
+        job = _Job(next(self._ids), shm, img.shape, img.dtype.str, backend or self.backend)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._dispatch(job)
+        return job.future
+
+    def _dispatch(self, job: _Job) -> None:
+        """Send *job* to the least‑loaded worker (caller holds ``_lock``)."""
+        load = [0] * self.size
+        for j in self._jobs.values():
+            if j.worker >= 0 and j is not job:
+                load[j.worker] += 1
+        job.worker = min(range(self.size), key=load.__getitem__)
+        job.attempts += 1
+        job.started = None
+        self._queues[job.worker].put((job.id, job.shm.name, job.shape, job.dtype, job.backend))
+
+    def _finish(self, job: _Job, result: Optional[List[PlateCandidate]] = None,
+                error: Optional[BaseException] = None) -> None:
+        job.shm.close()
+        job.shm.unlink()
+        self._slots.release()
+        if job.future.cancelled():
+            return
+        if error is None:
+            self.completed += 1
+            job.future.set_result(result or [])
+        else:
+            self.failed += 1
+            job.future.set_exception(error)
+
+    # ── background threads ──
+    def _collect(self) -> None:
+        while True:
+            kind, idx, job_id, payload = self._results.get()
+            if kind == "stop":
+                return
+            if kind == "ready":
+                self._ready[idx].set()
+                continue
+            if kind == "start":
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                    if job is not None and job.worker == idx:
+                        job.started = time.monotonic()
+                continue
+            with self._lock:
+                job = self._jobs.pop(job_id, None)
+            if job is None:                          # already failed over
+                continue
+            if kind == "done":
+                self._finish(job, [PlateCandidate(**c) for c in payload])
+            else:
+                self._finish(job, error=OcrWorkerError(payload))
+
+    def _reap_hung(self) -> None:
+        """Kill workers stuck on one job (e.g. in native OCR code) so they get restarted."""
+        now = time.monotonic()
+        with self._lock:
+            stuck = [j for j in self._jobs.values()
+                     if j.started is not None and not j.hung and now - j.started > self.job_timeout]
+            for job in stuck:
+                job.hung = True
+        for job in stuck:
+            log.warning("OCR worker %d stuck on a job for %.0fs; killing it", job.worker, now - job.started)
+            self.hung += 1
+            proc = self._procs[job.worker]
+            proc.terminate()
+            proc.join(1.0)
+            if proc.is_alive():
+                proc.kill()
+                proc.join(1.0)
+
+    def _monitor(self) -> None:
+        while not self._closed.wait(self.health_interval):
+            if self.job_timeout:
+                self._reap_hung()
+            for i, proc in enumerate(self._procs):
+                if proc.is_alive() or self._closed.is_set():
+                    continue
+                log.warning("OCR worker %d exited (code %s); restarting", i, proc.exitcode)
+                self.restarts += 1
+                failed: List[Tuple[_Job, OcrPoolError]] = []
+                with self._lock:
+                    self._start_worker(i)
+                    for job in [j for j in self._jobs.values() if j.worker == i]:
+                        if job.hung:                  # would most likely hang again
+                            del self._jobs[job.id]
+                            failed.append((job, OcrPoolTimeout(
+                                f"OCR job ran past {self.job_timeout:.0f}s; worker {i} restarted")))
+                        elif job.attempts < self.max_attempts:
+                            self._dispatch(job)
+                        else:
+                            del self._jobs[job.id]
+                            failed.append((job, OcrWorkerError(f"OCR worker {i} died")))
+                for job, err in failed:
+                    self._finish(job, error=err)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._jobs)
+        return {
+            "workers": self.size,
+            "workers_alive": sum(p.is_alive() for p in self._procs),
+            "pending": pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "hung": self.hung,
+        }
@@ -0,0 +1,202 @@
+"""
+Plate‑string decoder: OCR fragments + confidences → ranked, format‑valid plates.
+
+Every ``PLATE_RE`` alternative is expanded into fixed‑length position
+templates (letter / digit / literal per slot). A candidate string is scored
+against all templates of its length at once with two precompiled numpy
+tables – substitution cost and replacement character per (slot class, char)
+– so positional confusion fixes such as O→0 in a digit slot or 8→B in a
+letter slot are one fancy‑indexing step, not a Python loop per template.
+"""
+from __future__ import annotations
+
+import itertools, math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# ─────────────  alphabet + slot classes  ──────────────
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+_IDX = {ch: i for i, ch in enumerate(ALPHABET)}
+LETTERS, DIGITS = ALPHABET[:26], ALPHABET[26:]
+
+L, D = "L", "D"                             # slot classes; any other symbol is a literal
+_CLASSES: List[str] = [L, D, "B", "H"]      # literals used by the templates below
+_CLS = {c: i for i, c in enumerate(_CLASSES)}
+
+INF = 1e6
+MAX_FIX_RATIO = 1 / 3                       # more corrected slots than this → not a plate
+
+# (from, to, cost) – cheap for the classic look‑alikes, dearer for the rest
+CONFUSIONS: List[Tuple[str, str, float]] = [
+    ("O", "0", 0.3), ("Q", "0", 0.6), ("D", "0", 0.6), ("U", "0", 1.0),
+    ("I", "1", 0.3), ("L", "1", 0.6), ("T", "1", 1.0), ("J", "1", 1.0),
+    ("Z", "2", 0.5), ("S", "5", 0.3), ("B", "8", 0.3), ("G", "6", 0.5),
+    ("T", "7", 0.7), ("A", "4", 0.7), ("E", "3", 1.0), ("Y", "7", 1.0),
+    ("0", "O", 0.3), ("1", "I", 0.3), ("2", "Z", 0.5), ("5", "S", 0.3),
+    ("8", "B", 0.3), ("6", "G", 0.5), ("7", "T", 0.7), ("4", "A", 0.7),
+    ("3", "E", 1.0), ("0", "D", 0.6), ("0", "Q", 0.6), ("1", "L", 0.6),
+]
+
+
+def _build_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """cost[class, char] and repl[class, char] (index into ALPHABET)."""
+    n = len(ALPHABET)
+    cost = np.full((len(_CLASSES), n), INF)
+    repl = np.tile(np.arange(n), (len(_CLASSES), 1))
+    best: Dict[Tuple[str, str], Tuple[float, str]] = {}
+    for src, dst, c in CONFUSIONS:
+        for cls in _CLASSES:
+            ok = dst in LETTERS if cls == L else dst in DIGITS if cls == D else dst == cls
+            if ok and c < best.get((cls, src), (INF, ""))[0]:
+                best[(cls, src)] = (c, dst)
+
+    for cls, row in _CLS.items():
+        for ch, j in _IDX.items():
+            if (cls == L and ch in LETTERS) or (cls == D and ch in DIGITS) or ch == cls:
+                cost[row, j] = 0.0
+            elif (cls, ch) in best:
+                c, dst = best[(cls, ch)]
+                cost[row, j], repl[row, j] = c, _IDX[dst]
+    return cost, repl
+
+
+_COST, _REPL = _build_tables()
+_CONFUSABLE = {(src, dst) for src, dst, _ in CONFUSIONS}
+
+
+# ─────────────  templates from the PLATE_RE alternatives  ──────────────
+def _expand(*parts: Tuple[str, int, int]) -> List[str]:
+    """('L', 2, 2), ('D', 1, 3) … → every concrete slot string."""
+    ranges = [[sym * k for k in range(lo, hi + 1)] for sym, lo, hi in parts]
+    return ["".join(combo) for combo in itertools.product(*ranges)]
+
+
+# format → (slot strings, prior cost); mirrors processing_agent.PLATE_RE.
+# India is split so the common LL‑DD‑L(L)‑DDDD shape outranks odd ones.
+_INDIA = _expand((L, 2, 2), (D, 2, 2), (L, 1, 2), (D, 4, 4))
+FORMATS: Dict[str, Tuple[List[str], float]] = {
+    "uk":        (_expand((L, 2, 2), (D, 2, 2), (L, 2, 3)), 0.0),
+    "uk_prefix": (_expand((L, 1, 1), (D, 1, 3), (L, 3, 3)), 0.1),
+    "bh":        (_expand((D, 2, 2), ("BH", 1, 1), (D, 4, 4), (L, 0, 1)), 0.0),
+    "india":     (_INDIA, 0.0),
+    "india_loose": ([s for s in _expand((L, 2, 2), (D, 1, 2), (L, 0, 3), (D, 1, 4))
+                     if s not in _INDIA], 0.3),
+    "generic":   (_expand((L, 3, 4), (D, 2, 4)), 0.4),
+}
+
+
+def _compile() -> Dict[int, Tuple[np.ndarray, np.ndarray, List[str]]]:
+    """length → (class index matrix [k, n], prior [k], format name per row)."""
+    by_len: Dict[int, List[Tuple[List[int], float, str]]] = {}
+    for fmt, (slots, prior) in FORMATS.items():
+        for s in dict.fromkeys(slots):
+            by_len.setdefault(len(s), []).append(([_CLS[sym] for sym in s], prior, fmt))
+    return {
+        n: (np.array([r for r, _, _ in rows], np.intp),
+            np.array([p for _, p, _ in rows]),
+            [f for _, _, f in rows])
+        for n, rows in by_len.items()
+    }
+
+
+_TEMPLATES = _compile()
+MIN_LEN, MAX_LEN = min(_TEMPLATES), max(_TEMPLATES)
+
+
+# ─────────────  decoding  ──────────────
+@dataclass(frozen=True)
+class PlateCandidate:
+    plate: str
+    score: float            # OCR confidence × exp(−correction cost − format prior)
+    fmt: str
+    raw: str                # the OCR string it was decoded from
+    trimmed: bool = False   # raw had a stray end character cut off
+
+    @property
+    def exact(self) -> bool:
+        """Read as‑is: format‑valid with nothing corrected or cut off."""
+        return bool(self.fmt) and self.plate == self.raw and not self.trimmed
+
+
+def _clean(text: str) -> str:
+    return "".join(ch for ch in text.upper() if ch in _IDX)
+
+
+def _raw_candidates(fragments: Sequence[Tuple[str, float]]) -> Dict[str, Tuple[float, float]]:
+    """raw string → (confidence, extra cost) from single, paired and joined fragments."""
+    frags = [(t, float(c)) for t, c in ((_clean(t), c) for t, c in fragments) if t]
+    spans = [frags[i:j] for i in range(len(frags)) for j in range(i + 1, len(frags) + 1)]
+    out: Dict[str, Tuple[float, float]] = {}
+
+    def _add(text: str, conf: float, extra: float) -> None:
+        if MIN_LEN <= len(text) <= MAX_LEN and conf * math.exp(-extra) > \
+                out.get(text, (0.0, 0.0))[0] * math.exp(-out.get(text, (0.0, 0.0))[1]):
+            out[text] = (conf, extra)
+
+    for span in spans:
+        text = "".join(t for t, _ in span)
+        conf = sum(c * len(t) for t, c in span) / len(text)
+        _add(text, conf, 0.0)
+        # a stray border / band character at either end ("|", "GB" band, screw)
+        _add(text[1:], conf, 1.0)
+        _add(text[:-1], conf, 1.0)
+    return out
+
+
+def decode(fragments: Sequence[Tuple[str, float]], top_n: int = 5) -> List[PlateCandidate]:
+    """
+    Ranked plate readings that match ``PLATE_RE``, best first; empty when no
+    combination of the fragments can be corrected into a valid format.
+    """
+    raws = _raw_candidates(fragments)
+    by_len: Dict[int, List[str]] = {}
+    for text in raws:
+        by_len.setdefault(len(text), []).append(text)
+
+    best: Dict[str, PlateCandidate] = {}
+    for n, texts in by_len.items():
+        if n not in _TEMPLATES:
+            continue
+        tmpl, prior, fmts = _TEMPLATES[n]
+        codes = np.array([[_IDX[ch] for ch in t] for t in texts], np.intp)     # [m, n]
+        slot = _COST[tmpl[None, :, :], codes[:, None, :]]                     # [m, k, n]
+        costs = slot.sum(-1) + prior[None, :]                                  # [m, k]
+        ok = (costs < INF) & ((slot > 0).sum(-1) <= max(1, int(n * MAX_FIX_RATIO)))
+
+        for i, j in zip(*np.nonzero(ok)):
+            conf, extra = raws[texts[i]]
+            score = conf * math.exp(-(costs[i, j] + extra))
+            plate = "".join(ALPHABET[c] for c in _REPL[tmpl[j], codes[i]])
+            if score > best.get(plate, PlateCandidate("", -1.0, "", "")).score:
+                best[plate] = PlateCandidate(plate, score, fmts[j], texts[i], extra > 0)
+
+    return _ranked(best.values(), top_n)
+
+
+def _ranked(cands: Iterable[PlateCandidate], top_n: int) -> List[PlateCandidate]:
+    """Best first; once some reading is exact, cut‑off variants are noise, not alternatives."""
+    out = sorted(cands, key=lambda c: c.score, reverse=True)
+    if any(c.exact for c in out):
+        out = [c for c in out if not c.trimmed]
+    return out[:top_n]
+
+
+def decode_crops(per_crop: Sequence[Sequence[Tuple[str, float]]],
+                 top_n: int = 5) -> List[PlateCandidate]:
+    """``decode`` over several ranked crops; earlier crops win ties."""
+    merged: Dict[str, PlateCandidate] = {}
+    for rank, frags in enumerate(per_crop):
+        for cand in decode(frags, top_n):
+            cand = PlateCandidate(cand.plate, cand.score * 0.98 ** rank, cand.fmt, cand.raw,
+                                  cand.trimmed)
+            if cand.score > merged.get(cand.plate, PlateCandidate("", -1.0, "", "")).score:
+                merged[cand.plate] = cand
+    return _ranked(merged.values(), top_n)
+
+
+def confusable(a: str, b: str) -> bool:
+    """Same length and every differing slot is a ``CONFUSIONS`` look‑alike (O↔0, B↔8 …)."""
+    return len(a) == len(b) and all(x == y or (x, y) in _CONFUSABLE or (y, x) in _CONFUSABLE
+                                        for x, y in zip(a, b))
@@ -1,9 +1,13 @@
 from __future__ import annotations
-from typing import Dict, Optional, cast
+from typing import Dict, List, Optional, cast
 
-import os, json, re, requests
+import os, re, time, httpx, requests
 from schema import GraphMessage
 from langchain_core.runnables import RunnableConfig
+from agents.dvla_client import DvlaClient
+from agents.plate_decoder import confusable
+from agents.sighting_store import sightings
+from registry import resources
 
 # ─────────────  constants  ──────────────
 PLATE_RE = re.compile(
@@ -20,9 +24,19 @@ PLATE_RE = re.compile(
     )$""",
     re.VERBOSE,
 )     
-DVLA_URL = "https://driver-vehicle-licensing.api.gov.uk/vehicle-enquiry/v1/vehicles"
 API_KEY  = os.getenv("DVLA_API_KEY", "")
 
+# runner‑up OCR readings to look up when the best one has no DVLA record –
+# only look‑alike substitutions of it (O↔0, B↔8 …), never a shorter string
+MAX_ALTERNATIVES = int(os.getenv("DVLA_MAX_ALTERNATIVES", "2"))
+
+# pooled session + TTL cache + single‑flight (see agents/dvla_client.py)
+dvla = DvlaClient.from_env()
+
+# warm‑up seeds the lookup cache from stored sightings (SIGHTINGS_WARM_DVLA=0 to skip)
+if sightings.enabled and os.getenv("SIGHTINGS_WARM_DVLA", "1") != "0":
+    resources.register("dvla_cache", lambda: sightings.warm_dvla_cache(dvla))
+
 # ─────────────  dummy response for demo  ──────────────
 DEMO_VEHICLE = {
     "registrationNumber": "SP05WFM",
@@ -43,10 +57,8 @@ DEMO_VEHICLE = {
 }
 
 # ─────────────  agent  ──────────────
-def processing_agent(state: GraphMessage,
-               config: RunnableConfig | None = None) -> GraphMessage:
-    msg = state
-
+def _validate(msg: GraphMessage) -> GraphMessage | List[str]:
+    """Early reply, or the format‑valid plate strings to look up, best first."""
     # 1️⃣ Ensure we actually got a plate to work with
     if msg.data is None or "plate" not in msg.data:
         return GraphMessage(
@@ -56,43 +68,93 @@ def processing_agent(state: GraphMessage,
 
     plate: str = cast(str, msg.data["plate"])
 
-    # 2️⃣ Validate plate format
+    # 2️⃣ Validate plate format – malformed readings never reach DVLA
     if not PLATE_RE.match(plate):
         return GraphMessage(
             role="assistant",
             text=f"❌ '{plate}' doesn’t look like a valid registration number."
         )
 
-    # 3️⃣ Check we have an API key
+    # 3️⃣ Check we have an API key – the demo record is never stored as a
+    #    sighting, or warm‑up would later serve it as a real DVLA answer
     if not API_KEY:
         vehicle = {**DEMO_VEHICLE, "registrationNumber": plate}  # ← our hard‑coded dict
+        return _vehicle_reply(plate, vehicle)
+
+    retries = [p for p in dict.fromkeys(msg.data.get("alternatives", []))
+               if p != plate and PLATE_RE.match(p) and confusable(p, plate)]
+    return [plate, *retries[:MAX_ALTERNATIVES]]
+
+
+def _record(msg: GraphMessage, plate: str, vehicle: Optional[Dict], t0: float) -> None:
+    """Keep the sighting (agents/sighting_store.py) – queued, never blocks the reply."""
+    data = msg.data or {}
+    sightings.record(
+        plate, vehicle,
+        confidence=data.get("confidence"),
+        image_digest=data.get("image_digest"),
+        ocr_backend=data.get("ocr_backend"),
+        timings={**data.get("timings", {}), "lookup_ms": (time.perf_counter() - t0) * 1000},
+    )
+
+
+def _vehicle_reply(plate: str, vehicle: Optional[Dict], read_as: Optional[str] = None) -> GraphMessage:
+    """*read_as*: the best OCR reading, when the record came from a look‑alike of it."""
+    if vehicle is None:
         return GraphMessage(
-            role="delegate",
-            text="chat",
-            data={"vehicle": vehicle},
+            role="assistant",
+            text=f"No DVLA record found for '{plate}'.",
         )
 
-    # 4️⃣  Call DVLA Vehicle‑Enquiry API (only reached if key present)
-    headers = {"x-api-key": API_KEY, "Content-Type": "application/json"}
-    payload = json.dumps({"registrationNumber": plate})
+    return GraphMessage(
+        role="delegate",
+        text="chat",
+        data={"vehicle": vehicle, **({"read_as": read_as} if read_as and read_as != plate else {})},
+    )
+
 
-    try:
-        res = requests.post(DVLA_URL, headers=headers, data=payload, timeout=10)
-        res.raise_for_status()
-        vehicle = res.json()
+def processing_agent(state: GraphMessage,
+               config: RunnableConfig | None = None) -> GraphMessage:
+    plates = _validate(state)
+    if isinstance(plates, GraphMessage):
+        return plates
 
+    # 4️⃣  Call DVLA Vehicle‑Enquiry API (only reached if key present);
+    #     a 404 on the best reading falls through to its look‑alikes
+    t0 = time.perf_counter()
+    try:
+        for plate in plates:
+            vehicle = dvla.lookup(plate)
+            if vehicle is not None:
+                _record(state, plate, vehicle, t0)
+                return _vehicle_reply(plate, vehicle, read_as=plates[0])
+        _record(state, plates[0], None, t0)
+        return _vehicle_reply(plates[0], None)
+    except requests.RequestException as err:
         return GraphMessage(
-            role="delegate",
-            text="chat",
-            data={"vehicle": vehicle},
+            role="assistant",
+            text=f"DVLA lookup failed: {err}",
         )
 
-    except requests.RequestException as err:
+
+async def aprocessing_agent(state: GraphMessage,
+               config: RunnableConfig | None = None) -> GraphMessage:
+    """Async twin of ``processing_agent`` – uses the httpx client."""
+    plates = _validate(state)
+    if isinstance(plates, GraphMessage):
+        return plates
+
+    t0 = time.perf_counter()
+    try:
+        for plate in plates:
+            vehicle = await dvla.alookup(plate)
+            if vehicle is not None:
+                _record(state, plate, vehicle, t0)
+                return _vehicle_reply(plate, vehicle, read_as=plates[0])
+        _record(state, plates[0], None, t0)
+        return _vehicle_reply(plates[0], None)
+    except (httpx.HTTPError, ValueError) as err:     # ValueError: non‑JSON body
         return GraphMessage(
             role="assistant",
             text=f"DVLA lookup failed: {err}",
         )
-    return GraphMessage(
-        role="assistant",
-        text="⚠️ Unexpected flow; no response generated."
-    )
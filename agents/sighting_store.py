@@ -0,0 +1,270 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+import atexit, json, logging, os, queue, re, sqlite3, threading, time
+
+log = logging.getLogger(__name__)
+
+# ─────────────  append‑only plate sightings (SQLite, WAL)  ──────────────
+#   record()    never blocks a request: rows go on a bounded queue and one
+#               writer thread inserts them in batches, one transaction each
+#               (queue full → the row is dropped and counted, not waited for)
+#   by_plate() / in_range()   index range scans on a separate read connection;
+#               WAL lets them run while the writer commits
+#   warm_dvla_cache()   newest stored record per recently seen plate → the
+#               DVLA lookup cache, so a restart doesn't start cold
+#
+# SIGHTINGS_DB="" turns the store off (record() becomes a no‑op). Demo‑mode
+# lookups (no DVLA_API_KEY) are not recorded: their vehicle is made up.
+
+SIGHTINGS_DB = os.getenv("SIGHTINGS_DB", "sightings.db")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sightings ("
+    " id INTEGER PRIMARY KEY,"
+    " ts REAL NOT NULL,"                 # unix seconds
+    " plate TEXT NOT NULL,"
+    " confidence REAL,"                  # OCR score 0‑1, NULL for the vision LLM
+    " image_digest TEXT,"                # sha256 of the uploaded file
+    " ocr_backend TEXT,"
+    " timings TEXT,"                     # JSON {"ingest_ms": …, "ocr_ms": …, "lookup_ms": …}
+    " vehicle TEXT)",                    # JSON DVLA record, NULL = no record found
+    "CREATE INDEX IF NOT EXISTS sightings_plate_ts ON sightings(plate, ts)",
+    "CREATE INDEX IF NOT EXISTS sightings_ts ON sightings(ts)",
+)
+_COLUMNS = "ts, plate, confidence, image_digest, ocr_backend, timings, vehicle"
+_INSERT = f"INSERT INTO sightings ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+
+def normalise_plate(plate: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", plate.upper())
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")      # durable at checkpoints; safe with WAL
+    return db
+
+
+def _row(r: tuple) -> Dict[str, Any]:
+    ts, plate, conf, digest, backend, timings, vehicle = r
+    return {
+        "ts": ts, "plate": plate, "confidence": conf, "image_digest": digest,
+        "ocr_backend": backend,
+        "timings": json.loads(timings) if timings else {},
+        "vehicle": json.loads(vehicle) if vehicle else None,
+    }
+
+
+class SightingStore:
+    def __init__(
+        self,
+        db_path: Optional[str],
+        batch_size: int = 500,
+        flush_s: float = 0.5,
+        max_pending: int = 10_000,
+    ) -> None:
+        self.db_path = db_path or None
+        self.batch_size = batch_size
+        self.flush_s = flush_s
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._reader: Optional[sqlite3.Connection] = None
+        self.written = self.batches = self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> "SightingStore":
+        return cls(
+            db_path=SIGHTINGS_DB,
+            batch_size=int(os.getenv("SIGHTINGS_BATCH", "500")),
+            flush_s=float(os.getenv("SIGHTINGS_FLUSH_S", "0.5")),
+            max_pending=int(os.getenv("SIGHTINGS_MAX_PENDING", "10000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.db_path is not None
+
+    # ─── write path ────────────────────────────────────────────────
+    def record(
+        self,
+        plate: str,
+        vehicle: Optional[Dict[str, Any]] = None,
+        confidence: Optional[float] = None,
+        image_digest: Optional[str] = None,
+        ocr_backend: Optional[str] = None,
+        timings: Optional[Dict[str, float]] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        """Queue one sighting for the writer thread; returns immediately."""
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        row = (
+            time.time() if ts is None else ts,
+            normalise_plate(plate),
+            confidence,
+            image_digest,
+            ocr_backend,
+            json.dumps({k: round(v, 1) for k, v in (timings or {}).items()}),
+            json.dumps(vehicle) if vehicle is not None else None,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every queued sighting is committed."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._writer = None
+
+    def _read_conn(self) -> sqlite3.Connection:
+        """Reader connection; the first call creates the file and schema."""
+        with self._start_lock:
+            if self._reader is None:
+                db = _connect(self.db_path)
+                for stmt in _SCHEMA:
+                    db.execute(stmt)
+                db.commit()
+                self._reader = db
+            return self._reader
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        self._read_conn()                            # schema exists before the first insert
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="sightings", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)          # commit what's queued on shutdown
+
+    def _write_loop(self) -> None:
+        db = _connect(self.db_path)
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            batch, deadline = [first], time.monotonic() + self.flush_s
+            # gather up to batch_size rows, waiting at most flush_s for stragglers
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            rows = [r for r in batch if r is not _STOP]
+            stop = len(rows) < len(batch)
+            try:
+                if rows:
+                    with db:                           # one transaction per batch
+                        db.executemany(_INSERT, rows)
+                    self.written += len(rows)
+                    self.batches += 1
+            except sqlite3.Error as err:
+                self.dropped += len(rows)
+                log.warning("sighting batch of %d lost: %s", len(rows), err)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        db.close()
+
+    # ─── queries ───────────────────────────────────────────────────
+    def _query(self, sql: str, args: tuple) -> List[tuple]:
+        if not self.enabled:
+            return []
+        db = self._read_conn()
+        with self._read_lock:
+            return db.execute(sql, args).fetchall()
+
+    def by_plate(self, plate: str, limit: int = 100,
+                 before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Newest first; page further back with ``before`` = last row's ``ts``."""
+        rows = self._query(
+            f"SELECT {_COLUMNS} FROM sightings WHERE plate = ? AND ts < ? "
+            "ORDER BY ts DESC LIMIT ?",
+            (normalise_plate(plate), float("inf") if before is None else before, limit),
+        )
+        return [_row(r) for r in rows]
+
+    def in_range(self, start: float, end: float, limit: int = 1000,
+                 plate: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sightings with ``start <= ts < end``, newest first (optionally of one plate)."""
+        if plate:
+            sql = (f"SELECT {_COLUMNS} FROM sightings WHERE plate = ? AND ts >= ? AND ts < ? "
+                   "ORDER BY ts DESC LIMIT ?")
+            args: tuple = (normalise_plate(plate), start, end, limit)
+        else:
+            sql = (f"SELECT {_COLUMNS} FROM sightings WHERE ts >= ? AND ts < ? "
+                   "ORDER BY ts DESC LIMIT ?")
+            args = (start, end, limit)
+        return [_row(r) for r in self._query(sql, args)]
+
+    def latest_vehicles(self, since: float, limit: int = 10_000) -> Dict[str, tuple]:
+        """plate → (ts, vehicle) of the newest sighting with a DVLA record since *since*."""
+        rows = self._query(
+            # bare columns next to MAX() come from the row holding the maximum
+            "SELECT plate, MAX(ts), vehicle FROM sightings "
+            "WHERE ts >= ? AND vehicle IS NOT NULL GROUP BY plate LIMIT ?",
+            (since, limit),
+        )
+        return {plate: (ts, json.loads(vehicle)) for plate, ts, vehicle in rows}
+
+    def warm_dvla_cache(self, client: Any) -> int:
+        """Seed ``client.cache`` with records younger than its TTL; keeps their remaining TTL."""
+        now = time.time()
+        ttl = client.cache.ttl
+        warmed = 0
+        for plate, (ts, vehicle) in self.latest_vehicles(now - ttl).items():
+            client.cache.put(plate, vehicle, ttl=ttl - (now - ts))
+            warmed += 1
+        log.info("warmed DVLA cache with %d stored records", warmed)
+        return warmed
+
+    # ─── introspection ─────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+        }
+
+
+# ─── UI table ─────────────────────────────────────────────────────
+SIGHTING_HEADERS = ["time", "plate", "confidence", "OCR", "make", "colour",
+                    "ingest ms", "OCR ms", "lookup ms", "image"]
+
+
+def sighting_rows(found: List[Dict[str, Any]]) -> List[List[Any]]:
+    """Rows for the Sightings tab, in ``SIGHTING_HEADERS`` order."""
+    out = []
+    for s in found:
+        v, t = s["vehicle"] or {}, s["timings"]
+        out.append([
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(s["ts"])),
+            s["plate"],
+            round(s["confidence"], 2) if s["confidence"] is not None else "",
+            s["ocr_backend"] or "",
+            v.get("make", "—" if s["vehicle"] is None else ""),
+            v.get("colour", ""),
+            t.get("ingest_ms", ""),
+            t.get("ocr_ms", t.get("llava_ms", "")),
+            t.get("lookup_ms", ""),
+            (s["image_digest"] or "")[:12],
+        ])
+    return out
+
+
+# recorded by processing_agent, read by the app's Sightings tab
+sightings = SightingStore.from_env()
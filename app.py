@@ -1,21 +1,64 @@
 # app.py  – compact chat UI + backend‑graph tab
 from __future__ import annotations
+import time
+_T0 = time.perf_counter()          # startup clock: process import → UI ready
+
+import asyncio, hashlib, inspect, logging, os
 import gradio as gr
-import graphviz
+from datetime import datetime
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Tuple
 
 from schema import GraphMessage
-from graph import build_graph
+from graph import build_graph, make_checkpointer
+from agents.image_ingest import INGEST_MAX_BYTES
+from agents.sighting_store import SIGHTING_HEADERS, sighting_rows, sightings
+from instrumentation import metrics, node_summary, render_prometheus, start_metrics_server
+from registry import resources
+from scheduler import run_config
+
+log = logging.getLogger("app")
 
 # ───────── Build graphs once ─────────
-compiled_graph, raw_graph = build_graph()
+# each browser session is one LangGraph thread, so follow‑ups see earlier turns
+compiled_graph, raw_graph = build_graph(asynchronous=True,
+                                        checkpointer=make_checkpointer(asynchronous=True))
 
-# ───────── Render static PNG once ─────────
+# max graph runs in flight at once; further requests wait in Gradio's queue
+# (each node has its own, smaller limit – see scheduler.py)
+GRAPH_CONCURRENCY = int(os.getenv("GRAPH_CONCURRENCY", "8"))
+_graph_slots = asyncio.Semaphore(GRAPH_CONCURRENCY)
+
+# ───────── Render static PNG only when the topology changes ─────────
 GRAPH_PNG = Path("langgraph_topology.png")
+GRAPH_SIG = GRAPH_PNG.with_suffix(".sha1")
+
+# High‑level logical edges
+LOGICAL_EDGES = [
+    ("START",   "chat",     "entry"),
+    ("chat",    "ocr",      "delegate: ocr"),
+    ("chat",    "END",      "normal reply"),
+    ("ocr",     "process",  "delegate: process"),
+    ("ocr",     "END",      "no plate"),
+    ("process", "chat",     "delegate: chat"),
+    ("process", "END",      "lookup failed"),
+]
 
-def render_graph_png() -> None:
-    """Generate langgraph_topology.png from the raw StateGraph."""
+def _graph_signature() -> str:
+    shape = repr((sorted(raw_graph.nodes), LOGICAL_EDGES))
+    return hashlib.sha1(shape.encode()).hexdigest()
+
+def render_graph_png(force: bool = False) -> bool:
+    """
+    Generate langgraph_topology.png from the raw StateGraph. Skipped when
+    the PNG already matches the current structure; returns True if rendered.
+    """
+    sig = _graph_signature()
+    if not force and GRAPH_PNG.exists() and GRAPH_SIG.exists() \
+            and GRAPH_SIG.read_text().strip() == sig:
+        return False
+
+    import graphviz                  # only needed when we actually render
     dot = graphviz.Digraph(
         "LangGraph",
         format="png",
@@ -31,22 +74,14 @@ def render_graph_png() -> None:
     for node in raw_graph.nodes:
         dot.node(node, shape="box", style="rounded,filled", fillcolor="#ffffff")
 
-    # High‑level logical edges
-    logical_edges = [
-        ("START",   "chat",     "entry"),
-        ("chat",    "ocr",      "delegate: ocr"),
-        ("chat",    "END",      "normal reply"),
-        ("ocr",     "process",  "delegate: process"),
-        ("ocr",     "END",      "no plate"),
-        ("process", "chat",     "delegate: chat"),
-        ("process", "END",      "lookup failed"),
-    ]
-    for src, dst, label in logical_edges:
+    for src, dst, label in LOGICAL_EDGES:
         dot.edge(src, dst, label=label)
 
     dot.render(GRAPH_PNG.stem, cleanup=True)
+    GRAPH_SIG.write_text(sig)
+    return True
 
-render_graph_png()        # generate PNG once
+render_graph_png()        # no‑op unless the topology changed
 
 # ───────── helper to pull assistant reply ─────────
 def _extract_text(obj: Any) -> str:
@@ -66,30 +101,89 @@ def _extract_text(obj: Any) -> str:
                 return t
     return "⚠️ Unexpected response format."
 
-# ───────── chat callback ─────────
-def chat_step(
-    history: List[Tuple[str, str]],
+# ───────── chat callback (streams tokens into the chatbot) ─────────
+# role/content messages: the only history format in Gradio 6, opt‑in in 4.44 / 5
+_CHATBOT_KW = {"type": "messages"} if "type" in inspect.signature(gr.Chatbot.__init__).parameters else {}
+
+async def chat_step(
+    history: List[Dict[str, Any]],
     user_text: str,
-    image_path: str | None
-) -> Tuple[List[Tuple[str, str]], None, str]:
-    history.append((user_text, ""))
+    image_path: str | None,
+    request: gr.Request,
+) -> AsyncIterator[Tuple[List[Dict[str, Any]], None, str]]:
+    history = [*(history or []), {"role": "user", "content": user_text},
+               {"role": "assistant", "content": ""}]
+    yield history, None, ""    # show the user turn, clear image & textbox
 
     msg = GraphMessage(
         role="user",
         text=user_text,
         data={"image_path": image_path} if image_path else None,
     )
-    reply = _extract_text(compiled_graph.invoke(msg))
-    history[-1] = (user_text, reply)
+    # one deadline for the whole turn (chat → ocr → process → chat), see scheduler.py
+    config = run_config(request.session_hash or "default")
+    t0 = time.perf_counter()
+    ttft: float | None = None
+    partial, final = "", None
+
+    async with _graph_slots:
+        async for mode, payload in compiled_graph.astream(
+            msg, config, stream_mode=["messages", "values"]
+        ):
+            if mode == "values":
+                final = payload
+                continue
+            chunk, meta = payload
+            if meta.get("langgraph_node") != "chat" or not isinstance(chunk.content, str):
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+            partial += chunk.content
+            history[-1] = {"role": "assistant", "content": partial}
+            yield history, None, ""
+
+    reply = _extract_text(final)
+    history[-1] = {"role": "assistant", "content": reply}
+    total = time.perf_counter() - t0
+    metrics.observe("chat_reply_seconds", total)
+    if ttft is not None:
+        metrics.observe("chat_ttft_seconds", ttft)
+    log.info("reply latency: ttft=%s total=%.3fs",
+             f"{ttft:.3f}s" if ttft is not None else "n/a", total)
+    yield history, None, ""
+
+# ───────── metrics exposure ─────────
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))        # 0 = no /metrics endpoint
+METRICS_REFRESH_S = float(os.getenv("METRICS_REFRESH_S", "5"))
+
+# ───────── sightings queries (Sightings tab) ─────────
+SIGHTINGS_UI_LIMIT = int(os.getenv("SIGHTINGS_UI_LIMIT", "500"))      # rows per query
+
+def _parse_time(text: str, default: float) -> float:
+    text = (text or "").strip()
+    if not text:
+        return default
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise gr.Error(f"Can’t read the time '{text}' – use YYYY-MM-DD HH:MM.")
+
+def plate_sightings(plate: str) -> List[List[Any]]:
+    if not (plate or "").strip():
+        raise gr.Error("Enter a registration number.")
+    return sighting_rows(sightings.by_plate(plate, SIGHTINGS_UI_LIMIT))
 
-    return history, None, ""   # clear image & textbox
+def range_sightings(since: str, until: str, plate: str) -> List[List[Any]]:
+    now = time.time()
+    start, end = _parse_time(since, now - 24 * 3600), _parse_time(until, now)
+    return sighting_rows(sightings.in_range(start, end, SIGHTINGS_UI_LIMIT, plate or None))
 
 # ───────── UI layout ─────────
 with gr.Blocks(title="Multi‑agent Licence‑Plate Demo") as demo:
     with gr.Tabs():
         # ─── Chat tab ───
         with gr.Tab("Chat"):
-            chatbot = gr.Chatbot(label="Conversation", height=420)
+            chatbot = gr.Chatbot(label="Conversation", height=420, **_CHATBOT_KW)
             with gr.Row():
                 txt_in = gr.Textbox(
                     placeholder="Type your message...",
@@ -128,5 +222,57 @@ with gr.Blocks(title="Multi‑agent Licence‑Plate Demo") as demo:
                 height=420,
             )
 
+        # ─── Metrics tab ───
+        with gr.Tab("Metrics"):
+            gr.Dataframe(
+                value=node_summary,
+                headers=["node", "calls", "errors", "p50 ms", "p95 ms", "mean ms"],
+                label="Per‑node latency",
+                interactive=False,
+                every=METRICS_REFRESH_S,
+            )
+            gr.Code(
+                value=render_prometheus,
+                label="Prometheus exposition (also served on /metrics)",
+                interactive=False,
+                every=METRICS_REFRESH_S,
+            )
+
+        # ─── Sightings tab ───
+        with gr.Tab("Sightings"):
+            with gr.Row():
+                plate_q = gr.Textbox(label="Plate", placeholder="KY69WMN", scale=3)
+                plate_btn = gr.Button("All sightings of plate", scale=1)
+            with gr.Row():
+                since_q = gr.Textbox(label="From", placeholder="YYYY-MM-DD HH:MM (default: 24 h ago)",
+                                     scale=2)
+                until_q = gr.Textbox(label="To", placeholder="YYYY-MM-DD HH:MM (default: now)", scale=2)
+                range_btn = gr.Button("Sightings in range", scale=1)
+            sightings_tbl = gr.Dataframe(
+                headers=SIGHTING_HEADERS,
+                label="Newest first (range search also filters by plate when one is entered)",
+                interactive=False,
+            )
+            plate_btn.click(fn=plate_sightings, inputs=plate_q, outputs=sightings_tbl)
+            plate_q.submit(fn=plate_sightings, inputs=plate_q, outputs=sightings_tbl)
+            range_btn.click(fn=range_sightings, inputs=[since_q, until_q, plate_q], outputs=sightings_tbl)
+
+# ───────── startup budget ─────────
+STARTUP_SECONDS = time.perf_counter() - _T0
+STARTUP_BUDGET_S = float(os.getenv("STARTUP_BUDGET_S", "3"))
+metrics.register_collector(lambda: [("app_startup_seconds", {}, STARTUP_SECONDS)])
+
 if __name__ == "__main__":
-    demo.launch()
+    logging.basicConfig(level=logging.INFO)
+    log.info("startup: %.2fs to UI ready (budget %.1fs)", STARTUP_SECONDS, STARTUP_BUDGET_S)
+    if STARTUP_SECONDS > STARTUP_BUDGET_S:
+        log.warning("startup exceeded budget by %.2fs", STARTUP_SECONDS - STARTUP_BUDGET_S)
+
+    # load EasyOCR weights + pin Ollama models while the UI is already up
+    if os.getenv("WARM_UP", "1") != "0":
+        resources.warm_up()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+
+    # oversized uploads are refused by Gradio before they reach disk / the graph
+    demo.queue(default_concurrency_limit=GRAPH_CONCURRENCY).launch(max_file_size=INGEST_MAX_BYTES)
@@ -0,0 +1,218 @@
+# batch_ocr.py  – bulk plate recognition over a folder or manifest
+#
+#   python batch_ocr.py photos/            -o plates.jsonl
+#   python batch_ocr.py manifest.csv       --workers 8 --batch-size 32
+#   python batch_ocr.py manifest.jsonl     -o -            # JSONL to stdout
+#
+# Images are decoded + cropped in a thread pool (OpenCV releases the GIL),
+# crops are OCR'd together through EasyOCR's batched API, and one JSON line
+# is written per image as soon as its batch finishes, so memory stays flat.
+from __future__ import annotations
+
+import argparse, csv, json, sys, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from agents.image_ingest import ImageRejected, load_image
+from agents.ocr_agent import CROP_SIZE, _localise_plates, plate_candidates
+from agents.ocr_backends import BACKENDS, OCR_BACKEND, get_backend
+
+# ─────────────  constants  ──────────────
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+FRAME_SIZE = (1024, 768)   # (w, h) for the full‑frame fallback batch
+
+
+@dataclass
+class _Prepared:
+    id: str
+    path: str
+    img: Optional[np.ndarray] = None
+    crop: Optional[np.ndarray] = None
+    found: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchStats:
+    images: int = 0
+    plates: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    @property
+    def images_per_second(self) -> float:
+        return self.images / self.seconds if self.seconds else 0.0
+
+
+# ─────────────  sources  ──────────────
+def iter_sources(source: str | Path) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (id, image_path) pairs from a directory (recursive), a CSV
+    manifest (``image_path`` column, optional ``id``) or a JSONL manifest
+    (one object per line with the same keys). Relative manifest paths are
+    resolved against the manifest's folder.
+    """
+    src = Path(source)
+    if src.is_dir():
+        for p in sorted(src.rglob("*")):
+            if p.suffix.lower() in IMAGE_EXTS:
+                yield str(p.relative_to(src)), str(p)
+        return
+
+    base = src.parent
+    if src.suffix.lower() == ".csv":
+        with src.open(newline="") as f:
+            rows: Iterable[Dict] = csv.DictReader(f)
+            for i, row in enumerate(rows):
+                path = row.get("image_path") or next(iter(row.values()), "")
+                yield str(row.get("id") or i), str(base / path)
+    elif src.suffix.lower() in {".jsonl", ".ndjson"}:
+        with src.open() as f:
+            for i, line in enumerate(f):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                yield str(row.get("id", i)), str(base / row["image_path"])
+    else:
+        raise ValueError(f"Unsupported source '{source}': expected a folder, .csv or .jsonl")
+
+
+def _chunks(it: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    chunk: List[Tuple[str, str]] = []
+    for item in it:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ─────────────  stages  ──────────────
+def _prepare(item: Tuple[str, str]) -> _Prepared:
+    img_id, path = item
+    try:
+        img = load_image(path)["image"]        # reduced decode, EXIF‑upright
+    except ImageRejected as err:
+        return _Prepared(img_id, path, error=err.reason)
+    candidates = _localise_plates(img, top_k=1)
+    if not candidates:
+        return _Prepared(img_id, path, img=img)
+    return _Prepared(img_id, path, img=img, crop=candidates[0][0], found=True)
+
+
+def _ocr_chunk(prepared: List[_Prepared], batch_size: int, backend: Optional[str] = None) -> List[Dict]:
+    ocr = get_backend(backend)
+    ok = [i for i, p in enumerate(prepared) if p.error is None]
+    found = [i for i in ok if prepared[i].found]
+    texts: Dict[int, List[Tuple[str, float]]] = dict(zip(
+        found, ocr.read_batch([prepared[i].crop for i in found], CROP_SIZE, batch_size),  # type: ignore[misc]
+    ))
+
+    # no plate box, or a box that yielded nothing → full frame, also batched
+    retry = [i for i in ok if not texts.get(i)]
+    texts.update(zip(
+        retry, ocr.read_frames([prepared[i].img for i in retry], FRAME_SIZE, batch_size),  # type: ignore[misc]
+    ))
+
+    records = []
+    for i, p in enumerate(prepared):
+        rec: Dict = {"id": p.id, "image_path": p.path}
+        if p.error:
+            rec["error"] = p.error
+        else:
+            ranked = plate_candidates([texts[i]])
+            rec.update(plate=ranked[0].plate if ranked else "",
+                       confidence=round(ranked[0].score, 3) if ranked else 0.0,
+                       alternatives=[c.plate for c in ranked[1:]],
+                       texts=[t for t, _ in texts[i]], plate_found=p.found)
+        records.append(rec)
+    return records
+
+
+# ─────────────  public API  ──────────────
+def iter_batch(
+    source: str | Path,
+    workers: int = 4,
+    batch_size: int = 16,
+    stats: Optional[BatchStats] = None,
+    backend: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Stream one result dict per image. While chunk N is being OCR'd the
+    thread pool is already decoding + cropping chunk N+1.
+    """
+    stats = stats if stats is not None else BatchStats()
+    t0 = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunks = _chunks(iter_sources(source), batch_size)
+
+        def _submit() -> Optional[List[Future]]:
+            nxt = next(chunks, None)
+            return [pool.submit(_prepare, it) for it in nxt] if nxt else None
+
+        pending = _submit()
+        while pending:
+            prepared = [f.result() for f in pending]
+            pending = _submit()                      # prefetch next chunk
+
+            for rec in _ocr_chunk(prepared, batch_size, backend):
+                stats.images += 1
+                stats.errors += "error" in rec
+                stats.plates += bool(rec.get("plate"))
+                stats.seconds = time.perf_counter() - t0
+                yield rec
+
+
+def run_batch(
+    source: str | Path,
+    out: TextIO | str | Path,
+    workers: int = 4,
+    batch_size: int = 16,
+    progress: Optional[TextIO] = sys.stderr,
+    progress_every: int = 100,
+    backend: Optional[str] = None,
+) -> BatchStats:
+    """Write JSONL results for every image in *source* and return throughput stats."""
+    stats = BatchStats()
+    fh = open(out, "w") if isinstance(out, (str, Path)) else out
+    try:
+        for rec in iter_batch(source, workers, batch_size, stats, backend):
+            fh.write(json.dumps(rec) + "\n")
+            if progress and stats.images % progress_every == 0:
+                fh.flush()
+                print(f"{stats.images} images  {stats.images_per_second:.1f} img/s",
+                      file=progress)
+    finally:
+        if fh is not out:
+            fh.close()
+    return stats
+
+
+# ─────────────  CLI  ──────────────
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Bulk licence‑plate OCR → JSONL")
+    ap.add_argument("source", help="image folder, CSV or JSONL manifest")
+    ap.add_argument("-o", "--out", default="-", help="output JSONL path ('-' = stdout)")
+    ap.add_argument("--workers", type=int, default=4, help="decode/crop threads")
+    ap.add_argument("--batch-size", type=int, default=16, help="images per OCR batch")
+    ap.add_argument("--backend", choices=sorted(BACKENDS), default=OCR_BACKEND, help="OCR backend")
+    args = ap.parse_args(argv)
+
+    out = sys.stdout if args.out == "-" else args.out
+    stats = run_batch(args.source, out, args.workers, args.batch_size, backend=args.backend)
+    print(
+        f"done: {stats.images} images, {stats.plates} plates, {stats.errors} errors "
+        f"in {stats.seconds:.1f}s ({stats.images_per_second:.1f} img/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""OCR backends side by side: load time, memory, per‑image latency and accuracy."""
+# benchmarks/bench_backends.py
+#
+#   python -m benchmarks.bench_backends                              # every registered backend
+#   python -m benchmarks.bench_backends --backends easyocr,tesseract --per-combo 1 -o backends.json
+#
+# Each backend runs in its own interpreter so RSS numbers aren't polluted by
+# the others (torch alone is a few hundred MB). Every backend sees the same
+# synthetic image set and the full ``_read_image`` path: localise → OCR →
+# plate decoding, so accuracy is what the graph would report.
+from __future__ import annotations
+
+import argparse, json, resource, subprocess, sys, time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import summarise
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _recogniser_layers(backend: Any) -> Dict[str, int] | None:
+    """LSTM / Linear layers of an EasyOCR recogniser by precision (None for other backends)."""
+    model = getattr(getattr(backend, "reader", None), "recognizer", None)
+    if model is None:
+        return None
+    counts = {"int8": 0, "fp32": 0}
+    for mod in model.modules():
+        kind = type(mod).__name__
+        if kind in ("LSTM", "Linear"):
+            # torch.ao.nn.quantized.dynamic.{LSTM,Linear} keep the float class names
+            counts["int8" if ".quantized" in type(mod).__module__ else "fp32"] += 1
+    return counts
+
+
+def run_backend(name: str, per_combo: int, seed: int, repeat: int) -> Dict[str, Any]:
+    """Measure one backend in *this* process."""
+    from agents.ocr_agent import _read_image
+    from agents.ocr_backends import get_backend
+    from benchmarks.synth import generate
+
+    samples = list(generate(per_combo, seed))
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    backend = get_backend(name)
+    load_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    backend.warm()
+    warm_s = time.perf_counter() - t0
+    rss_loaded = _rss_mb()
+
+    times: List[float] = []
+    top1, top3 = [], []
+    by_fmt: Dict[str, List[bool]] = {}
+    for r in range(repeat):
+        for s in samples:
+            t = time.perf_counter()
+            ranked = [c.plate for c in _read_image(s.image, name)]
+            times.append((time.perf_counter() - t) * 1000)
+            if r == 0:
+                top1.append(ranked[:1] == [s.plate])
+                top3.append(s.plate in ranked[:3])
+                by_fmt.setdefault(s.fmt, []).append(top1[-1])
+
+    return {
+        "load_s": round(load_s, 2), "warm_s": round(warm_s, 2),
+        "rss_base_mb": rss0, "rss_loaded_mb": rss_loaded, "rss_peak_mb": _peak_rss_mb(),
+        "model_mb": round(rss_loaded - rss0, 1),
+        "recogniser_layers": _recogniser_layers(backend),
+        "per_image": summarise(times),
+        "accuracy": round(sum(top1) / len(top1), 3),
+        "top3_accuracy": round(sum(top3) / len(top3), 3),
+        "accuracy_by_format": {f: round(sum(v) / len(v), 3) for f, v in by_fmt.items()},
+    }
+
+
+def _in_subprocess(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "benchmarks.bench_backends", "--child", name,
+           "--per-combo", str(args.per_combo), "--seed", str(args.seed), "--repeat", str(args.repeat)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or [f"exit {proc.returncode}"])[-1]}
+    return json.loads(lines[-1])
+
+
+def main(argv: List[str] | None = None) -> int:
+    from agents.ocr_backends import BACKENDS
+
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--backends", default=",".join(BACKENDS), help="comma‑separated backend names")
+    ap.add_argument("--per-combo", type=int, default=1, help="images per format×resolution×noise")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("-o", "--out", help="write JSON results here (default: stdout)")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:                                   # one backend, result as a JSON line
+        try:
+            res = run_backend(args.child, args.per_combo, args.seed, args.repeat)
+        except (ImportError, OSError) as err:        # not installed / no tesseract binary
+            res = {"skipped": str(err)}
+        print(json.dumps(res))
+        return 0
+
+    results: Dict[str, Any] = {}
+    for name in args.backends.split(","):
+        results[name] = _in_subprocess(name, args)
+        print(f"{name}: done", file=sys.stderr)
+
+    text = json.dumps({"per_combo": args.per_combo, "seed": args.seed, "repeat": args.repeat,
+                       "backends": results}, indent=2)
+    if args.out:
+        Path(args.out).write_text(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
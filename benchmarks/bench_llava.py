@@ -0,0 +1,85 @@
+"""Bytes sent to LLaVA and ocr_agent_llm latency: raw upload vs cropped/downscaled."""
+# benchmarks/bench_llava.py
+#
+#   python -m benchmarks.bench_llava                     # fake LLaVA: payload + client cost
+#   python -m benchmarks.bench_llava --live --per-combo 1   # real Ollama: end‑to‑end + accuracy
+from __future__ import annotations
+
+import argparse, json, tempfile, time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import cv2
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import agents.ocr_agent_llm as llm_ocr
+from agents.image_ingest import load_image
+from agents.ocr_cache import ocr_cache
+from benchmarks.common import summarise
+from benchmarks.synth import generate
+from registry import resources
+from schema import GraphMessage
+
+
+def _payload_bytes(path: str) -> int:
+    if not llm_ocr.LLAVA_PREPROCESS:
+        return len(Path(path).read_bytes())
+    return len(llm_ocr._llava_image(load_image(path)["image"])[0])
+
+
+def run_mode(paths: List[str], plates: List[str], preprocess: bool) -> Dict[str, Any]:
+    llm_ocr.LLAVA_PREPROCESS = preprocess
+    ocr_cache.clear()                               # every call must reach the model
+    times: List[float] = []
+    hits = 0
+    for p, want in zip(paths, plates):
+        t0 = time.perf_counter()
+        out = llm_ocr.ocr_agent_llm(GraphMessage(role="user", text="", data={"image_path": p}))
+        times.append((time.perf_counter() - t0) * 1000)
+        hits += (out.data or {}).get("plate") == want
+    sizes = [_payload_bytes(p) for p in paths]
+    return {**summarise(times),
+            "bytes_mean": round(sum(sizes) / len(sizes)),
+            "bytes_total": sum(sizes),
+            "accuracy": round(hits / len(paths), 3)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--per-combo", type=int, default=2, help="images per format×resolution×noise")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--quality", type=int, default=92, help="JPEG quality of the 'uploaded' files")
+    ap.add_argument("--live", action="store_true", help="call the real Ollama LLaVA model")
+    args = ap.parse_args()
+
+    samples = list(generate(args.per_combo, args.seed))
+    if not args.live:
+        # accuracy is meaningless against a fake; latency is client work only
+        resources.override("vision_llm", FakeListChatModel(responses=["NONE"]))
+
+    saved = llm_ocr.LLAVA_PREPROCESS
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, s in enumerate(samples):
+            p = Path(tmp) / f"{i}.jpg"
+            cv2.imwrite(str(p), s.image, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+            paths.append(str(p))
+        plates = [s.plate for s in samples]
+        try:
+            before = run_mode(paths, plates, preprocess=False)
+            after = run_mode(paths, plates, preprocess=True)
+        finally:
+            llm_ocr.LLAVA_PREPROCESS = saved
+
+    print(json.dumps({
+        "images": len(samples),
+        "live": args.live,
+        "raw_upload": before,
+        "preprocessed": after,
+        "bytes_reduction": round(1 - after["bytes_total"] / before["bytes_total"], 3),
+        "p50_speedup": round(before["p50_ms"] / after["p50_ms"], 2) if after["p50_ms"] else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""_crop_plate vs _localise_plates timing on 12 MP images."""
+# benchmarks/bench_localise.py
+#
+#   python -m benchmarks.bench_localise                 # synthetic 12 MP scenes
+#   python -m benchmarks.bench_localise --images photos/ --repeat 3
+from __future__ import annotations
+
+import argparse, json
+from pathlib import Path
+
+import cv2, numpy as np
+
+from agents.ocr_agent import _crop_plate, _localise_plates
+from benchmarks.common import summarise, time_calls
+
+
+def synthetic_scene(w: int = 4000, h: int = 3000, seed: int = 0) -> np.ndarray:
+    """Noisy background, a car‑ish block and a bordered white plate with text."""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(90, 140, (h, w, 3), dtype=np.uint8)
+    cv2.rectangle(img, (w // 5, h // 3), (4 * w // 5, 5 * h // 6), (40, 40, 60), -1)
+    pw, ph = w // 4, w // 14
+    x, y = (w - pw) // 2 + int(rng.integers(-w // 10, w // 10)), 2 * h // 3
+    cv2.rectangle(img, (x, y), (x + pw, y + ph), (235, 235, 235), -1)
+    cv2.rectangle(img, (x, y), (x + pw, y + ph), (0, 0, 0), max(2, w // 800))
+    cv2.putText(img, "KY69 WMN", (x + pw // 14, y + 3 * ph // 4),
+                cv2.FONT_HERSHEY_SIMPLEX, ph / 80, (0, 0, 0), max(2, w // 500))
+    return img
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--images", help="folder of real photos (default: synthetic scenes)")
+    ap.add_argument("--count", type=int, default=5, help="synthetic scenes to generate")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.images:
+        imgs = [cv2.imread(str(p)) for p in sorted(Path(args.images).iterdir())]
+        imgs = [i for i in imgs if i is not None]
+    else:
+        imgs = [synthetic_scene(seed=i) for i in range(args.count)]
+
+    legacy = summarise(time_calls(_crop_plate, [(i,) for i in imgs], args.repeat))
+    pyramid = summarise(time_calls(_localise_plates, [(i,) for i in imgs], args.repeat))
+    found_legacy = sum(_crop_plate(i)[1] for i in imgs)
+    found_pyramid = sum(bool(_localise_plates(i)) for i in imgs)
+
+    print(json.dumps({
+        "images": len(imgs),
+        "crop_plate": {**legacy, "found": found_legacy},
+        "localise_plates": {**pyramid, "found": found_pyramid},
+        "speedup": legacy["mean_ms"] / pyramid["mean_ms"] if pyramid["mean_ms"] else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""SightingStore write throughput and query latency on a year of sightings."""
+# benchmarks/bench_sightings.py
+#
+#   python -m benchmarks.bench_sightings                     # 2M rows, 200k plates
+#   python -m benchmarks.bench_sightings --rows 200000 --db /tmp/s.db --keep
+from __future__ import annotations
+
+import argparse, json, os, random, string, tempfile, time
+from pathlib import Path
+
+from agents.sighting_store import SightingStore, _INSERT
+from benchmarks.common import summarise, time_calls
+
+YEAR_S = 365 * 24 * 3600
+VEHICLE = {"make": "FORD", "colour": "BLUE", "yearOfManufacture": 2019,
+           "fuelType": "PETROL", "motStatus": "Valid", "taxStatus": "Taxed"}
+
+
+def _plate(rng: random.Random) -> str:
+    up, dig = string.ascii_uppercase, string.digits
+    return "".join(rng.choices(up, k=2) + rng.choices(dig, k=2) + rng.choices(up, k=3))
+
+
+def seed(path: str, rows: int, plates: int, now: float, chunk: int = 50_000) -> float:
+    """Bulk‑load *rows* sightings over the past year straight through executemany; seconds taken."""
+    rng = random.Random(0)
+    pool = [_plate(rng) for _ in range(plates)]
+    store = SightingStore(path)
+    db = store._read_conn()                     # creates the schema
+    vehicle, timings = json.dumps(VEHICLE), json.dumps({"ocr_ms": 180.0, "lookup_ms": 45.0})
+    t0 = time.perf_counter()
+    for start in range(0, rows, chunk):
+        batch = [(now - rng.random() * YEAR_S, rng.choice(pool), 0.9, None, "easyocr",
+                  timings, vehicle) for _ in range(min(chunk, rows - start))]
+        with db:
+            db.executemany(_INSERT, batch)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--plates", type=int, default=200_000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--records", type=int, default=20_000, help="rows pushed through record()")
+    ap.add_argument("--db", help="database file (default: a temp file)")
+    ap.add_argument("--keep", action="store_true", help="keep the database afterwards")
+    args = ap.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "sightings.db")
+    now = time.time()
+    seed_s = seed(path, args.rows, args.plates, now)
+
+    # 📝 request path: record() cost per call, then how long the writer needs to drain
+    store = SightingStore(path)
+    rng = random.Random(1)
+    extra = [(_plate(rng), VEHICLE, 0.9, "ab" * 32, "easyocr", {"ocr_ms": 180.0}) for _ in range(args.records)]
+    t0 = time.perf_counter()
+    record_ms = time_calls(store.record, extra)
+    store.flush()
+    drain_s = time.perf_counter() - t0
+
+    # 🔍 queries on a warm reader
+    known = [r[0] for r in store._read_conn().execute(
+        "SELECT plate FROM sightings ORDER BY random() LIMIT ?", (args.queries,))]
+    windows = [(t, t + 3600) for t in (now - rng.random() * YEAR_S for _ in range(args.queries))]
+    by_plate = summarise(time_calls(store.by_plate, [(p,) for p in known]))
+    in_range = summarise(time_calls(store.in_range, windows))
+    t0 = time.perf_counter()
+    warm = store.latest_vehicles(now - 24 * 3600)
+    latest_ms = (time.perf_counter() - t0) * 1000
+    store.close()
+
+    print(json.dumps({
+        "rows": args.rows + args.records,
+        "db_mb": round(Path(path).stat().st_size / 2**20, 1),
+        "bulk_insert_rows_per_s": round(args.rows / seed_s),
+        "record_call": summarise(record_ms),
+        "writer_rows_per_s": round(args.records / drain_s),
+        "writer_batches": store.batches,
+        "by_plate": by_plate,
+        "in_range_1h": in_range,
+        "latest_vehicles_24h": {"plates": len(warm), "ms": round(latest_ms, 1)},
+    }, indent=2))
+
+    if not (args.keep or args.db):
+        for suffix in ("", "-wal", "-shm"):
+            Path(path + suffix).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
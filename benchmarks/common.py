@@ -0,0 +1,32 @@
+"""Shared timing helpers for the benchmark scripts."""
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+
+
+def summarise(samples_ms: Iterable[float]) -> Dict[str, float]:
+    arr = np.asarray(list(samples_ms), dtype=float)
+    if not arr.size:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "n": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def time_calls(fn: Callable[..., object], args_list: List[tuple], repeat: int = 1) -> List[float]:
+    """Wall time in ms of ``fn(*args)`` for every args tuple, *repeat* times over."""
+    out: List[float] = []
+    for _ in range(repeat):
+        for args in args_list:
+            t0 = time.perf_counter()
+            fn(*args)
+            out.append((time.perf_counter() - t0) * 1000)
+    return out
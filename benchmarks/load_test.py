@@ -0,0 +1,440 @@
+"""End‑to‑end load test: concurrent chat / image / follow‑up sessions against local Ollama + DVLA stubs."""
+# benchmarks/load_test.py
+#
+#   python -m benchmarks.load_test                                    # compiled graph, 1 → 50 users
+#   python -m benchmarks.load_test --target both --levels 1,10,50 --token-latency 0.03 -o load.json
+#   python -m benchmarks.load_test --target gradio --think 2 --mix chat=0.6,image=0.3,followup=0.1
+#
+# Nothing live is touched: stubs/ollama_stub.py streams tokens at
+# --token-latency and "reads" a fresh plate off every upload, stubs/dvla_stub.py
+# answers the lookups. Each simulated user is one session (LangGraph thread /
+# Gradio session) sending --turns messages with ~--think seconds between them;
+# follow‑ups ("what colour is it?") only come after that user's first image.
+# Uploads and chat prompts are unique per turn, so the OCR, DVLA and reply
+# caches stay cold unless --reuse-images.
+#
+#   graph    compiled_graph driven in‑process behind GRAPH_CONCURRENCY slots, like app.py
+#   gradio   app.py in a subprocess, driven through its HTTP API with gradio_client
+#
+# Per level: turns/s, p50/p99 latency (overall and per kind), time to first
+# token, queueing delay (waiting for a graph slot / Gradio worker) and error
+# rate by reason, plus what the stubs saw.
+from __future__ import annotations
+
+import argparse, asyncio, json, os, random, socket, subprocess, sys, tempfile, threading, time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import cv2
+
+from benchmarks.common import summarise
+
+ROOT = Path(__file__).resolve().parents[1]
+KINDS = ("chat", "image", "followup")
+
+TOPICS = ("octopuses", "the Moon", "sourdough bread", "jazz", "volcanoes", "chess openings",
+          "honeybees", "the Roman Empire", "black holes", "coffee", "origami", "glaciers")
+FOLLOWUPS = ("what colour is it?", "What make is that car?", "how old is it?", "is it taxed?",
+             "what fuel does it use?")
+
+
+@dataclass
+class Turn:
+    kind: str
+    text: str
+    image: Optional[str] = None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    mix = {k: float(v) for k, v in (part.split("=") for part in spec.split(","))}
+    unknown = set(mix) - set(KINDS)
+    if unknown:
+        raise SystemExit(f"unknown traffic kind(s) in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+# ─── traffic ──────────────────────────────────────────────────────
+class Traffic:
+    """Per‑session turn plans; every upload is a distinct file unless *reuse_images*."""
+
+    def __init__(self, workdir: str, seed: int, reuse_images: bool, bases: int = 6) -> None:
+        from benchmarks.synth import random_plate, render_scene
+        self.workdir = workdir
+        self.reuse_images = reuse_images
+        self.rng = random.Random(seed)
+        self._n = 0
+        self.bases = []
+        for i in range(bases):
+            img = render_scene(random_plate("uk", self.rng), "uk", (1280, 960), 8.0, self.rng)
+            self.bases.append(img)
+        self.base_files = [self._write(img) for img in self.bases]
+
+    def _write(self, img) -> str:
+        self._n += 1
+        path = os.path.join(self.workdir, f"upload_{self._n:05d}.jpg")
+        cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        return path
+
+    def _image(self) -> str:
+        i = self.rng.randrange(len(self.bases))
+        if self.reuse_images:
+            return self.base_files[i]
+        img = self.bases[i].copy()                    # a few changed pixels → new digest
+        x, y = self.rng.randrange(img.shape[1] - 8), self.rng.randrange(40)
+        img[y:y + 4, x:x + 8] = self.rng.randrange(256)
+        return self._write(img)
+
+    def plan(self, turns: int, mix: Dict[str, float]) -> List[Turn]:
+        out: List[Turn] = []
+        seen_image = False
+        for _ in range(turns):
+            kind = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+            if kind == "followup" and not seen_image:
+                kind = "image" if mix.get("image") else "chat"
+            self._n += 1
+            if kind == "image":
+                seen_image = True
+                out.append(Turn("image", "Here's the car", self._image()))
+            elif kind == "followup":
+                out.append(Turn("followup", self.rng.choice(FOLLOWUPS)))
+            else:                                     # unique text → no canned / cached reply
+                out.append(Turn("chat", f"Tell me a fun fact about {self.rng.choice(TOPICS)} "
+                                        f"(request {self._n})"))
+        return out
+
+
+def _verdict(turn: Turn, reply: str) -> Optional[str]:
+    """None when *reply* is what this kind of turn should get, else the error reason."""
+    if not reply:
+        return "empty reply"
+    if reply.startswith("⚠️"):
+        return f"warning: {reply[:60]}"
+    if turn.kind == "image" and "Reg:" not in reply:
+        return "image: no vehicle details"
+    if turn.kind == "followup" and not reply.startswith("For "):
+        return "followup: not answered from the stored vehicle"
+    return None
+
+
+def _record(turn: Turn, t0: float, started: float, ttft: Optional[float], reply: str,
+            error: Optional[str] = None) -> Dict[str, Any]:
+    end = time.perf_counter()
+    return {
+        "kind": turn.kind,
+        "latency_ms": (end - t0) * 1000,
+        "queue_ms": (started - t0) * 1000,
+        "ttft_ms": (ttft - t0) * 1000 if ttft is not None else None,
+        "error": error or _verdict(turn, reply),
+    }
+
+
+# ─── target: compiled graph in‑process ────────────────────────────
+class GraphTarget:
+    name = "graph"
+
+    def __init__(self, concurrency: int, timeout: float) -> None:
+        from graph import build_graph, make_checkpointer
+        self.graph, _ = build_graph(asynchronous=True,
+                                    checkpointer=make_checkpointer(asynchronous=True))
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()          # one loop for all levels, like the app's
+
+    async def _turn(self, slots: asyncio.Semaphore, thread_id: str, turn: Turn) -> Dict[str, Any]:
+        from schema import GraphMessage
+        from scheduler import run_config
+        msg = GraphMessage(role="user", text=turn.text,
+                           data={"image_path": turn.image} if turn.image else None)
+        config = run_config(thread_id)
+        t0 = time.perf_counter()
+        started, ttft, final = t0, None, None
+
+        async def _drive() -> None:
+            nonlocal started, ttft, final
+            async with slots:                          # same gate as app.chat_step
+                started = time.perf_counter()
+                async for mode, payload in self.graph.astream(
+                    msg, config, stream_mode=["messages", "values"]
+                ):
+                    if mode == "values":
+                        final = payload
+                    elif ttft is None and payload[1].get("langgraph_node") == "chat":
+                        ttft = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(_drive(), self.timeout)
+        except asyncio.TimeoutError:
+            return _record(turn, t0, started, ttft, "", "timeout")
+        except Exception as err:                       # noqa: BLE001 – counted, not fatal
+            return _record(turn, t0, started, ttft, "",
+                           f"exception: {type(err).__name__}: {str(err)[:80]}")
+        reply = final.text if isinstance(final, GraphMessage) else (final or {}).get("text")
+        return _record(turn, t0, started, ttft, reply or "")
+
+    async def _session(self, slots, sid: str, plan: List[Turn], think: float,
+                       rng: random.Random, out: List[Dict]) -> None:
+        await asyncio.sleep(rng.uniform(0, think))    # users don't all arrive on the same tick
+        for i, turn in enumerate(plan):
+            if i:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * think)
+            out.append(await self._turn(slots, sid, turn))
+
+    def run(self, level: int, plans: List[List[Turn]], think: float, seed: int) -> List[Dict]:
+        async def _all() -> List[Dict]:
+            slots = asyncio.Semaphore(self.concurrency)
+            out: List[Dict] = []
+            rng = random.Random(seed)
+            await asyncio.gather(*(self._session(slots, f"load-{level}-{i}", plan, think, rng, out)
+                                   for i, plan in enumerate(plans)))
+            return out
+        return self.loop.run_until_complete(_all())
+
+    def close(self) -> None:
+        self.loop.close()
+
+
+# ─── target: app.py over Gradio's HTTP API ────────────────────────
+def _reply_of(history: Any) -> str:
+    """Last assistant text from a Chatbot value (tuple pairs or role/content messages)."""
+    if not history:
+        return ""
+    last = history[-1]
+    if isinstance(last, dict):
+        if last.get("role") != "assistant":
+            return ""
+        content = last.get("content")
+        if isinstance(content, list):
+            return "".join(c.get("text", "") for c in content if isinstance(c, dict))
+        return content if isinstance(content, str) else ""
+    return (last[1] or "") if isinstance(last, (list, tuple)) and len(last) > 1 else ""
+
+
+class GradioTarget:
+    name = "gradio"
+
+    def __init__(self, env: Dict[str, str], workdir: str, timeout: float,
+                 startup_timeout: float = 180.0) -> None:
+        port = _free_port()
+        self.url = f"http://127.0.0.1:{port}/"
+        self.timeout = timeout
+        self.log_path = os.path.join(workdir, "app.log")
+        self._log = open(self.log_path, "wb")
+        self.proc = subprocess.Popen(
+            [sys.executable, "app.py"], cwd=ROOT, stdout=self._log, stderr=subprocess.STDOUT,
+            env={**os.environ, **env, "GRADIO_SERVER_NAME": "127.0.0.1",
+                 "GRADIO_SERVER_PORT": str(port), "GRADIO_ANALYTICS_ENABLED": "False"},
+        )
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"app.py exited with {self.proc.returncode}:\n{self._tail()}")
+            try:
+                urllib.request.urlopen(self.url, timeout=2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError(f"app.py not up after {startup_timeout:.0f}s:\n{self._tail()}")
+                time.sleep(0.5)
+
+    def _tail(self, lines: int = 20) -> str:
+        self._log.flush()
+        return "\n".join(Path(self.log_path).read_text(errors="replace").splitlines()[-lines:])
+
+    def _turn(self, client: Any, history: List, turn: Turn) -> tuple:
+        from gradio_client import handle_file
+        from gradio_client.utils import Status
+        running = {Status.PROCESSING, Status.ITERATING, Status.PROGRESS, Status.FINISHED}
+
+        t0 = time.perf_counter()
+        started, ttft = None, None
+        try:
+            job = client.submit(history, turn.text, handle_file(turn.image) if turn.image else None,
+                                api_name="/chat_step")
+            while not job.done():
+                if started is None and job.status().code in running:
+                    started = time.perf_counter()
+                if ttft is None:
+                    outputs = job.outputs()
+                    if outputs and _reply_of(outputs[-1][0]):
+                        ttft = time.perf_counter()
+                if time.perf_counter() - t0 > self.timeout:
+                    job.cancel()
+                    return history, _record(turn, t0, started or t0, ttft, "", "timeout")
+                time.sleep(0.005)
+            result = job.result()
+        except Exception as err:                       # noqa: BLE001 – counted, not fatal
+            return history, _record(turn, t0, started or t0, ttft, "",
+                                    f"exception: {type(err).__name__}: {str(err)[:80]}")
+        history = result[0] if isinstance(result, (list, tuple)) else result
+        return history, _record(turn, t0, started or t0, ttft, _reply_of(history))
+
+    def _session(self, client: Any, plan: List[Turn], think: float, rng: random.Random,
+                 out: List[Dict], lock: threading.Lock) -> None:
+        time.sleep(rng.uniform(0, think))
+        history: List = []
+        for i, turn in enumerate(plan):
+            if i:
+                time.sleep(rng.uniform(0.5, 1.5) * think)
+            history, rec = self._turn(client, history, turn)
+            with lock:
+                out.append(rec)
+
+    def run(self, level: int, plans: List[List[Turn]], think: float, seed: int) -> List[Dict]:
+        from gradio_client import Client
+        clients = [Client(self.url, verbose=False) for _ in plans]     # one session each
+        out: List[Dict] = []
+        lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=len(plans)) as pool:
+            futures = [pool.submit(self._session, c, plan, think, random.Random(seed + i), out, lock)
+                       for i, (c, plan) in enumerate(zip(clients, plans))]
+            for f in futures:
+                f.result()
+        for c in clients:
+            c.close()
+        return out
+
+    def close(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self._log.close()
+
+
+# ─── report ───────────────────────────────────────────────────────
+def _report(level: int, records: List[Dict], wall_s: float, stubs: Dict[str, Any]) -> Dict[str, Any]:
+    errors: Dict[str, int] = {}
+    for r in records:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    return {
+        "users": level,
+        "turns": len(records),
+        "wall_s": round(wall_s, 2),
+        "throughput_tps": round(len(records) / wall_s, 2) if wall_s else 0.0,
+        "latency": summarise(r["latency_ms"] for r in records),
+        "by_kind": {k: summarise(r["latency_ms"] for r in records if r["kind"] == k)
+                    for k in KINDS if any(r["kind"] == k for r in records)},
+        "queue": summarise(r["queue_ms"] for r in records),
+        "ttft": summarise(r["ttft_ms"] for r in records if r["ttft_ms"] is not None),
+        "error_rate": round(sum(errors.values()) / len(records), 4) if records else 0.0,
+        "errors": errors,
+        **stubs,
+    }
+
+
+def _table(target: str, rows: List[Dict[str, Any]]) -> str:
+    head = f"{target:>7} {'users':>5} {'turns/s':>8} {'p50 ms':>8} {'p99 ms':>8} " \
+           f"{'queue p50':>9} {'queue p99':>9} {'ttft p50':>8} {'err %':>6}"
+    lines = [head]
+    for r in rows:
+        g = lambda d, k: d.get(k, float("nan"))      # noqa: E731
+        lines.append(
+            f"{'':>7} {r['users']:>5} {r['throughput_tps']:>8.2f} {g(r['latency'], 'p50_ms'):>8.0f} "
+            f"{g(r['latency'], 'p99_ms'):>8.0f} {g(r['queue'], 'p50_ms'):>9.0f} "
+            f"{g(r['queue'], 'p99_ms'):>9.0f} {g(r['ttft'], 'p50_ms'):>8.0f} {100 * r['error_rate']:>6.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--target", choices=["graph", "gradio", "both"], default="graph")
+    ap.add_argument("--levels", default="1,10,25,50", help="concurrent users per step")
+    ap.add_argument("--turns", type=int, default=4, help="messages per user")
+    ap.add_argument("--think", type=float, default=1.0, help="mean seconds between a user's turns")
+    ap.add_argument("--mix", default="chat=0.5,image=0.3,followup=0.2")
+    ap.add_argument("--token-latency", type=float, default=0.02, help="stub Ollama seconds/token")
+    ap.add_argument("--first-token-latency", type=float, default=0.15, help="stub prompt‑eval seconds")
+    ap.add_argument("--dvla-latency", type=float, default=0.1, help="stub DVLA seconds/lookup")
+    ap.add_argument("--ocr-mode", default="llava",
+                    help="OCR_MODE for the graph (llava needs no local OCR weights)")
+    ap.add_argument("--graph-concurrency", type=int,
+                    default=int(os.getenv("GRAPH_CONCURRENCY", "8")))
+    ap.add_argument("--timeout", type=float, default=120.0, help="seconds before a turn counts as failed")
+    ap.add_argument("--reuse-images", action="store_true", help="re‑upload the same few photos")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", type=Path)
+    args = ap.parse_args()
+
+    levels = [int(n) for n in args.levels.split(",")]
+    mix = _parse_mix(args.mix)
+
+    # env first: graph / agents read it at import time
+    ollama_port, dvla_port = _free_port(), _free_port()
+    env = {
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+        "DVLA_URL": f"http://127.0.0.1:{dvla_port}/vehicles",
+        "DVLA_API_KEY": "load-test",
+        "OCR_MODE": args.ocr_mode,
+        "GRAPH_CONCURRENCY": str(args.graph_concurrency),
+        "METRICS_PORT": "0",
+        "SIGHTINGS_DB": "",            # stub DVLA records stay out of ./sightings.db
+    }
+    os.environ.update(env)
+
+    from benchmarks.synth import random_plate
+    from stubs.dvla_stub import DvlaStub
+    from stubs.ollama_stub import OllamaStub
+
+    plate_rng = random.Random(args.seed + 1)
+    ollama = OllamaStub(port=ollama_port, token_latency=args.token_latency,
+                        first_token_latency=args.first_token_latency,
+                        vision_reply=lambda: random_plate("uk", plate_rng))   # new plate → DVLA miss
+    dvla = DvlaStub(port=dvla_port, latency=args.dvla_latency)
+    targets = ["graph", "gradio"] if args.target == "both" else [args.target]
+    results: Dict[str, Any] = {
+        "config": {k: v for k, v in vars(args).items() if k != "output"} | {"levels": levels},
+    }
+
+    with ollama, dvla, tempfile.TemporaryDirectory(prefix="load_test_") as workdir:
+        traffic = Traffic(workdir, args.seed, args.reuse_images)
+        for name in targets:
+            try:
+                target = GraphTarget(args.graph_concurrency, args.timeout) if name == "graph" \
+                    else GradioTarget(env, workdir, args.timeout)
+            except (ImportError, RuntimeError) as err:
+                results[name] = {"skipped": str(err)}
+                print(f"{name}: skipped – {err}", file=sys.stderr)
+                continue
+            try:
+                target.run(0, [traffic.plan(2, {"chat": 1.0})], 0.0, args.seed)   # warm connections
+                rows = []
+                for level in levels:
+                    plans = [traffic.plan(args.turns, mix) for _ in range(level)]
+                    o_calls, o_tokens, d_calls = ollama.calls, ollama.tokens_sent, dvla.calls
+                    ollama.max_in_flight = 0
+                    t0 = time.perf_counter()
+                    records = target.run(level, plans, args.think, args.seed + level)
+                    wall = time.perf_counter() - t0
+                    rows.append(_report(level, records, wall, {
+                        "ollama": {"calls": ollama.calls - o_calls,
+                                   "tokens": ollama.tokens_sent - o_tokens,
+                                   "max_in_flight": ollama.max_in_flight},
+                        "dvla_calls": dvla.calls - d_calls,
+                    }))
+                    print(f"{name}: {level} users done in {wall:.1f}s", file=sys.stderr, flush=True)
+                results[name] = rows
+                print(_table(name, rows), file=sys.stderr)
+            finally:
+                target.close()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
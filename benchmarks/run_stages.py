@@ -0,0 +1,272 @@
+"""Per‑stage latency + accuracy benchmark with stubbed LLM and DVLA backends."""
+# benchmarks/run_stages.py
+#
+#   python -m benchmarks.run_stages -o bench.json
+#   python -m benchmarks.run_stages --per-combo 1 --baseline bench.json   # exit 1 on regression
+#
+# Stages are timed in isolation on the same synthetic image set:
+#   ingest        full cv2.imdecode vs image_ingest's reduced, EXIF‑aware decode
+#   localise      _crop_plate and _localise_plates
+#   readtext      EasyOCR on the localised crops (+ recognition accuracy)
+#   plate_re      PLATE_RE validation
+#   decode        plate_decoder on split, confusion‑corrupted readings
+#   process       processing_agent against stubs/dvla_stub.py
+#   chat_route    chat_agent routing with a fake ChatOllama
+#   graph         full compiled_graph.invoke (+ end‑to‑end accuracy)
+from __future__ import annotations
+
+import argparse, json, os, platform, random, sys, tempfile, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# before the agents are imported: stub DVLA records stay out of ./sightings.db
+os.environ["SIGHTINGS_DB"] = ""
+
+import cv2, numpy as np
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from benchmarks.common import summarise, time_calls
+from benchmarks.synth import Sample, generate
+from registry import resources
+from schema import GraphMessage
+from stubs.dvla_stub import DvlaStub
+
+import agents.processing_agent as processing
+from agents.chat_agent import chat_agent
+from agents.dvla_client import DvlaClient
+from agents.image_ingest import decode_image
+from agents.ocr_agent import CROP_SIZE, _crop_plate, _localise_plates, _pick_plate, plate_candidates
+from agents.ocr_backends import get_backend
+from agents.plate_decoder import decode
+from agents.ocr_cache import ocr_cache
+from agents.processing_agent import PLATE_RE, processing_agent
+
+
+def _accuracy(pairs: List[tuple]) -> float:
+    return sum(got == want for got, want in pairs) / len(pairs) if pairs else 0.0
+
+
+# ─────────────  stages  ──────────────
+def bench_ingest(samples: List[Sample], repeat: int) -> Dict[str, Any]:
+    """Phone‑style JPEG uploads: legacy full decode vs the shared ingestion stage."""
+    blobs = [cv2.imencode(".jpg", s.image, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+             for s in samples]
+
+    def _legacy(raw: bytes):
+        return cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+
+    legacy = [_legacy(b) for b in blobs]
+    reduced = [decode_image(b)[0] for b in blobs]
+    return {
+        "legacy_imdecode": summarise(time_calls(_legacy, [(b,) for b in blobs], repeat)),
+        "decode_image": summarise(time_calls(decode_image, [(b,) for b in blobs], repeat)),
+        "legacy_megapixels": round(sum(i.shape[0] * i.shape[1] for i in legacy) / len(blobs) / 1e6, 2),
+        "megapixels": round(sum(i.shape[0] * i.shape[1] for i in reduced) / len(blobs) / 1e6, 2),
+        # the plate must still be found after the reduced decode
+        "legacy_localise_rate": _accuracy([(bool(_localise_plates(i, top_k=1)), True) for i in legacy]),
+        "localise_rate": _accuracy([(bool(_localise_plates(i, top_k=1)), True) for i in reduced]),
+    }
+
+
+def bench_localise(samples: List[Sample], repeat: int) -> Dict[str, Any]:
+    imgs = [(s.image,) for s in samples]
+    return {
+        "crop_plate": summarise(time_calls(_crop_plate, imgs, repeat)),
+        "localise_plates": summarise(time_calls(_localise_plates, imgs, repeat)),
+    }
+
+
+def bench_readtext(samples: List[Sample], repeat: int) -> Dict[str, Any]:
+    ocr = get_backend()
+    crops = [[c for c, _ in _localise_plates(s.image)] or [s.image] for s in samples]
+
+    def _read(batch):
+        return ocr.read_batch(batch, CROP_SIZE)
+
+    times = time_calls(_read, [(b,) for b in crops], repeat)
+    got = [next((c.plate for c in plate_candidates(_read(b), 1)), "") for b in crops]
+    by_fmt: Dict[str, List[tuple]] = {}
+    for s, g in zip(samples, got):
+        by_fmt.setdefault(s.fmt, []).append((g, s.plate))
+    return {
+        **summarise(times),
+        "accuracy": _accuracy(list(zip(got, (s.plate for s in samples)))),
+        "accuracy_by_format": {f: _accuracy(p) for f, p in by_fmt.items()},
+    }
+
+
+def bench_plate_re(samples: List[Sample], repeat: int) -> Dict[str, Any]:
+    plates = [s.plate for s in samples] + [s.plate[::-1] for s in samples]
+    n = max(1, 10_000 // len(plates))
+    t0 = time.perf_counter()
+    for _ in range(n * repeat):
+        for p in plates:
+            PLATE_RE.match(p)
+    per_call_us = (time.perf_counter() - t0) / (n * repeat * len(plates)) * 1e6
+    return {"per_call_us": round(per_call_us, 3),
+            "valid_rate": _accuracy([(bool(PLATE_RE.match(s.plate)), True) for s in samples])}
+
+
+def bench_decode(samples: List[Sample], repeat: int, seed: int) -> Dict[str, Any]:
+    """Each plate split in two fragments with ~20 % look‑alike substitutions."""
+    rng = random.Random(seed)
+    swap = dict(zip("0158OISB", "OISB0158"))
+    cases = []
+    for s in samples:
+        noisy = "".join(swap.get(ch, ch) if rng.random() < 0.2 else ch for ch in s.plate)
+        cut = rng.randint(2, len(noisy) - 2)
+        cases.append(([(noisy[:cut], 0.8), (noisy[cut:], 0.9)], s.plate))
+
+    times = time_calls(decode, [(frags,) for frags, _ in cases], repeat)
+    ranked = [[c.plate for c in decode(frags, 3)] for frags, _ in cases]
+    return {
+        **summarise(times),
+        "accuracy": _accuracy([(r[:1], [want]) for r, (_, want) in zip(ranked, cases)]),
+        "top3_accuracy": _accuracy([(want in r, True) for r, (_, want) in zip(ranked, cases)]),
+        "legacy_accuracy": _accuracy([(_pick_plate([t for t, _ in frags]), want)
+                                      for frags, want in cases]),
+    }
+
+
+def bench_process(samples: List[Sample], repeat: int, latency: float) -> Dict[str, Any]:
+    msgs = [(GraphMessage(role="delegate", text="process", data={"plate": s.plate}),) for s in samples]
+    saved = processing.API_KEY, processing.dvla
+    with DvlaStub(latency=latency) as stub:
+        try:
+            processing.API_KEY = "bench"
+            processing.dvla = DvlaClient(url=stub.url, api_key="bench")
+            cold = time_calls(processing_agent, msgs, 1)      # every plate misses the cache
+            warm = time_calls(processing_agent, msgs, repeat)
+        finally:
+            processing.API_KEY, processing.dvla = saved
+        calls = stub.calls
+    return {"cold": summarise(cold), "warm": summarise(warm), "upstream_calls": calls}
+
+
+def bench_chat_route(repeat: int) -> Dict[str, Any]:
+    resources.override("chat_llm", FakeListChatModel(responses=["Hi! I'm Zen."]))
+    cases = {
+        "small_talk": GraphMessage(role="user", text="hello there"),
+        "intent_no_image": GraphMessage(role="user", text="please look up this car"),
+        "image": GraphMessage(role="user", text="", data={"image_path": "x.jpg"}),
+        "summary": GraphMessage(role="delegate", text="chat",
+                                data={"vehicle": processing.DEMO_VEHICLE}),
+    }
+    return {name: summarise(time_calls(chat_agent, [(m,)] * 50, repeat))
+            for name, m in cases.items()}
+
+
+def bench_graph(samples: List[Sample], repeat: int) -> Dict[str, Any]:
+    from graph import build_graph
+    compiled, _ = build_graph(ocr_mode="easyocr")      # same path as earlier baselines
+    resources.override("chat_llm", FakeListChatModel(responses=["ok"]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, s in enumerate(samples):
+            p = Path(tmp) / f"{i}.png"
+            cv2.imwrite(str(p), s.image)
+            paths.append(str(p))
+
+        times: List[float] = []
+        got: List[str] = []
+        for _ in range(repeat):
+            got = []
+            ocr_cache.clear()                       # measure real OCR, not cache hits
+            for p in paths:
+                msg = GraphMessage(role="user", text="", data={"image_path": p})
+                t0 = time.perf_counter()
+                out = compiled.invoke(msg)
+                times.append((time.perf_counter() - t0) * 1000)
+                got.append(((out.get("data") or {}).get("vehicle") or {}).get("registrationNumber", ""))
+    return {**summarise(times),
+            "accuracy": _accuracy(list(zip(got, (s.plate for s in samples))))}
+
+
+# ─────────────  regression check  ──────────────
+def _flatten(d: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = float(v)
+    return out
+
+
+def regressions(current: Dict[str, Any], baseline: Dict[str, Any],
+                max_slowdown: float, max_acc_drop: float, min_delta_ms: float = 1.0) -> List[str]:
+    cur, base = _flatten(current["stages"]), _flatten(baseline["stages"])
+    found = []
+    for key, old in base.items():
+        new = cur.get(key)
+        if new is None:
+            continue
+        noise = key.endswith("_ms") and new - old < min_delta_ms     # sub‑ms jitter
+        if key.endswith(("p50_ms", "p95_ms", "per_call_us")) and old and not noise \
+                and new > old * (1 + max_slowdown):
+            found.append(f"{key}: {old:.3f} → {new:.3f} (+{(new / old - 1) * 100:.0f}%)")
+        if "accuracy" in key and new < old - max_acc_drop:
+            found.append(f"{key}: {old:.3f} → {new:.3f}")
+    return found
+
+
+# ─────────────  CLI  ──────────────
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("-o", "--out", help="write JSON results here (default: stdout)")
+    ap.add_argument("--per-combo", type=int, default=2, help="images per format×resolution×noise")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--dvla-latency", type=float, default=0.02, help="stub DVLA seconds/request")
+    ap.add_argument("--stages", default="ingest,localise,readtext,plate_re,decode,process,chat_route,graph")
+    ap.add_argument("--baseline", help="previous results JSON to compare against")
+    ap.add_argument("--max-slowdown", type=float, default=0.25, help="allowed p50/p95 increase")
+    ap.add_argument("--max-accuracy-drop", type=float, default=0.02)
+    ap.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore smaller slowdowns")
+    args = ap.parse_args(argv)
+
+    samples = list(generate(args.per_combo, args.seed))
+    runners: Dict[str, Callable[[], Dict[str, Any]]] = {
+        "ingest": lambda: bench_ingest(samples, args.repeat),
+        "localise": lambda: bench_localise(samples, args.repeat),
+        "readtext": lambda: bench_readtext(samples, args.repeat),
+        "plate_re": lambda: bench_plate_re(samples, args.repeat),
+        "decode": lambda: bench_decode(samples, args.repeat, args.seed),
+        "process": lambda: bench_process(samples, args.repeat, args.dvla_latency),
+        "chat_route": lambda: bench_chat_route(args.repeat),
+        "graph": lambda: bench_graph(samples, args.repeat),
+    }
+
+    stages: Dict[str, Any] = {}
+    for name in args.stages.split(","):
+        try:
+            stages[name] = runners[name]()
+        except ImportError as err:                  # e.g. easyocr not installed
+            stages[name] = {"skipped": str(err)}
+        print(f"{name}: done", file=sys.stderr)
+
+    result = {
+        "meta": {"images": len(samples), "repeat": args.repeat, "seed": args.seed,
+                 "python": platform.python_version(), "machine": platform.machine(),
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "stages": stages,
+    }
+    text = json.dumps(result, indent=2)
+    if args.out:
+        Path(args.out).write_text(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        found = regressions(result, json.loads(Path(args.baseline).read_text()),
+                            args.max_slowdown, args.max_accuracy_drop, args.min_delta_ms)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
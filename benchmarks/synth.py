@@ -0,0 +1,80 @@
+"""Synthetic licence‑plate scenes (UK, India, BH series) rendered with Pillow."""
+from __future__ import annotations
+
+import random, string
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+import cv2, numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+FORMATS = ("uk", "india", "bh")
+RESOLUTIONS: List[Tuple[int, int]] = [(640, 480), (1280, 960), (4000, 3000)]
+NOISE_LEVELS = (0.0, 8.0, 20.0)          # std‑dev of additive Gaussian noise
+
+
+@dataclass
+class Sample:
+    image: np.ndarray                    # BGR, like cv2.imread
+    plate: str
+    fmt: str
+    resolution: Tuple[int, int]
+    noise: float
+
+
+def random_plate(fmt: str, rng: random.Random) -> str:
+    L = lambda n: "".join(rng.choices(string.ascii_uppercase, k=n))      # noqa: E731
+    D = lambda n: "".join(rng.choices(string.digits, k=n))               # noqa: E731
+    if fmt == "uk":
+        return L(2) + D(2) + L(3)                       # KY69WMN
+    if fmt == "india":
+        return L(2) + D(2) + L(2) + D(4)                # KA01AB1234
+    if fmt == "bh":
+        return D(2) + "BH" + D(4) + L(1)                # 22BH6517A
+    raise ValueError(f"unknown plate format '{fmt}'")
+
+
+def render_scene(plate: str, fmt: str, size: Tuple[int, int], noise: float,
+                 rng: random.Random) -> np.ndarray:
+    w, h = size
+    bg = tuple(rng.randint(70, 150) for _ in range(3))
+    scene = Image.new("RGB", (w, h), bg)
+    draw = ImageDraw.Draw(scene)
+
+    # car‑ish block, then the plate on top of it
+    draw.rectangle([w // 6, h // 3, 5 * w // 6, 11 * h // 12], fill=(35, 35, 50))
+    pw = int(w * rng.uniform(0.28, 0.36))
+    ph = int(pw / 4.2)
+    px = (w - pw) // 2 + rng.randint(-w // 12, w // 12)
+    py = int(h * 0.62)
+    plate_bg = (250, 205, 20) if fmt == "uk" and rng.random() < 0.5 else (240, 240, 240)
+    draw.rectangle([px, py, px + pw, py + ph], fill=plate_bg, outline=(0, 0, 0),
+                   width=max(2, pw // 120))
+
+    font = ImageFont.load_default(size=int(ph * 0.62))
+    text = plate if fmt != "uk" else f"{plate[:4]} {plate[4:]}"
+    tw = draw.textlength(text, font=font)
+    if tw > pw * 0.9:                                   # long Indian plates: shrink to fit
+        font = ImageFont.load_default(size=int(ph * 0.62 * pw * 0.9 / tw))
+        tw = draw.textlength(text, font=font)
+    draw.text((px + (pw - tw) / 2, py + ph / 2), text, fill=(0, 0, 0), font=font, anchor="lm")
+
+    if noise:
+        scene = scene.filter(ImageFilter.GaussianBlur(radius=noise / 20))
+    arr = np.asarray(scene, dtype=np.float32)
+    if noise:
+        arr += np.random.default_rng(rng.randint(0, 2**31)).normal(0, noise, arr.shape)
+    return cv2.cvtColor(np.clip(arr, 0, 255).astype(np.uint8), cv2.COLOR_RGB2BGR)
+
+
+def generate(per_combo: int = 2, seed: int = 0,
+             resolutions: List[Tuple[int, int]] = RESOLUTIONS,
+             noise_levels: Tuple[float, ...] = NOISE_LEVELS) -> Iterator[Sample]:
+    """Yield *per_combo* samples for every (format, resolution, noise) combination."""
+    rng = random.Random(seed)
+    for fmt in FORMATS:
+        for res in resolutions:
+            for noise in noise_levels:
+                for _ in range(per_combo):
+                    plate = random_plate(fmt, rng)
+                    yield Sample(render_scene(plate, fmt, res, noise, rng), plate, fmt, res, noise)
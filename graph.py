@@ -1,11 +1,27 @@
 from __future__ import annotations
 from schema import GraphMessage
-from typing import Tuple, Any
+from typing import Tuple, Any, Optional
+from functools import partial
+import os
 from langgraph.graph import StateGraph, START, END
-from agents.chat_agent import chat_agent # import the ChatAgent
-from agents.processing_agent import processing_agent # import the DVLA processing agent
-from agents.ocr_agent import ocr_agent  # import the easyOCR agent
-#from agents.ocr_agent_llm import ocr_agent_llm as ocr_agent # import the LLM-based OCR agent
+from instrumentation import instrument_node, metrics
+from scheduler import schedule_node
+from registry import resources
+from agents.chat_agent import chat_agent, achat_agent # import the ChatAgent
+from agents.processing_agent import processing_agent, aprocessing_agent # import the DVLA processing agent
+from agents.ocr_agent import ocr_agent, aocr_agent  # import the easyOCR agent
+from agents.ocr_agent_llm import ocr_agent_llm, aocr_agent_llm # import the LLM-based OCR agent
+from agents.ocr_cascade import ocr_cascade_agent, aocr_cascade_agent # EasyOCR → LLaVA on doubt
+from agents.ocr_backends import BACKENDS, OCR_BACKEND # text recognisers for the easyocr / cascade nodes
+
+# which OCR node the graph uses: "cascade" (default) | "easyocr" | "llava"
+OCR_MODE = os.getenv("OCR_MODE", "cascade")
+OCR_NODES = {
+    "easyocr": (ocr_agent, aocr_agent),
+    "llava":   (ocr_agent_llm, aocr_agent_llm),
+    "cascade": (ocr_cascade_agent, aocr_cascade_agent),
+}
+BACKEND_NODES = {"easyocr", "cascade"}     # modes whose node runs an OCR backend
 
 
 # ───── routers (unchanged) ─────
@@ -24,14 +40,99 @@ def route_from_process(msg: GraphMessage) -> str:
         return "chat"
     return "END"
 
+# ───── cache gauges for the metrics endpoint ─────
+def _cache_samples():
+    from agents.ocr_cache import ocr_cache
+    from agents.processing_agent import dvla
+    from agents.sighting_store import sightings
+    from agents.chat_agent import TIER_COUNTS, tier_hit_ratios
+    from agents.ocr_cascade import tier_share
+    out = [(f"ocr_cache_{k}", {}, float(v)) for k, v in ocr_cache.stats().items()]
+    out += [(f"dvla_{k}", {}, float(v)) for k, v in dvla.stats().items()]
+    out += [(f"sightings_{k}", {}, float(v)) for k, v in sightings.stats().items()]
+    out += [("chat_tier_replies", {"tier": t}, float(n)) for t, n in TIER_COUNTS.items()]
+    out += [("chat_tier_hit_ratio", {"tier": t}, r) for t, r in tier_hit_ratios().items()]
+    out += [("ocr_cascade_share", {"tier": t}, r) for t, r in tier_share().items()]
+    if resources.loaded("ocr_pool"):
+        out += [(f"ocr_pool_{k}", {}, float(v)) for k, v in resources.get("ocr_pool").stats().items()]
+    return out
+
+metrics.register_collector(_cache_samples)
+
+# ───── checkpointer: per‑session memory keyed by thread_id ─────
+def make_checkpointer(asynchronous: bool = False) -> Any:
+    """
+    SQLite checkpointer when ``CHECKPOINT_DB`` is set (survives restarts),
+    otherwise an in‑process ``MemorySaver``.
+    """
+    path = os.getenv("CHECKPOINT_DB")
+    if not path:
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+
+    if asynchronous:
+        import asyncio, aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        conn = aiosqlite.connect(path)
+        # its worker thread is non‑daemon and only stops on an awaited close(),
+        # which would hang interpreter exit; every checkpoint is committed as
+        # it is written, so nothing is lost when exit takes the thread down
+        conn._thread.daemon = True
+        try:
+            asyncio.get_running_loop()
+            return AsyncSqliteSaver(conn)
+        except RuntimeError:
+            pass
+
+        async def _open() -> Any:
+            return AsyncSqliteSaver(conn)
+        # built at import time (app.py) with no loop running: the saver keeps
+        # the loop it was made on only for its sync API, which async graphs never call
+        return asyncio.run(_open())
+
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+
 # ───── builder ─────
-def build_graph() -> Tuple[Any, StateGraph]:
-    """Return (compiled_runnable, raw_state_graph)."""
+def build_graph(asynchronous: bool = False,
+                checkpointer: Optional[Any] = None,
+                ocr_mode: Optional[str] = None,
+                ocr_backend: Optional[str] = None) -> Tuple[Any, StateGraph]:
+    """
+    Return (compiled_runnable, raw_state_graph).
+
+    With ``asynchronous=True`` every node is a coroutine, so the compiled
+    graph must be driven with ``ainvoke`` / ``astream``. With a
+    *checkpointer* each call needs ``{"configurable": {"thread_id": ...}}``
+    and conversation state carries over between calls on the same thread.
+    *ocr_mode* overrides ``OCR_MODE`` and *ocr_backend* ``OCR_BACKEND``.
+    Build the per‑turn config with ``scheduler.run_config`` so every node
+    shares one deadline.
+    """
+    mode = ocr_mode or OCR_MODE
+    if mode not in OCR_NODES:
+        raise ValueError(f"Unknown OCR_MODE '{mode}' (expected one of {', '.join(OCR_NODES)})")
+    backend = ocr_backend or OCR_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown OCR_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
     g = StateGraph(GraphMessage)
 
-    g.add_node("chat", chat_agent)
-    g.add_node("ocr", ocr_agent)
-    g.add_node("process", processing_agent)
+    sync_ocr, async_ocr = OCR_NODES[mode]
+    if mode in BACKEND_NODES:
+        sync_ocr, async_ocr = partial(sync_ocr, backend=backend), partial(async_ocr, backend=backend)
+    if asynchronous:
+        chat, ocr, process = achat_agent, async_ocr, aprocessing_agent
+    else:
+        chat, ocr, process = chat_agent, sync_ocr, processing_agent
+
+    # timing / outcome / route metrics per node (no‑op when GRAPH_METRICS=0),
+    # behind per‑node concurrency limits + deadlines (no‑op when GRAPH_SCHEDULER=0)
+    g.add_node("chat", schedule_node("chat", instrument_node("chat", chat, route_from_chat)))
+    g.add_node("ocr", schedule_node("ocr", instrument_node("ocr", ocr, route_from_ocr)))
+    g.add_node("process", schedule_node("process",
+                                        instrument_node("process", process, route_from_process)))
 
     g.add_edge(START, "chat")
 
@@ -42,5 +143,5 @@ def build_graph() -> Tuple[Any, StateGraph]:
     g.add_conditional_edges("process", route_from_process,
                             {"chat": "chat", "END": END})
 
-    compiled = g.compile()
+    compiled = g.compile(checkpointer=checkpointer)
     return compiled, g
@@ -0,0 +1,235 @@
+# instrumentation.py  – per‑node timing / outcome metrics for the LangGraph pipeline
+#
+# ``instrument_node`` wraps a node function (sync or async) and records, per
+# node: duration histogram, ok/error counts, the route its router picks and
+# payload sizes. Everything lives in in‑process histograms/counters and is
+# rendered in Prometheus text format by ``render_prometheus``.
+#
+# GRAPH_METRICS=0 disables it: ``instrument_node`` then returns the node
+# untouched, so there is no per‑call overhead at all.
+from __future__ import annotations
+
+import bisect, inspect, json, os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from schema import GraphMessage
+
+METRICS_ENABLED = os.getenv("GRAPH_METRICS", "1") != "0"
+
+# seconds; roughly log‑spaced from a cache hit to a slow LLaVA call
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTE_BUCKETS: Tuple[float, ...] = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]      # (metric name, labels, value)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Bucket‑interpolated estimate, good enough for a dashboard."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.buckets[i - 1] if i else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.collectors: List[Callable[[], List[Sample]]] = []
+        self.help: Dict[str, str] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float,
+                buckets: Tuple[float, ...] = BUCKETS, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def register_collector(self, fn: Callable[[], List[Sample]]) -> None:
+        """*fn* returns gauge samples computed at scrape time (cache stats etc.)."""
+        self.collectors.append(fn)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+metrics = MetricsRegistry()
+metrics.help.update({
+    "graph_node_duration_seconds": "Wall time spent inside a graph node",
+    "graph_node_calls_total": "Node invocations by outcome",
+    "graph_node_route_total": "Route chosen after a node",
+    "graph_node_payload_bytes": "Approximate size of node input/output messages",
+})
+
+
+# ─────────────  node wrapper  ──────────────
+def _payload_size(msg: Any) -> int:
+    if not isinstance(msg, GraphMessage):
+        return 0
+    data = json.dumps(msg.data, default=str) if msg.data else ""
+    return len(msg.text or "") + len(data)
+
+
+def _record(node: str, router: Optional[Callable[[GraphMessage], str]],
+            state: Any, result: Any, err: Optional[BaseException], t0: float) -> None:
+    metrics.observe("graph_node_duration_seconds", time.perf_counter() - t0, node=node)
+    metrics.inc("graph_node_calls_total", node=node, outcome="error" if err else "ok")
+    metrics.observe("graph_node_payload_bytes", _payload_size(state), BYTE_BUCKETS,
+                    node=node, direction="in")
+    if err is None:
+        metrics.observe("graph_node_payload_bytes", _payload_size(result), BYTE_BUCKETS,
+                        node=node, direction="out")
+        if router is not None and isinstance(result, GraphMessage):
+            metrics.inc("graph_node_route_total", node=node, route=router(result))
+
+
+def instrument_node(node: str, fn: Callable, router: Optional[Callable[[GraphMessage], str]] = None,
+                    enabled: Optional[bool] = None) -> Callable:
+    """Return *fn* wrapped with metrics, or *fn* itself when metrics are disabled."""
+    if not (METRICS_ENABLED if enabled is None else enabled):
+        return fn
+
+    if inspect.iscoroutinefunction(fn):
+        async def _async_node(state: GraphMessage, config: RunnableConfig) -> Any:
+            t0, result, err = time.perf_counter(), None, None
+            try:
+                result = await fn(state, config)
+                return result
+            except BaseException as e:
+                err = e
+                raise
+            finally:
+                _record(node, router, state, result, err, t0)
+        _async_node.__name__ = getattr(fn, "__name__", node)
+        return _async_node
+
+    # no functools.wraps: LangGraph must see *this* signature (with ``config``)
+    def _node(state: GraphMessage, config: RunnableConfig) -> Any:
+        t0, result, err = time.perf_counter(), None, None
+        try:
+            result = fn(state, config)
+            return result
+        except BaseException as e:
+            err = e
+            raise
+        finally:
+            _record(node, router, state, result, err, t0)
+    _node.__name__ = getattr(fn, "__name__", node)
+    return _node
+
+
+# ─────────────  exposition  ──────────────
+def _fmt_labels(labels: Dict[str, str] | Labels) -> str:
+    items = labels.items() if isinstance(labels, dict) else labels
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in items)
+    return "{" + inner + "}" if inner else ""
+
+
+def render_prometheus(registry: MetricsRegistry = metrics) -> str:
+    lines: List[str] = []
+    typed: set = set()
+
+    def _head(name: str, kind: str) -> None:
+        if name not in typed:
+            typed.add(name)
+            if name in registry.help:
+                lines.append(f"# HELP {name} {registry.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    with registry._lock:
+        counters = sorted(registry.counters.items())
+        hists = sorted(registry.histograms.items(), key=lambda kv: kv[0])
+        hists = [(k, (list(h.counts), h.sum, h.count, h.buckets)) for k, h in hists]
+
+    for (name, labels), value in counters:
+        _head(name, "counter")
+        lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+
+    for (name, labels), (counts, total, count, buckets) in hists:
+        _head(name, "histogram")
+        cum = 0
+        for le, c in zip([*map(str, buckets), "+Inf"], counts):
+            cum += c
+            lines.append(f"{name}_bucket{_fmt_labels((*labels, ('le', le)))} {cum}")
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {total:g}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+
+    for collect in registry.collectors:
+        for name, labels, value in collect():
+            _head(name, "gauge")
+            lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def node_summary(registry: MetricsRegistry = metrics) -> List[List[Any]]:
+    """Rows of [node, calls, errors, p50 ms, p95 ms, mean ms] for the UI table."""
+    rows = []
+    with registry._lock:
+        for (name, labels), h in sorted(registry.histograms.items()):
+            if name != "graph_node_duration_seconds":
+                continue
+            node = dict(labels)["node"]
+            errors = registry.counters.get(
+                ("graph_node_calls_total", (("node", node), ("outcome", "error"))), 0
+            )
+            rows.append([node, h.count, int(errors), round(h.quantile(0.5) * 1000, 1),
+                         round(h.quantile(0.95) * 1000, 1),
+                         round(h.sum / h.count * 1000, 1) if h.count else 0.0])
+    return rows
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` in Prometheus text format from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
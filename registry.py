@@ -0,0 +1,108 @@
+# registry.py  – lazily initialised heavy resources (OCR weights, LLM clients)
+#
+# Agents register a *factory* at import time and call ``resources.get(name)``
+# on first use, so importing graph.py no longer loads EasyOCR or builds
+# Ollama clients. ``warm_up()`` loads everything in a background thread
+# while the UI is already serving.
+from __future__ import annotations
+
+import logging, os, threading, time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import requests
+
+log = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL   = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# httpx timeout per connect / read: a generation stalled this long fails instead of hanging
+OLLAMA_TIMEOUT_S  = float(os.getenv("OLLAMA_TIMEOUT_S", "60"))
+
+
+class ResourceRegistry:
+    def __init__(self) -> None:
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._warmers: Dict[str, Callable[[Any], None]] = {}
+        self._lazy_only: set = set()
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.load_times: Dict[str, float] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        warm: Optional[Callable[[Any], None]] = None,
+        eager: bool = True,
+    ) -> None:
+        """
+        Declare how to build *name*; ``warm`` runs once after a warm‑up load.
+        ``eager=False`` leaves it out of a default ``warm_up()``.
+        """
+        with self._guard:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            if warm is not None:
+                self._warmers[name] = warm
+            if eager:
+                self._lazy_only.discard(name)
+            else:
+                self._lazy_only.add(name)
+
+    def get(self, name: str) -> Any:
+        inst = self._instances.get(name)
+        if inst is not None:
+            return inst
+        with self._locks[name]:                      # KeyError → never registered
+            inst = self._instances.get(name)
+            if inst is None:
+                t0 = time.perf_counter()
+                inst = self._factories[name]()
+                self.load_times[name] = time.perf_counter() - t0
+                self._instances[name] = inst
+                log.info("loaded %s in %.2fs", name, self.load_times[name])
+        return inst
+
+    def override(self, name: str, instance: Any) -> None:
+        """Swap in a ready‑made instance (fakes for tests / benchmarks)."""
+        with self._guard:
+            self._locks.setdefault(name, threading.Lock())
+            self._instances[name] = instance
+
+    def loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm_up(self, names: Optional[Iterable[str]] = None,
+                background: bool = True) -> Optional[threading.Thread]:
+        """Load (and warm) the given resources, by default all eager ones."""
+        todo = list(names) if names is not None else \
+            [n for n in self._factories if n not in self._lazy_only]
+
+        def _run() -> None:
+            for name in todo:
+                try:
+                    inst = self.get(name)
+                    if name in self._warmers:
+                        self._warmers[name](inst)
+                except Exception as err:      # warm‑up is best effort
+                    log.warning("warm‑up of %s failed: %s", name, err)
+
+        if not background:
+            _run()
+            return None
+        t = threading.Thread(target=_run, name="warm-up", daemon=True)
+        t.start()
+        return t
+
+
+def ollama_preload(model: str) -> None:
+    """Ask Ollama to load *model* into memory and keep it resident."""
+    requests.post(
+        f"{OLLAMA_BASE_URL}/api/generate",
+        json={"model": model, "keep_alive": OLLAMA_KEEP_ALIVE},
+        timeout=300,
+    ).raise_for_status()
+
+
+resources = ResourceRegistry()
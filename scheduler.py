@@ -0,0 +1,252 @@
+# scheduler.py  – admission control, deadlines and load shedding for graph nodes
+#
+# ``schedule_node`` wraps a node function (sync or async) behind a per‑node
+# gate shared by every graph in the process:
+#
+#   • at most ``limit`` calls of the node run at once; later callers wait FIFO
+#     in a bounded queue (``queue`` places, ``wait_s`` at most)
+#   • queue full or wait expired → the node is skipped and the run ends with a
+#     fast "busy, try again" reply instead of piling up work and memory
+#   • async nodes are cancelled after ``timeout_s`` – cancelling an Ollama
+#     stream closes its connection, so the server stops generating too
+#
+# A run budget is an absolute ``time.monotonic()`` deadline in
+# ``config["configurable"]["deadline"]`` (build one with ``run_config``).
+# LangGraph hands the same configurable values to every node, so
+# chat → ocr → process → chat all draw on one budget: waits and timeouts are
+# capped by what is left, and once it is spent no further node starts. Sync
+# nodes can't be interrupted mid‑call; there the Ollama / DVLA clients' own
+# timeouts bound a stalled request.
+#
+# GRAPH_SCHEDULER=0 disables it: ``schedule_node`` returns the node untouched.
+from __future__ import annotations
+
+import asyncio, inspect, os, threading, time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+from instrumentation import metrics
+from schema import GraphMessage
+
+SCHEDULER_ENABLED = os.getenv("GRAPH_SCHEDULER", "1") != "0"
+GRAPH_DEADLINE_S  = float(os.getenv("GRAPH_DEADLINE_S", "120"))     # whole user turn
+
+
+@dataclass(frozen=True)
+class NodePolicy:
+    limit: int          # calls running at once
+    queue: int          # callers allowed to wait for a slot
+    wait_s: float       # longest wait for a slot
+    timeout_s: float    # longest run once admitted (async nodes)
+
+
+def _policy(node: str, limit: int, queue: int, wait_s: float, timeout_s: float) -> NodePolicy:
+    """Defaults, overridable per node with SCHED_<NODE>_LIMIT / _QUEUE / _WAIT_S / _TIMEOUT_S."""
+    env = lambda key, default: os.getenv(f"SCHED_{node.upper()}_{key}", str(default))   # noqa: E731
+    return NodePolicy(int(env("LIMIT", limit)), int(env("QUEUE", queue)),
+                      float(env("WAIT_S", wait_s)), float(env("TIMEOUT_S", timeout_s)))
+
+
+NODE_POLICIES: Dict[str, NodePolicy] = {
+    # one Ollama generation per call (canned / cached replies are instant)
+    "chat":    _policy("chat", 4, 32, 20, 60),
+    # CPU‑bound OCR or a LLaVA call; the OCR pool, when on, sets the pace
+    "ocr":     _policy("ocr", max(2, int(os.getenv("OCR_POOL_SIZE", "0"))), 16, 30, 60),
+    # DVLA lookups: pooled session of 10, 10 s timeout with retries
+    "process": _policy("process", 8, 32, 10, 35),
+}
+DEFAULT_POLICY = _policy("default", 4, 16, 20, 60)
+
+BUSY_REPLY = GraphMessage(
+    role="assistant",
+    text="⚠️ I’m handling a lot of requests right now – please try again in a moment."
+)
+TIMEOUT_REPLY = GraphMessage(
+    role="assistant",
+    text="⚠️ That took too long to answer – please try again in a moment."
+)
+
+metrics.help.update({
+    "graph_node_queue_wait_seconds": "Time a node call waited for a concurrency slot",
+    "graph_node_shed_total": "Node calls refused without running, by reason",
+    "graph_node_timeouts_total": "Node calls cancelled at their deadline",
+    "graph_node_in_flight": "Node calls running now",
+    "graph_node_queue_depth": "Node calls waiting for a slot now",
+    "graph_node_concurrency_limit": "Configured concurrent calls per node",
+})
+
+
+def run_config(thread_id: str, budget_s: float = GRAPH_DEADLINE_S, **configurable: Any) -> Dict:
+    """Graph config for one user turn: the session's thread plus a run deadline."""
+    return {"configurable": {"thread_id": thread_id,
+                             "deadline": time.monotonic() + budget_s, **configurable}}
+
+
+def _remaining(config: Optional[RunnableConfig]) -> Optional[float]:
+    deadline = ((config or {}).get("configurable") or {}).get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _cap(limit_s: float, left: Optional[float]) -> float:
+    return limit_s if left is None else max(0.0, min(limit_s, left))
+
+
+# ─────────────  gate  ──────────────
+class _Waiter:
+    __slots__ = ("granted", "wake")
+
+    def __init__(self, wake: Callable[[], None]) -> None:
+        self.granted = False
+        self.wake = wake
+
+
+class NodeGate:
+    """FIFO counting semaphore with a bounded wait queue, usable from threads and event loops."""
+
+    def __init__(self, node: str, policy: NodePolicy) -> None:
+        self.node = node
+        self.policy = policy
+        self.in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _enter(self, wake: Callable[[], None]) -> _Waiter | str:
+        """Slot taken ("ok"), a place in the queue, or "queue_full"."""
+        with self._lock:
+            if self.in_flight < self.policy.limit and not self._waiters:
+                self.in_flight += 1
+                return "ok"
+            if len(self._waiters) >= self.policy.queue:
+                return "queue_full"
+            waiter = _Waiter(wake)
+            self._waiters.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Stop waiting; True if a slot was handed over in the meantime (caller now owns it)."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:                     # hand the slot straight to the next waiter
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+                return
+            self.in_flight -= 1
+
+    def acquire(self, timeout: float) -> Optional[str]:
+        """None once a slot is held, else the shed reason ("queue_full" / "wait_timeout")."""
+        event = threading.Event()
+        entered = self._enter(event.set)
+        if isinstance(entered, str):
+            return None if entered == "ok" else entered
+        if event.wait(timeout) or self._abandon(entered):
+            return None
+        return "wait_timeout"
+
+    async def aacquire(self, timeout: float) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        entered = self._enter(lambda: loop.call_soon_threadsafe(
+            lambda: fut.done() or fut.set_result(True)))
+        if isinstance(entered, str):
+            return None if entered == "ok" else entered
+        try:
+            await asyncio.wait_for(fut, timeout)
+            return None
+        except asyncio.TimeoutError:
+            return None if self._abandon(entered) else "wait_timeout"
+        except asyncio.CancelledError:
+            if self._abandon(entered):            # granted just as we were cancelled
+                self.release()
+            raise
+
+
+GATES: Dict[str, NodeGate] = {}
+_gates_lock = threading.Lock()
+
+
+def gate_for(node: str) -> NodeGate:
+    """The process‑wide gate of *node* (sync and async graphs share it)."""
+    with _gates_lock:
+        if node not in GATES:
+            GATES[node] = NodeGate(node, NODE_POLICIES.get(node, DEFAULT_POLICY))
+        return GATES[node]
+
+
+def _gate_samples():
+    out = []
+    for node, gate in list(GATES.items()):
+        out += [("graph_node_in_flight", {"node": node}, float(gate.in_flight)),
+                ("graph_node_queue_depth", {"node": node}, float(gate.waiting)),
+                ("graph_node_concurrency_limit", {"node": node}, float(gate.policy.limit))]
+    return out
+
+metrics.register_collector(_gate_samples)
+
+
+# ─────────────  node wrapper  ──────────────
+def _shed(node: str, reason: str) -> GraphMessage:
+    metrics.inc("graph_node_shed_total", node=node, reason=reason)
+    return TIMEOUT_REPLY if reason == "budget_spent" else BUSY_REPLY
+
+
+def schedule_node(node: str, fn: Callable, enabled: Optional[bool] = None) -> Callable:
+    """Return *fn* behind *node*'s gate, or *fn* itself when the scheduler is disabled."""
+    if not (SCHEDULER_ENABLED if enabled is None else enabled):
+        return fn
+    gate = gate_for(node)
+
+    if inspect.iscoroutinefunction(fn):
+        async def _async_node(state: GraphMessage, config: RunnableConfig) -> Any:
+            left = _remaining(config)
+            if left is not None and left <= 0:
+                return _shed(node, "budget_spent")
+            t0 = time.perf_counter()
+            refused = await gate.aacquire(_cap(gate.policy.wait_s, left))
+            if refused:
+                return _shed(node, refused)
+            metrics.observe("graph_node_queue_wait_seconds", time.perf_counter() - t0, node=node)
+            try:
+                left = _remaining(config)
+                if left is not None and left <= 0:
+                    return _shed(node, "budget_spent")
+                return await asyncio.wait_for(fn(state, config), _cap(gate.policy.timeout_s, left))
+            except asyncio.TimeoutError:
+                metrics.inc("graph_node_timeouts_total", node=node)
+                return TIMEOUT_REPLY
+            finally:
+                gate.release()
+        _async_node.__name__ = getattr(fn, "__name__", node)
+        return _async_node
+
+    # no functools.wraps: LangGraph must see *this* signature (with ``config``)
+    def _node(state: GraphMessage, config: RunnableConfig) -> Any:
+        left = _remaining(config)
+        if left is not None and left <= 0:
+            return _shed(node, "budget_spent")
+        t0 = time.perf_counter()
+        refused = gate.acquire(_cap(gate.policy.wait_s, left))
+        if refused:
+            return _shed(node, refused)
+        metrics.observe("graph_node_queue_wait_seconds", time.perf_counter() - t0, node=node)
+        try:
+            left = _remaining(config)
+            if left is not None and left <= 0:
+                return _shed(node, "budget_spent")
+            return fn(state, config)
+        finally:
+            gate.release()
+    _node.__name__ = getattr(fn, "__name__", node)
+    return _node
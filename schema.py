@@ -1,7 +1,18 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Annotated, Dict, List, Optional
+
+
+def _keep_unless_none(old, new):
+    """LangGraph reducer: a node that leaves the field as None keeps the stored value."""
+    return old if new is None else new
+
 
 class GraphMessage(BaseModel):
     role: str            # "user" | "assistant" | "delegate"
     text: Optional[str]
     data: Optional[Dict] = None
+
+    # per‑session conversation state, persisted by the graph checkpointer
+    history: Annotated[Optional[List[Dict[str, str]]], _keep_unless_none] = None   # [{"role", "content"}]
+    summary: Annotated[Optional[str], _keep_unless_none] = None                    # rolled‑up older turns
+    last_vehicle: Annotated[Optional[Dict], _keep_unless_none] = None              # most recent lookup
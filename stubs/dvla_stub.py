@@ -0,0 +1,109 @@
+# stubs/dvla_stub.py  – local stand‑in for the DVLA Vehicle‑Enquiry API
+#
+#   python -m stubs.dvla_stub --port 8081 --latency 0.2
+#   DVLA_URL=http://127.0.0.1:8081/vehicles DVLA_API_KEY=dummy python app.py
+#
+# or in‑process:
+#   with DvlaStub(latency=0.05, not_found={"AB12CDE"}) as stub:
+#       client = DvlaClient(url=stub.url, api_key="dummy")
+from __future__ import annotations
+
+import argparse, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+
+from agents.processing_agent import DEMO_VEHICLE
+
+
+class DvlaStub:
+    """Threaded HTTP server answering POSTs like the DVLA API and counting calls."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        not_found: Iterable[str] = (),
+        fail_first: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.not_found = set(not_found)
+        self.fail_first = fail_first           # answer 503 to the first N requests
+        self.calls = 0
+        self.calls_by_plate: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/vehicles"
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"           # keep‑alive, like the real API
+            disable_nagle_algorithm = True          # headers + body go out without delayed‑ACK stalls
+
+            def do_POST(self) -> None:  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+                plate = json.loads(body or b"{}").get("registrationNumber", "")
+                with stub._lock:
+                    stub.calls += 1
+                    stub.calls_by_plate[plate] = stub.calls_by_plate.get(plate, 0) + 1
+                    failing = stub.calls <= stub.fail_first
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if failing:
+                    status, payload = 503, {"errors": [{"status": "503"}]}
+                elif plate in stub.not_found:
+                    status, payload = 404, {"errors": [{"status": "404", "title": "Vehicle Not Found"}]}
+                else:
+                    status, payload = 200, {**DEMO_VEHICLE, "registrationNumber": plate}
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:   # keep test output quiet
+                pass
+
+        return Handler
+
+    def start(self) -> "DvlaStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "DvlaStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local DVLA API stub")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8081)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    ap.add_argument("--not-found", nargs="*", default=[], help="plates answered with 404")
+    args = ap.parse_args()
+
+    stub = DvlaStub(args.host, args.port, args.latency, args.not_found)
+    print(f"DVLA stub listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
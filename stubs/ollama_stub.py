@@ -0,0 +1,214 @@
+# stubs/ollama_stub.py  – local stand‑in for the Ollama HTTP API
+#
+#   python -m stubs.ollama_stub --port 11435 --token-latency 0.03
+#   OLLAMA_BASE_URL=http://127.0.0.1:11435 python app.py
+#
+# or in‑process:
+#   with OllamaStub(token_latency=0.02, first_token_latency=0.2) as stub:
+#       llm = ChatOllama(model="llama3:8B", base_url=stub.url)
+#
+# Answers /api/chat and /api/generate (streamed NDJSON or one JSON object),
+# plus the /api/tags, /api/show and /api/version probes clients make. Text
+# replies are split into word tokens sent every *token_latency* seconds after
+# *first_token_latency* (prompt evaluation); requests carrying images get
+# *vision_reply* (a string, or a callable for a fresh plate per request), so
+# LLaVA "reads" that plate off any upload.
+from __future__ import annotations
+
+import argparse, json, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+CHAT_REPLY = "Sure! I'm Zen, a stub model standing in for llama3 during load tests."
+VISION_REPLY = "KY69WMN"
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\S+\s*", text) or [""]
+
+
+def _stamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000000Z", time.gmtime())
+
+
+class OllamaStub:
+    """Threaded HTTP server streaming canned replies at a configurable token rate."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token_latency: float = 0.0,
+        first_token_latency: float = 0.0,
+        reply: str = CHAT_REPLY,
+        vision_reply: Union[str, Callable[[], str]] = VISION_REPLY,
+        fail_first: int = 0,
+    ) -> None:
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.reply = reply
+        self.vision_reply = vision_reply
+        self.fail_first = fail_first           # answer 500 to the first N generations
+        self.calls = 0
+        self.calls_by_path: Dict[str, int] = {}
+        self.tokens_sent = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"           # keep‑alive + chunked streaming
+            disable_nagle_algorithm = True          # each token goes out on its own
+
+            def _send_json(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, lines: Iterator[Dict]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for line in lines:
+                    data = json.dumps(line).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.startswith("/api/tags"):
+                    self._send_json(200, {"models": [{"name": "llama3:8B", "model": "llama3:8B"},
+                                                     {"name": "llava:13b", "model": "llava:13b"}]})
+                elif self.path.startswith("/api/version"):
+                    self._send_json(200, {"version": "0.0.0-stub"})
+                else:
+                    body = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def do_POST(self) -> None:  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+                req = json.loads(body or b"{}")
+                path = self.path.split("?")[0]
+                with stub._lock:
+                    stub.calls += 1
+                    stub.calls_by_path[path] = stub.calls_by_path.get(path, 0) + 1
+
+                if path == "/api/show":
+                    self._send_json(200, {"modelfile": "", "parameters": "", "template": "",
+                                          "details": {"family": "stub"},
+                                          "capabilities": ["completion", "vision"]})
+                    return
+                if path not in ("/api/chat", "/api/generate"):
+                    self._send_json(404, {"error": f"unknown endpoint {path}"})
+                    return
+                # keep‑alive / preload: no prompt, nothing to generate
+                if path == "/api/generate" and not req.get("prompt"):
+                    self._send_json(200, {"model": req.get("model", ""), "created_at": _stamp(),
+                                          "response": "", "done": True, "done_reason": "load"})
+                    return
+
+                with stub._lock:
+                    failing = stub.calls_by_path.get("/api/chat", 0) \
+                        + stub.calls_by_path.get("/api/generate", 0) <= stub.fail_first
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                try:
+                    if failing:
+                        self._send_json(500, {"error": "stub failure"})
+                    else:
+                        self._generate(path, req)
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+            def _generate(self, path: str, req: Dict) -> None:
+                msgs = req.get("messages") or []
+                vision = bool(req.get("images")) or any(m.get("images") for m in msgs)
+                reply = stub.vision_reply if vision else stub.reply
+                tokens = _tokens(reply() if callable(reply) else reply)
+                model = req.get("model", "")
+                chat = path == "/api/chat"
+
+                def _chunk(text: str, done: bool) -> Dict:
+                    out: Dict = {"model": model, "created_at": _stamp(), "done": done}
+                    if chat:
+                        out["message"] = {"role": "assistant", "content": text}
+                    else:
+                        out["response"] = text
+                    if done:
+                        out.update(done_reason="stop", prompt_eval_count=len(json.dumps(req)) // 4,
+                                   eval_count=len(tokens))
+                    return out
+
+                def _lines() -> Iterator[Dict]:
+                    time.sleep(stub.first_token_latency)
+                    for i, tok in enumerate(tokens):
+                        if i and stub.token_latency:
+                            time.sleep(stub.token_latency)
+                        with stub._lock:
+                            stub.tokens_sent += 1
+                        yield _chunk(tok, False)
+                    yield _chunk("", True)
+
+                if req.get("stream", True):
+                    self._stream(_lines())
+                    return
+                text = "".join(c.get("message", {}).get("content", "") or c.get("response", "")
+                               for c in _lines())
+                self._send_json(200, _chunk(text, True))
+
+            def log_message(self, *args) -> None:   # keep test output quiet
+                pass
+
+        return Handler
+
+    def start(self) -> "OllamaStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "OllamaStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local Ollama API stub")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--token-latency", type=float, default=0.03, help="seconds between tokens")
+    ap.add_argument("--first-token-latency", type=float, default=0.2, help="prompt‑eval seconds")
+    ap.add_argument("--vision-reply", default=VISION_REPLY, help="what LLaVA 'reads' off any image")
+    args = ap.parse_args()
+
+    stub = OllamaStub(args.host, args.port, args.token_latency, args.first_token_latency,
+                      vision_reply=args.vision_reply)
+    print(f"Ollama stub listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
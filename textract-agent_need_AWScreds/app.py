@@ -1,27 +1,66 @@
 # app.py
-import tempfile
+import io, os, tempfile
 import gradio as gr
-from textract_agent import extract_agent     # the object we just built
+from textract_tool import TextractTool
+
+# "direct": image bytes → Textract, no temp file, no LLM (default)
+# "agent":  the original ReAct loop – llama3 decides to call the tool
+TEXTRACT_MODE = os.getenv("TEXTRACT_MODE", "direct")
+
+textract_tool = TextractTool()
+
+
+def _png_bytes(image) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def ocr_direct(image, tidy: bool = False) -> str:
+    """Textract straight from memory; llama3 only if *tidy* is asked for."""
+    text = textract_tool.detect_bytes(_png_bytes(image))
+    if tidy and text:
+        from textract_agent import tidy_text
+        text = tidy_text(text)
+    return text
+
+
+def ocr_via_agent(image) -> str:
+    """The ReAct path: the tool reads from a path, so this still needs a temp file."""
+    from textract_agent import get_extract_agent
+    extract_agent = get_extract_agent()          # built on first use
 
-def ocr_pipeline(image):
-    """Gradio callback."""
     # 1. Save upload to a temp file (Textract wants bytes, but our tool reads from path)
     with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t:
-        image.save(t.name)
-
-    # 2. Ask the agent to run the tool
-    prompt = (
-        f"Run textract_image on {t.name}. "
-        "Return only the detected text; do not include any additional commentary."
-    )
-    result = extract_agent.run(prompt)
-    return result
-
-with gr.Blocks(title="Textract Demo") as demo:
-    gr.Markdown("### 🖼️ Image‐to‐Text with Textract + LangChain Agent")
+        image.save(t, format="PNG")
+    try:
+        # 2. Ask the agent to run the tool
+        prompt = (
+            f"Run textract_image on {t.name}. "
+            "Return only the detected text; do not include any additional commentary."
+        )
+        return extract_agent.run(prompt)
+    finally:
+        os.unlink(t.name)
+
+
+def ocr_pipeline(image, mode: str = TEXTRACT_MODE, tidy: bool = False):
+    """Gradio callback."""
+    if image is None:
+        return ""
+    if mode == "agent":
+        return ocr_via_agent(image)
+    return ocr_direct(image, tidy)
+
+
+with gr.Blocks(title="Textract Demo") as demo:
+    gr.Markdown("### 🖼️ Image‐to‐Text with Textract + LangChain Agent")
     inp = gr.Image(type="pil", label="Upload an image")
+    with gr.Row():
+        mode = gr.Radio(["direct", "agent"], value=TEXTRACT_MODE, label="Mode")
+        tidy = gr.Checkbox(value=False, label="Tidy text with llama3 (direct mode)")
     out = gr.Textbox(label="Extracted text", lines=12)
-    inp.change(ocr_pipeline, inputs=inp, outputs=out)
+    inp.change(ocr_pipeline, inputs=[inp, mode, tidy], outputs=out)
 
 if __name__ == "__main__":
     demo.launch(server_name="127.0.0.1", server_port=7860)
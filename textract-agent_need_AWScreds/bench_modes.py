@@ -0,0 +1,121 @@
+"""Textract app: direct mode vs the ReAct agent – latency and disk I/O per image."""
+# bench_modes.py  (run from this folder)
+#
+#   python bench_modes.py                              # stub Textract, scripted 0.8 s LLM turns
+#   python bench_modes.py --llm ollama --images 5     # real llama3 for the agent path
+#
+# Disk I/O is read from /proc/self/io (rchar / wchar: bytes through read/write
+# syscalls, so tmpfs and page‑cache hits count too) plus temp files left behind.
+from __future__ import annotations
+
+import argparse, glob, json, os, re, statistics, tempfile, time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from textract_stub import TextractStub
+
+
+def _io_counters() -> Optional[Dict[str, int]]:
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (line.split(": ") for line in f)}
+    except OSError:                               # not Linux
+        return None
+
+
+def _temp_files() -> int:
+    return len(glob.glob(os.path.join(tempfile.gettempdir(), "tmp*.png")))
+
+
+def _images(n: int, seed: int = 0) -> List[Image.Image]:
+    rng = np.random.default_rng(seed)
+    out = []
+    for i in range(n):
+        img = Image.fromarray(rng.integers(180, 255, (600, 900, 3), dtype=np.uint8))
+        ImageDraw.Draw(img).text((40, 40), f"Invoice #{i:04d}  total £{rng.integers(10, 999)}",
+                                 fill=(0, 0, 0))
+        out.append(img)
+    return out
+
+
+def _scripted_react_llm(latency: float) -> Any:
+    """Chat model that plays the two ReAct turns a real llama3 needs, with a fixed delay."""
+    from langchain_core.language_models.chat_models import SimpleChatModel
+
+    class ScriptedReAct(SimpleChatModel):
+        latency: float = 0.8
+
+        @property
+        def _llm_type(self) -> str:
+            return "scripted-react"
+
+        def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+            time.sleep(self.latency)
+            prompt = "\n".join(str(m.content) for m in messages)
+            if "Observation:" not in prompt:
+                path = re.search(r"Run textract_image on (\S+?)\. ", prompt).group(1)
+                return f"I should run the tool.\nAction: textract_image\nAction Input: {path}"
+            seen = prompt.rsplit("Observation:", 1)[1].split("\nThought:")[0].strip()
+            return f"I now know the final answer.\nFinal Answer: {seen}"
+
+    return ScriptedReAct(latency=latency)
+
+
+def _run(label: str, fn, images: List[Image.Image]) -> Dict[str, Any]:
+    io0, tmp0 = _io_counters(), _temp_files()
+    times = []
+    for img in images:
+        t0 = time.perf_counter()
+        fn(img)
+        times.append((time.perf_counter() - t0) * 1000)
+    io1 = _io_counters()
+    res: Dict[str, Any] = {
+        "mean_ms": round(statistics.fmean(times), 1),
+        "p50_ms": round(statistics.median(times), 1),
+        "temp_files_left": _temp_files() - tmp0,
+    }
+    if io0 and io1:
+        res["write_bytes_per_image"] = (io1["wchar"] - io0["wchar"]) // len(images)
+        res["read_bytes_per_image"] = (io1["rchar"] - io0["rchar"]) // len(images)
+        res["write_syscalls_per_image"] = round((io1["syscw"] - io0["syscw"]) / len(images), 1)
+    print(f"{label}: done", flush=True)
+    return res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--images", type=int, default=10)
+    ap.add_argument("--latency", type=float, default=0.1, help="stub Textract seconds/request")
+    ap.add_argument("--llm", choices=["scripted", "ollama"], default="scripted")
+    ap.add_argument("--llm-latency", type=float, default=0.8, help="scripted seconds per LLM turn")
+    args = ap.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "stub")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "stub")
+    images = _images(args.images)
+
+    with TextractStub(latency=args.latency) as stub:
+        os.environ["TEXTRACT_ENDPOINT_URL"] = stub.url
+        import app                                   # picks the stub endpoint up
+        app.textract_tool.endpoint_url = stub.url
+
+        results: Dict[str, Any] = {"direct": _run("direct", app.ocr_direct, images)}
+        try:
+            import textract_agent
+            llm = _scripted_react_llm(args.llm_latency) if args.llm == "scripted" else None
+            agent = textract_agent.build_agent(llm, app.textract_tool)
+            textract_agent.extract_agent = agent
+            results["agent"] = _run("agent", app.ocr_via_agent, images)
+        except ImportError as err:                   # langchain agents not installed
+            results["agent"] = {"skipped": str(err)}
+
+    if "p50_ms" in results["agent"]:
+        results["p50_speedup"] = round(results["agent"]["p50_ms"] / results["direct"]["p50_ms"], 1)
+    print(json.dumps({"images": args.images, "textract_latency_s": args.latency,
+                      "llm": args.llm, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""TextractTool latency / throughput against the local stub: legacy vs pooled vs batched."""
+# bench_textract.py  (run from this folder)
+#
+#   python bench_textract.py                          # 64 images, 50 ms stub latency
+#   python bench_textract.py --images 200 --latency 0.2 --concurrency 16
+from __future__ import annotations
+
+import argparse, asyncio, io, json, os, statistics, time
+from typing import Callable, Dict, List
+
+import boto3
+import numpy as np
+from PIL import Image
+
+from textract_stub import TextractStub, expected_text
+from textract_tool import TextractTool, _lines
+
+
+def _images(n: int, side: int, seed: int = 0) -> List[bytes]:
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        buf = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (side, side, 3), dtype=np.uint8)).save(buf, "PNG")
+        out.append(buf.getvalue())
+    return out
+
+
+def _summary(per_call_ms: List[float], wall_s: float, n: int) -> Dict[str, float]:
+    res = {"wall_s": round(wall_s, 3), "images_per_s": round(n / wall_s, 1)}
+    if per_call_ms:
+        q = statistics.quantiles(per_call_ms, n=20)
+        res.update(mean_ms=round(statistics.fmean(per_call_ms), 2),
+                   p50_ms=round(statistics.median(per_call_ms), 2), p95_ms=round(q[18], 2))
+    return res
+
+
+def _sequential(fn: Callable[[bytes], str], images: List[bytes]) -> Dict[str, float]:
+    times, t0 = [], time.perf_counter()
+    for img in images:
+        t = time.perf_counter()
+        assert fn(img) == expected_text(img)
+        times.append((time.perf_counter() - t) * 1000)
+    return _summary(times, time.perf_counter() - t0, len(images))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--images", type=int, default=64)
+    ap.add_argument("--side", type=int, default=256, help="synthetic image edge, px")
+    ap.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    # the stub ignores signatures, but botocore still wants *some* credentials
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "stub")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "stub")
+    images = _images(args.images, args.side)
+
+    with TextractStub(latency=args.latency) as stub:
+        tool = TextractTool(endpoint_url=stub.url, max_concurrency=args.concurrency)
+
+        def legacy(img: bytes) -> str:          # the old _run: a fresh client every call
+            client = boto3.client("textract", endpoint_url=stub.url, region_name=tool.region_name)
+            return _lines(client.detect_document_text(Document={"Bytes": img}))
+
+        results = {"legacy_client_per_call": _sequential(legacy, images),
+                   "pooled_sequential": _sequential(tool.detect_bytes, images)}
+
+        t0 = time.perf_counter()
+        assert tool.batch_images(images) == [expected_text(i) for i in images]
+        results["batch_threads"] = _summary([], time.perf_counter() - t0, len(images))
+
+        t0 = time.perf_counter()
+        got = asyncio.run(tool.abatch_images(images))
+        assert got == [expected_text(i) for i in images]
+        results["abatch_async"] = _summary([], time.perf_counter() - t0, len(images))
+        peak = stub.max_in_flight
+
+    print(json.dumps({
+        "images": args.images, "stub_latency_s": args.latency,
+        "concurrency_cap": args.concurrency, "stub_peak_in_flight": peak,
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
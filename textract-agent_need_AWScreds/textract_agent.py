@@ -1,14 +1,40 @@
 # agent.py
 from langchain_ollama import ChatOllama
-from langchain.agents import initialize_agent, AgentType
 from textract_tool import TextractTool
 
 llm = ChatOllama(model="llama3:8B")          # streamed=False by default
 textract_tool = TextractTool()
 
-extract_agent = initialize_agent(
-    tools=[textract_tool],
-    llm=llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=False,
+
+def build_agent(agent_llm=None, tool=None):
+    """ReAct agent around the Textract tool (injectable LLM / tool for benchmarks)."""
+    from langchain.agents import initialize_agent, AgentType      # only the agent path needs it
+    return initialize_agent(
+        tools=[tool or textract_tool],
+        llm=agent_llm or llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=False,
+    )
+
+
+extract_agent = None          # built by get_extract_agent(); benchmarks may assign their own
+
+
+def get_extract_agent():
+    """The ReAct agent, built on first use so direct mode / tidy_text never need it."""
+    global extract_agent
+    if extract_agent is None:
+        extract_agent = build_agent()
+    return extract_agent
+
+# Direct mode calls Textract itself; the LLM is only used, optionally, here
+TIDY_PROMPT = (
+    "Below is raw OCR output. Fix obvious character errors and broken line "
+    "wraps. Return only the corrected text, no commentary.\n\n{text}"
 )
+
+
+def tidy_text(text: str, tidy_llm=None) -> str:
+    """One LLM round trip to clean up OCR text."""
+    reply = (tidy_llm or llm).invoke(TIDY_PROMPT.format(text=text))
+    return reply.content if isinstance(reply.content, str) else text
@@ -0,0 +1,127 @@
+# textract_stub.py  – local stand‑in for the AWS Textract DetectDocumentText API
+#
+#   python textract_stub.py --port 4566 --latency 0.3
+#   TEXTRACT_ENDPOINT_URL=http://127.0.0.1:4566 AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x python app.py
+#
+# or in‑process:
+#   with TextractStub(latency=0.05) as stub:
+#       tool = TextractTool(endpoint_url=stub.url)
+#
+# Speaks the JSON 1.1 protocol botocore uses (POST /, X-Amz-Target header);
+# signatures are not checked. Each image yields two LINE blocks: a fixed
+# banner and the first 12 hex chars of its SHA‑1, so callers can check that
+# batch results come back in input order.
+from __future__ import annotations
+
+import argparse, base64, hashlib, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+BANNER = "TEXTRACT STUB"
+
+
+def expected_text(img_bytes: bytes) -> str:
+    """What the stub answers for *img_bytes* (after TextractTool joins the lines)."""
+    return f"{BANNER}\n{hashlib.sha1(img_bytes).hexdigest()[:12]}"
+
+
+def _line(i: int, text: str) -> Dict:
+    return {"BlockType": "LINE", "Id": f"line-{i}", "Text": text, "Confidence": 99.0}
+
+
+class TextractStub:
+    """Threaded HTTP server answering DetectDocumentText and counting calls."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 fail_first: int = 0) -> None:
+        self.latency = latency
+        self.fail_first = fail_first           # answer 500 to the first N requests
+        self.calls = 0
+        self.bytes_received = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"           # keep‑alive, like the real endpoint
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+                target = self.headers.get("X-Amz-Target", "")
+                with stub._lock:
+                    stub.calls += 1
+                    stub.bytes_received += len(body)
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                    failing = stub.calls <= stub.fail_first
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if failing:
+                        status, payload = 500, {"__type": "InternalServerError", "message": "stub"}
+                    elif not target.endswith("DetectDocumentText"):
+                        status, payload = 400, {"__type": "UnknownOperationException",
+                                                "message": target}
+                    else:
+                        doc = json.loads(body or b"{}").get("Document", {})
+                        img = base64.b64decode(doc.get("Bytes", ""))
+                        blocks: List[Dict] = [{"BlockType": "PAGE", "Id": "page-1"}]
+                        blocks += [_line(i, t) for i, t in enumerate(expected_text(img).split("\n"))]
+                        status, payload = 200, {"DocumentMetadata": {"Pages": 1}, "Blocks": blocks}
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-amz-json-1.1")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:   # keep test output quiet
+                pass
+
+        return Handler
+
+    def start(self) -> "TextractStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "TextractStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Local AWS Textract stub")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=4566)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    args = ap.parse_args()
+
+    stub = TextractStub(args.host, args.port, args.latency)
+    print(f"Textract stub listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -1,11 +1,71 @@
 # OCR using AWS Textract
 # This tool extracts text from images using AWS Textract.
-# Keep credentials in environment variables or ~/.aws/credentials; for demos, IAM user with TextractFullAccess is fine.
+# Keep credentials in environment variables or ~/.aws/credentials; for demos, IAM user with TextractFullAccess is fine.
+#
+# Offline: point TEXTRACT_ENDPOINT_URL at textract_stub.py (any dummy AWS keys will do)
+#   python textract_stub.py --port 4566 &
+#   TEXTRACT_ENDPOINT_URL=http://127.0.0.1:4566 AWS_ACCESS_KEY_ID=x AWS_SECRET_ACCESS_KEY=x python app.py
 
 
 # tools/textract_tool.py
+from __future__ import annotations
+
+import asyncio, os, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
 import boto3
-from langchain.tools import BaseTool          # or langchain_community.tools if you’re on ≥0.2
+from botocore.config import Config
+from langchain_core.tools import BaseTool
+from pydantic import Field, PrivateAttr
+
+TEXTRACT_ENDPOINT_URL   = os.getenv("TEXTRACT_ENDPOINT_URL") or None     # None → real AWS
+TEXTRACT_REGION         = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "us-east-1"
+TEXTRACT_MAX_CONCURRENCY = int(os.getenv("TEXTRACT_MAX_CONCURRENCY", "8"))
+
+ImageInput = Union[str, bytes]                 # file path or raw image bytes
+
+
+# ─── client pool: one thread‑safe client per (endpoint, region) ──────────
+# boto3 *clients* are thread‑safe; building one costs tens of ms (endpoint
+# resolution, credential chain, service model), so build once and share.
+# max_pool_connections sizes urllib3's keep‑alive pool to the concurrency cap.
+_clients: Dict[Tuple[Optional[str], str, int], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(endpoint_url: Optional[str] = None, region_name: str = TEXTRACT_REGION,
+               max_connections: int = TEXTRACT_MAX_CONCURRENCY) -> Any:
+    key = (endpoint_url, region_name, max_connections)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = boto3.session.Session().client(
+                    "textract",
+                    endpoint_url=endpoint_url,
+                    region_name=region_name,
+                    config=Config(max_pool_connections=max_connections,
+                                  retries={"mode": "standard", "max_attempts": 3}),
+                )
+    return client
+
+
+def _lines(resp: Dict[str, Any]) -> str:
+    # Textract LINE blocks carry "Text" ("DetectedText" is Rekognition's key)
+    return "\n".join(
+        item.get("Text", "")
+        for item in resp.get("Blocks", [])
+        if item["BlockType"] == "LINE"
+    )
+
+
+def _read(image: ImageInput) -> bytes:
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    with open(image, "rb") as f:
+        return f.read()
 
 
 class TextractTool(BaseTool):
@@ -15,22 +75,62 @@ class TextractTool(BaseTool):
         "Input: absolute file path to an image; output: plain text."
     )
 
+    endpoint_url: Optional[str] = Field(default_factory=lambda: TEXTRACT_ENDPOINT_URL)
+    region_name: str = TEXTRACT_REGION
+    max_concurrency: int = TEXTRACT_MAX_CONCURRENCY
+
+    _slots: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _slots_loop: Any = PrivateAttr(default=None)
+
     # Optional: you can declare args_schema for validation; skipped here.
 
+    @property
+    def client(self) -> Any:
+        return get_client(self.endpoint_url, self.region_name, self.max_concurrency)
+
+    def detect_bytes(self, img_bytes: bytes) -> str:
+        """Textract on in‑memory image bytes (PNG / JPEG, ≤ 10 MB)."""
+        return _lines(self.client.detect_document_text(Document={"Bytes": img_bytes}))
+
     def _run(self, image_path: str) -> str:
         """Synchronous execution."""
-        client = boto3.client("textract")
+        return self.detect_bytes(_read(image_path))
+
+    # ─── async: blocking botocore calls on threads, capped per event loop ─
+    def _async_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_concurrency), loop
+        return self._slots
+
+    async def _adetect(self, image: ImageInput) -> str:
+        async with self._async_slots():
+            return await asyncio.to_thread(lambda: self.detect_bytes(_read(image)))
+
+    async def _arun(self, image_path: str) -> str:
+        """Asynchronous execution (at most ``max_concurrency`` requests in flight)."""
+        return await self._adetect(image_path)
 
-        with open(image_path, "rb") as f:
-            img_bytes = f.read()
+    # ─── batches: many images in, results out in input order ─────────────
+    def batch_images(self, images: Sequence[ImageInput], return_exceptions: bool = False,
+                     ) -> List[Union[str, Exception]]:
+        """Paths and/or bytes → text per image; concurrency capped at ``max_concurrency``."""
+        def _one(image: ImageInput) -> Union[str, Exception]:
+            try:
+                return self.detect_bytes(_read(image))
+            except Exception as err:
+                if not return_exceptions:
+                    raise
+                return err
 
-        resp = client.detect_document_text(Document={"Bytes": img_bytes})
-        lines = [
-            item["DetectedText"]
-            for item in resp.get("Blocks", [])
-            if item["BlockType"] == "LINE"
-        ]
-        return "\n".join(lines)
+        if not images:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(images)),
+                                thread_name_prefix="textract") as pool:
+            return list(pool.map(_one, images))
 
-    async def _arun(self, *args, **kwargs):
-        raise NotImplementedError("TextractTool does not support async yet")
+    async def abatch_images(self, images: Sequence[ImageInput], return_exceptions: bool = False,
+                            ) -> List[Union[str, BaseException]]:
+        """Async ``batch_images``; shares the per‑loop cap with ``_arun``."""
+        return list(await asyncio.gather(*(self._adetect(i) for i in images),
+                                         return_exceptions=return_exceptions))
@@ -0,0 +1,285 @@
+# video_ingest.py  – plate recognition over recorded video or a camera stream
+#
+#   python video_ingest.py gate_cam.mp4                 -o events.jsonl
+#   python video_ingest.py rtsp://cam/stream            --max-gap 3
+#   python video_ingest.py 0                            # first local webcam
+#
+# Frames are sampled adaptively: a cheap frame‑difference on a thumbnail
+# decides whether anything moved; idle stretches are skipped with grab()
+# (no colour conversion) and the stride widens, motion narrows it again.
+# A car that drives in and parks is only read while it moves, so a track
+# still short of min_readings gets confirmation reads on still frames
+# (at the base stride) for up to --max-gap seconds after its last reading.
+# Sampled frames go through _localise_plates + batched EasyOCR, readings
+# are tracked across frames, and each finished track is voted on and sent
+# to processing_agent exactly once.
+from __future__ import annotations
+
+import argparse, json, sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+import cv2, numpy as np
+
+from schema import GraphMessage
+from agents.ocr_agent import CROP_SIZE, Box, _iou, _localise_plates, plate_candidates
+from agents.ocr_backends import get_backend
+from agents.processing_agent import PLATE_RE, processing_agent
+
+
+# ─────────────  frame sampling  ──────────────
+class MotionSampler:
+    """Decides how many frames to skip next, based on thumbnail differencing."""
+
+    def __init__(self, min_stride: int = 2, max_stride: int = 30,
+                 threshold: float = 3.0, thumb_width: int = 160) -> None:
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.threshold = threshold             # mean abs diff (0‑255) that counts as motion
+        self.thumb_width = thumb_width
+        self.stride = min_stride
+        self._prev: Optional[np.ndarray] = None
+
+    def moved(self, frame: np.ndarray) -> bool:
+        h, w = frame.shape[:2]
+        thumb = cv2.resize(frame, (self.thumb_width, max(1, h * self.thumb_width // w)),
+                           interpolation=cv2.INTER_AREA)
+        thumb = cv2.GaussianBlur(cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        prev, self._prev = self._prev, thumb
+        moved = prev is None or float(cv2.absdiff(prev, thumb).mean()) > self.threshold
+
+        # motion → sample densely; stillness → back off exponentially
+        self.stride = self.min_stride if moved else min(self.max_stride, self.stride * 2)
+        return moved
+
+
+# ─────────────  tracking + voting  ──────────────
+@dataclass
+class Reading:
+    t: float
+    plate: str
+    conf: float
+    box: Box
+
+
+@dataclass
+class Track:
+    id: int
+    readings: List[Reading] = field(default_factory=list)
+    seen_t: float = 0.0                 # last time the scene showed this track could still be there
+
+    @property
+    def first_t(self) -> float:
+        return self.readings[0].t
+
+    @property
+    def last_t(self) -> float:
+        return self.readings[-1].t
+
+    @property
+    def box(self) -> Box:
+        return self.readings[-1].box
+
+    def vote(self) -> Tuple[str, float]:
+        """Confidence‑weighted vote; format‑valid strings win over invalid ones."""
+        scores: Dict[str, float] = defaultdict(float)
+        for r in self.readings:
+            scores[r.plate] += r.conf
+        best = max(scores, key=lambda p: (bool(PLATE_RE.match(p)), scores[p]))
+        return best, scores[best] / sum(scores.values())
+
+
+class PlateTracker:
+    def __init__(self, max_gap_s: float = 2.0, min_similarity: float = 0.6,
+                 min_readings: int = 2) -> None:
+        self.max_gap_s = max_gap_s
+        self.min_similarity = min_similarity
+        self.min_readings = min_readings
+        self._open: List[Track] = []
+        self._next_id = 1
+
+    def update(self, t: float, readings: List[Reading]) -> List[Track]:
+        """Attach readings to open tracks; return tracks that just finished."""
+        for r in readings:
+            match = max(
+                self._open,
+                key=lambda tr: max(_iou(r.box, tr.box),
+                                   SequenceMatcher(None, r.plate, tr.readings[-1].plate).ratio()),
+                default=None,
+            )
+            if match is not None and (
+                _iou(r.box, match.box) > 0.3
+                or SequenceMatcher(None, r.plate, match.readings[-1].plate).ratio() >= self.min_similarity
+            ):
+                match.readings.append(r)
+                match.seen_t = r.t
+            else:
+                self._open.append(Track(self._next_id, [r], r.t))
+                self._next_id += 1
+
+        done = [tr for tr in self._open if t - tr.seen_t > self.max_gap_s]
+        self._open = [tr for tr in self._open if tr not in done]
+        return [tr for tr in done if len(tr.readings) >= self.min_readings]
+
+    def unconfirmed(self, t: float) -> bool:
+        """An open track is short of ``min_readings`` and was last read within the gap."""
+        return any(len(tr.readings) < self.min_readings and t - tr.last_t <= self.max_gap_s
+                   for tr in self._open)
+
+    def keep_alive(self, t: float) -> None:
+        """Nothing moved since the last sample, so every open track is still in view."""
+        for tr in self._open:
+            tr.seen_t = t
+
+    def flush(self) -> List[Track]:
+        done, self._open = self._open, []
+        return [tr for tr in done if len(tr.readings) >= self.min_readings]
+
+
+# ─────────────  OCR on one frame  ──────────────
+def read_frame(frame: np.ndarray) -> List[Reading]:
+    candidates = _localise_plates(frame)
+    if not candidates:
+        return []
+    results = get_backend().read_batch([crop for crop, _ in candidates], CROP_SIZE)
+    readings = []
+    for (_, box), frags in zip(candidates, results):
+        ranked = plate_candidates([frags], top_n=1)                 # decoded + confusion‑fixed
+        if ranked:
+            readings.append(Reading(0.0, ranked[0].plate, ranked[0].score, box))
+    return readings
+
+
+# ─────────────  public API  ──────────────
+def _open_capture(source: str) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video source '{source}'")
+    return cap
+
+
+def _fresh(track: Track, recent: Dict[str, float], dedup_s: float) -> bool:
+    plate, _ = track.vote()
+    last = recent.get(plate)
+    recent[plate] = track.last_t
+    return last is None or track.first_t - last > dedup_s
+
+
+def _finish(track: Track, lookup: bool) -> Dict:
+    plate, agreement = track.vote()
+    event: Dict = {
+        "track_id": track.id,
+        "plate": plate,
+        "agreement": round(agreement, 3),
+        "readings": len(track.readings),
+        "first_t": round(track.first_t, 2),
+        "last_t": round(track.last_t, 2),
+    }
+    if lookup:
+        res = processing_agent(GraphMessage(role="delegate", text="process", data={"plate": plate}))
+        if res.data and "vehicle" in res.data:
+            event["vehicle"] = res.data["vehicle"]
+        else:
+            event["error"] = res.text
+    return event
+
+
+def iter_plate_events(
+    source: str,
+    sampler: Optional[MotionSampler] = None,
+    tracker: Optional[PlateTracker] = None,
+    lookup: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+    dedup_s: float = 30.0,
+) -> Iterator[Dict]:
+    """
+    Yield one event per tracked vehicle (plate vote + optional DVLA lookup).
+    A plate already reported within *dedup_s* seconds is not reported again.
+    """
+    recent: Dict[str, float] = {}
+    sampler = sampler or MotionSampler()
+    tracker = tracker or PlateTracker()
+    stats = stats if stats is not None else {}
+    stats.update(frames=0, sampled=0, ocr_frames=0)
+
+    cap = _open_capture(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    skip = 0
+    try:
+        while True:
+            if skip:
+                if not cap.grab():                    # advance without decoding to BGR
+                    break
+                stats["frames"] += 1
+                skip -= 1
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            stats["frames"] += 1
+            stats["sampled"] += 1
+            t = (stats["frames"] - 1) / fps
+
+            readings: List[Reading] = []
+            moved = sampler.moved(frame)
+            # still scene but a fresh track needs another reading → read it anyway
+            confirm = not moved and tracker.unconfirmed(t)
+            if moved or confirm:
+                stats["ocr_frames"] += 1
+                readings = read_frame(frame)
+                for r in readings:
+                    r.t = t
+            if not moved:
+                tracker.keep_alive(t)
+            if confirm:
+                sampler.stride = sampler.min_stride
+            for track in tracker.update(t, readings):
+                if _fresh(track, recent, dedup_s):
+                    yield _finish(track, lookup)
+            skip = sampler.stride - 1
+    finally:
+        cap.release()
+
+    for track in tracker.flush():
+        if _fresh(track, recent, dedup_s):
+            yield _finish(track, lookup)
+
+
+def run_video(source: str, out: TextIO, lookup: bool = True, **kwargs) -> Dict[str, int]:
+    stats: Dict[str, int] = {}
+    for event in iter_plate_events(source, lookup=lookup, stats=stats, **kwargs):
+        out.write(json.dumps(event) + "\n")
+        out.flush()
+    return stats
+
+
+# ─────────────  CLI  ──────────────
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Licence‑plate events from video → JSONL")
+    ap.add_argument("source", help="video file, stream URL or camera index")
+    ap.add_argument("-o", "--out", default="-", help="output JSONL path ('-' = stdout)")
+    ap.add_argument("--min-stride", type=int, default=2)
+    ap.add_argument("--max-stride", type=int, default=30)
+    ap.add_argument("--motion-threshold", type=float, default=3.0)
+    ap.add_argument("--max-gap", type=float, default=2.0, help="seconds before a track closes")
+    ap.add_argument("--min-readings", type=int, default=2)
+    ap.add_argument("--no-lookup", action="store_true", help="skip processing_agent")
+    args = ap.parse_args(argv)
+
+    sampler = MotionSampler(args.min_stride, args.max_stride, args.motion_threshold)
+    tracker = PlateTracker(args.max_gap, min_readings=args.min_readings)
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        stats = run_video(args.source, out, not args.no_lookup, sampler=sampler, tracker=tracker)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"frames={stats['frames']} sampled={stats['sampled']} ocr={stats['ocr_frames']}",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())